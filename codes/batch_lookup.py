@@ -0,0 +1,146 @@
+"""
+Compute the LEXI look direction and the target separations for a list of timestamps.
+
+The timestamps are read from a file, or from stdin, one per line or from one column of a CSV
+file. They are processed in fixed-size vectorized chunks and every chunk is written out before
+the next one is read, so memory stays bounded however long the list is. Throughput is reported
+on stderr.
+
+    python batch_lookup.py event_times.txt -o separations.csv
+    cat event_times.txt | python batch_lookup.py --targets Earth Sun > separations.csv
+    python batch_lookup.py events.csv --time-column event_time --format npy -o separations_npy
+
+The npy format writes a directory with one .npy file per column and a meta.json, which can be
+loaded back memory-mapped with table_cache.load_table.
+
+With LEXI_LOOKUP_SERVICE=host:port the lookups go to a running lookup_service instead of loading
+the data in this process.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from look_direction_engine import TARGETS
+from lookup_service import open_engine
+from table_cache import TableWriter
+from time_index import LOOKUP_MODES, to_epoch_ns
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def read_timestamps(source, chunk_size=DEFAULT_CHUNK_SIZE, time_column=None):
+    """
+    Yield the timestamps of source (a path or a file object) as int64 epoch-ns arrays of at most
+    chunk_size entries. Without time_column every line is one timestamp, otherwise source is a
+    CSV file with a header and the timestamps are read from that column. Timestamps that cannot
+    be parsed become NaT (the int64 minimum), which the lookups answer with an empty row.
+    """
+    if time_column is None:
+        reader = pd.read_csv(
+            source, header=None, names=["time"], dtype=str, chunksize=chunk_size, sep="\t"
+        )
+        time_column = "time"
+    else:
+        reader = pd.read_csv(source, usecols=[time_column], dtype=str, chunksize=chunk_size)
+    for chunk in reader:
+        yield to_epoch_ns(chunk[time_column].str.strip().to_numpy(), errors="coerce")
+
+
+def lookup_chunks(engine, chunks, targets=None, mode="nearest", tolerance=None, all_columns=False):
+    """
+    Yield the look direction DataFrame of every chunk of query times.
+    """
+    for query_ns in chunks:
+        if all_columns:
+            yield engine.at(query_ns, mode=mode, tolerance=tolerance)
+        else:
+            yield engine.lookup(query_ns, targets=targets, mode=mode, tolerance=tolerance)
+
+
+def format_times(rows):
+    """
+    Turn the datetime columns of rows into ISO 8601 strings ("2025-03-05T12:00:30.000000Z") in
+    one vectorized pass, which is much faster than letting to_csv format every timestamp. Missing
+    times become empty fields.
+    """
+    rows = rows.copy(deep=False)
+    for column in rows.columns:
+        if isinstance(rows[column].dtype, pd.DatetimeTZDtype):
+            values = pd.DatetimeIndex(rows[column]).tz_convert(None).to_numpy()
+            text = np.datetime_as_string(values, unit="us", timezone="UTC")
+            text[np.isnat(values)] = ""
+            rows[column] = text
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "input", nargs="?", default="-", help="File with the timestamps, - for stdin (default)"
+    )
+    parser.add_argument("-o", "--output", default="-", help="Output path, - for stdout (default)")
+    parser.add_argument("--format", choices=["csv", "npy"], default="csv", help="Output format")
+    parser.add_argument(
+        "--time-column", help="Read the timestamps from this column of a CSV file with a header"
+    )
+    parser.add_argument(
+        "--targets", nargs="+", choices=TARGETS, default=TARGETS, help="Targets to report"
+    )
+    parser.add_argument("--mode", choices=LOOKUP_MODES, default="nearest", help="LEXI lookup mode")
+    parser.add_argument(
+        "--tolerance", help="Maximum distance to the LEXI sample, e.g. 1min (default: none)"
+    )
+    parser.add_argument(
+        "--all-columns", action="store_true", help="Also write every STK ephemeris column"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Timestamps per chunk"
+    )
+    args = parser.parse_args(argv)
+
+    if args.format == "npy" and args.output == "-":
+        parser.error("--format npy needs an output directory given with -o")
+
+    # A running lookup_service named by LEXI_LOOKUP_SERVICE saves loading the data here
+    engine = open_engine(processes=None)
+    engine.load()
+
+    source = sys.stdin if args.input == "-" else args.input
+    chunks = read_timestamps(source, args.chunk_size, args.time_column)
+    results = lookup_chunks(
+        engine, chunks, args.targets, args.mode, args.tolerance, args.all_columns
+    )
+
+    n_rows = 0
+    # Timestamps that could not be parsed, written out as empty rows
+    n_invalid = 0
+    start = time.perf_counter()
+    if args.format == "npy":
+        with TableWriter(args.output) as writer:
+            for rows in results:
+                writer.append(rows)
+                n_rows += len(rows)
+                n_invalid += int(rows["epoch_utc"].isna().sum())
+    else:
+        out = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+        try:
+            for rows in results:
+                format_times(rows).to_csv(out, header=n_rows == 0, index=False)
+                n_rows += len(rows)
+                n_invalid += int(rows["epoch_utc"].isna().sum())
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    elapsed = time.perf_counter() - start
+
+    rate = n_rows / elapsed if elapsed > 0 else float("inf")
+    print(f"Processed {n_rows} timestamps in {elapsed:.2f} s ({rate:,.0f} rows/s)", file=sys.stderr)
+    if n_invalid:
+        print(f"{n_invalid} timestamps could not be parsed and have empty rows", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Benchmark every stage of the look direction pipeline on synthetic data of growing size.
+
+For each size a synthetic data set (synthetic_data.write_dataset) is written to a temporary
+directory, then every stage is timed on its own (best of --repeat runs) and run once more under
+tracemalloc for its peak memory. The results, along with the commit and library versions, are
+saved as JSON so runs can be compared across commits. Plots are drawn on matplotlib's Agg canvas,
+so no display is needed.
+
+    python benchmark.py --rows 10000 100000 1000000 -o bench.json
+    python benchmark.py --rows 10000000 --stages parse_exports resample_1min --repeat 1
+"""
+
+import argparse
+import gc
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from decimate import MinMaxDecimator  # noqa: E402
+from ephemeris import EphemerisInterpolator  # noqa: E402
+from look_direction_engine import (  # noqa: E402
+    TARGETS,
+    LookDirectionEngine,
+    angular_distance,
+    build_lexi_pointing_df,
+)
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+from pointing_ingest import DEFAULT_CHUNK_SIZE, load_pointing_files  # noqa: E402
+from streaming_merge import join_ephemeris  # noqa: E402
+from synthetic_data import write_dataset  # noqa: E402
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+# Single-time lookups timed per run, like one fetch_data call each
+SINGLE_LOOKUPS = 200
+# Plot updates per run of the update_plot stage, the rows are spread evenly over them
+PLOT_TICKS = 100
+# Plot width in pixels, the number of decimation buckets per series
+PLOT_WIDTH = 800
+
+
+class Dataset:
+    """
+    The synthetic files of one benchmark size, and what the stages share: the parsed pointing
+    and the ephemeris, loaded on first use outside of any timing.
+    """
+
+    def __init__(self, directory, n_rows, n_files, ephemeris_rows):
+        self.directory = directory
+        self.n_rows = n_rows
+        self.ephemeris_rows = ephemeris_rows
+        self.ephemeris_file, self.pattern = write_dataset(
+            directory, n_rows, n_files, ephemeris_rows
+        )
+        self.files = sorted(glob.glob(self.pattern))
+        self._pointing = None
+        self._ephemeris = None
+
+    @property
+    def pointing(self):
+        if self._pointing is None:
+            self._pointing = load_pointing_files(self.files, processes=1)
+        return self._pointing
+
+    @property
+    def ephemeris(self):
+        if self._ephemeris is None:
+            self._ephemeris = EphemerisInterpolator.from_csv(self.ephemeris_file)
+        return self._ephemeris
+
+    def engine(self, cache_dir):
+        return LookDirectionEngine(
+            self.ephemeris_file, self.pattern, cache_dir=cache_dir, live_pointing=False
+        )
+
+
+def _chunks(arrays, chunk_size=DEFAULT_CHUNK_SIZE):
+    n_rows = arrays[0].size
+    for start in range(0, n_rows, chunk_size):
+        yield tuple(array[start : start + chunk_size] for array in arrays)
+
+
+def stage_parse_exports(data):
+    """
+    Parse the Grafana pointing exports into merged, sorted arrays (get_lexi_look_direction_data).
+    """
+    return lambda: load_pointing_files(data.files, processes=1), data.n_rows
+
+
+def stage_resample_1min(data):
+    """
+    Stream the exports into the 1-minute LEXI pointing table (build_lexi_pointing_df).
+    """
+    return lambda: build_lexi_pointing_df(data.pattern), data.n_rows
+
+
+def stage_read_ephemeris(data):
+    """
+    Read the STK export and fit the interpolator.
+    """
+    return lambda: EphemerisInterpolator.from_csv(data.ephemeris_file), data.ephemeris_rows
+
+
+def stage_merge_ephemeris(data):
+    """
+    Join every pointing sample with the nearest STK row, chunk by chunk (the merge_asof step).
+    """
+    pointing, ephemeris = data.pointing, data.ephemeris
+
+    def run():
+        for _ in join_ephemeris(_chunks(pointing), ephemeris, TARGETS):
+            pass
+
+    return run, data.n_rows
+
+
+def stage_angular_distance(data):
+    """
+    Angular distance of every pointing sample to one target track.
+    """
+    _, dec, ra = data.pointing
+    target_ra, target_dec = ra[::-1].copy(), dec[::-1].copy()
+    return lambda: angular_distance(ra, dec, target_ra, target_dec), data.n_rows
+
+
+def stage_engine_load(data):
+    """
+    LookDirectionEngine.load() with an empty cache: ephemeris, 1-minute table and cache writes.
+    """
+
+    def run():
+        with tempfile.TemporaryDirectory(dir=data.directory) as cache_dir:
+            data.engine(cache_dir).load()
+
+    return run, data.n_rows
+
+
+def stage_lookup_single(data):
+    """
+    SINGLE_LOOKUPS one-time lookups with all the columns, like fetch_data on every refresh.
+    """
+    engine = data.engine(os.path.join(data.directory, ".cache"))
+    engine.load()
+    epochs_ns = data.pointing[0]
+    times = np.linspace(epochs_ns[0], epochs_ns[-1], SINGLE_LOOKUPS).astype(np.int64)
+
+    def run():
+        for query_ns in times:
+            engine.at(query_ns)
+
+    return run, SINGLE_LOOKUPS
+
+
+def stage_lookup_batch(data):
+    """
+    One vectorized lookup of the look direction and separations at n_rows random times.
+    """
+    engine = data.engine(os.path.join(data.directory, ".cache"))
+    engine.load()
+    epochs_ns = data.pointing[0]
+    rng = np.random.default_rng(0)
+    times = rng.integers(epochs_ns[0], epochs_ns[-1], data.n_rows)
+
+    def run():
+        for query_ns in _chunks((times,)):
+            engine.lookup(query_ns[0])
+
+    return run, data.n_rows
+
+
+def stage_update_plot(data):
+    """
+    Stream the pointing into two decimated plot series over PLOT_TICKS updates and draw the
+    figure on every tenth update, like update_plot/draw_plot.
+    """
+    epochs_ns, dec, ra = data.pointing
+    x = epochs_ns / 86_400e9
+    bounds = np.linspace(0, x.size, PLOT_TICKS + 1).astype(int)
+
+    def run():
+        figure = Figure(figsize=(PLOT_WIDTH / 100, 4), dpi=100)
+        canvas = FigureCanvasAgg(figure)
+        ax = figure.add_subplot(111)
+        lines = [ax.plot([], [])[0] for _ in range(2)]
+        decimators = [MinMaxDecimator(PLOT_WIDTH) for _ in lines]
+        for tick, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+            for line, decimator, values in zip(lines, decimators, (dec, ra)):
+                decimator.append(x[start:stop], values[start:stop])
+                line.set_data(*decimator.points())
+            if tick % 10 == 9:
+                ax.relim()
+                ax.autoscale_view()
+                canvas.draw()
+
+    return run, data.n_rows
+
+
+# Stage name -> setup function. A setup function prepares a stage outside of the timing and
+# returns the callable to time and the number of items (rows, lookups, ...) one call processes.
+STAGES = {
+    "parse_exports": stage_parse_exports,
+    "resample_1min": stage_resample_1min,
+    "read_ephemeris": stage_read_ephemeris,
+    "merge_ephemeris": stage_merge_ephemeris,
+    "angular_distance": stage_angular_distance,
+    "engine_load": stage_engine_load,
+    "lookup_single": stage_lookup_single,
+    "lookup_batch": stage_lookup_batch,
+    "update_plot": stage_update_plot,
+}
+
+
+def measure(run, repeat):
+    """
+    Best wall time of repeat calls of run, then the tracemalloc peak of one more call. Memory is
+    measured apart from the timing, as tracing slows down allocations.
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return timings, peak
+
+
+def environment():
+    """
+    What the results depend on besides the code: commit, interpreter, libraries and machine.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "date": pd.Timestamp.now(tz="UTC").isoformat(),
+    }
+
+
+def run_benchmarks(sizes, stages, repeat=3, n_files=4, ephemeris_rows=10_000, data_dir=None):
+    """
+    Run the stages for every size and return the result records.
+    """
+    results = []
+    for n_rows in sizes:
+        with tempfile.TemporaryDirectory(prefix="lexi_bench_", dir=data_dir) as directory:
+            start = time.perf_counter()
+            data = Dataset(directory, n_rows, n_files, ephemeris_rows)
+            print(
+                f"{n_rows} rows: wrote the data set in {time.perf_counter() - start:.1f} s",
+                file=sys.stderr,
+            )
+            for name in stages:
+                run, items = STAGES[name](data)
+                timings, peak = measure(run, repeat)
+                best = min(timings)
+                results.append(
+                    {
+                        "stage": name,
+                        "rows": n_rows,
+                        "seconds": best,
+                        "timings": timings,
+                        "items": items,
+                        "items_per_s": items / best if best > 0 else None,
+                        "peak_bytes": peak,
+                    }
+                )
+                print(
+                    f"  {name:<18} {best * 1e3:10.1f} ms  {peak / 2**20:8.1f} MiB peak",
+                    file=sys.stderr,
+                )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="Pointing sizes to run"
+    )
+    parser.add_argument(
+        "--stages", nargs="+", choices=list(STAGES), default=list(STAGES), help="Stages to run"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--files", type=int, default=4, help="Pointing exports per data set")
+    parser.add_argument(
+        "--ephemeris-rows", type=int, default=10_000, help="STK samples per data set"
+    )
+    parser.add_argument("--data-dir", help="Where to write the data sets (default: temp dir)")
+    parser.add_argument("-o", "--output", default="-", help="JSON output, - for stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "environment": environment(),
+        "parameters": {
+            "repeat": args.repeat,
+            "files": args.files,
+            "ephemeris_rows": args.ephemeris_rows,
+        },
+        "results": run_benchmarks(
+            args.rows, args.stages, args.repeat, args.files, args.ephemeris_rows, args.data_dir
+        ),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
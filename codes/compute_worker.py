@@ -0,0 +1,119 @@
+import queue
+import threading
+
+
+class ComputeWorker:
+    """
+    Run data work (lookups, row formatting, plot-data preparation) on a background thread so the
+    Tk mainloop never waits on it.
+
+    Work is submitted on a named channel, e.g. "table" or "plot". Each channel holds at most one
+    pending request: a newer submission replaces a request that has not started yet, and the
+    result of a request that was already running when it was superseded is dropped. Results are
+    handed back through a queue that the Tk thread drains with root.after, so the on_result and
+    on_error callbacks always run on the Tk thread and may touch widgets.
+
+    All the work runs on a single thread, in submission order across channels, so functions
+    submitted to the same worker never run concurrently with each other.
+    """
+
+    def __init__(self, root, poll_interval_ms=50):
+        self.root = root
+        self.poll_interval_ms = poll_interval_ms
+        self._condition = threading.Condition()
+        # Channel -> pending (generation, func, args, on_result, on_error)
+        self._pending = {}
+        # Channel -> generation of the newest submission, used to recognize stale results
+        self._latest = {}
+        self._generation = 0
+        self._results = queue.Queue()
+        self._running = False
+        self._thread = None
+        self._after_id = None
+
+    def start(self):
+        """
+        Start the worker thread and the Tk-side result polling.
+        """
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="compute-worker", daemon=True)
+        self._thread.start()
+        self._after_id = self.root.after(self.poll_interval_ms, self._poll)
+
+    def stop(self):
+        """
+        Stop the worker thread and the result polling. Pending requests are dropped.
+        """
+        with self._condition:
+            self._running = False
+            self._pending.clear()
+            self._condition.notify()
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def submit(self, channel, func, *args, on_result=None, on_error=None):
+        """
+        Queue func(*args) on the worker, superseding any earlier request on the same channel.
+        on_result(result) or on_error(exception) is called on the Tk thread once it finishes.
+        Returns the generation number of the request.
+        """
+        with self._condition:
+            self._generation += 1
+            generation = self._generation
+            self._latest[channel] = generation
+            self._pending[channel] = (generation, func, args, on_result, on_error)
+            self._condition.notify()
+        return generation
+
+    def cancel(self, channel):
+        """
+        Drop the pending request on a channel and ignore the result of a running one.
+        """
+        with self._condition:
+            self._generation += 1
+            self._latest[channel] = self._generation
+            self._pending.pop(channel, None)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                # Oldest pending channel first, so a busy channel cannot starve the others
+                channel = next(iter(self._pending))
+                generation, func, args, on_result, on_error = self._pending.pop(channel)
+
+            try:
+                result, error = func(*args), None
+            except Exception as e:
+                result, error = None, e
+            self._results.put((channel, generation, result, error, on_result, on_error))
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    channel, generation, result, error, on_result, on_error = (
+                        self._results.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                with self._condition:
+                    stale = generation != self._latest.get(channel)
+                if stale:
+                    continue
+                if error is not None:
+                    if on_error is None:
+                        raise error
+                    on_error(error)
+                elif on_result is not None:
+                    on_result(result)
+        finally:
+            # Keep polling even if a callback raised; Tk reports the exception itself
+            if self._running:
+                self._after_id = self.root.after(self.poll_interval_ms, self._poll)
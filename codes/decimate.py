@@ -0,0 +1,121 @@
+import numpy as np
+
+
+def _reduce_buckets(ids, x_min, y_min, x_max, y_max):
+    """
+    Combine records that share a bucket id. ids must be sorted. For every bucket keep the lowest
+    point (x_min, y_min) and the highest point (x_max, y_max) of its records.
+    """
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    # Within each bucket, sort by y so the first record is the minimum and the last the maximum
+    low = np.lexsort((y_min, ids))[starts]
+    ends = np.r_[starts[1:], ids.size] - 1
+    high = np.lexsort((y_max, ids))[ends]
+    return ids[starts], x_min[low], y_min[low], x_max[high], y_max[high]
+
+
+class MinMaxDecimator:
+    """
+    Incremental min/max-per-bucket decimation of a time series for plotting.
+
+    Samples are grouped into buckets of equal width along x, and every bucket keeps only its
+    lowest and highest sample. Drawing those two points per bucket reproduces the envelope of the
+    series, peaks included, when a bucket is about one pixel wide. At most max_buckets buckets are
+    kept: when the series grows past that, the bucket width is doubled and neighbouring buckets are
+    merged, so the memory and the number of points drawn depend on max_buckets (the axis width in
+    pixels) and not on the length of the history. Samples must be appended in increasing x order;
+    each append only touches the new samples and, when the width doubles, the existing buckets.
+    """
+
+    def __init__(self, max_buckets):
+        self.max_buckets = max(int(max_buckets), 1)
+        self.origin = None
+        self.width = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._x_min = np.empty(0)
+        self._y_min = np.empty(0)
+        self._x_max = np.empty(0)
+        self._y_max = np.empty(0)
+
+    def __len__(self):
+        return self._ids.size
+
+    def append(self, x, y):
+        """
+        Add samples. x must not be lower than the x of the samples already appended. NaN values
+        are skipped.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        keep = np.isfinite(y)
+        x, y = x[keep], y[keep]
+        if x.size == 0:
+            return
+
+        if self.origin is None:
+            self.origin = x[0]
+            span = x[-1] - x[0]
+            # Start as fine as the first batch allows, the width only ever doubles from here
+            self.width = span / self.max_buckets if span > 0 else np.finfo(np.float64).eps
+
+        # Coarsen until the whole history fits in max_buckets buckets
+        n_buckets = (x[-1] - self.origin) / self.width + 1
+        if n_buckets > self.max_buckets:
+            doublings = int(np.ceil(np.log2(n_buckets / self.max_buckets)))
+            self.width *= 2.0**doublings
+            if self._ids.size:
+                # Shifting an int64 by 63 already merges every bucket into bucket 0
+                ids = self._ids >> min(doublings, 63)
+                self._set(*_reduce_buckets(ids, *self._records()))
+
+        ids = np.floor((x - self.origin) / self.width).astype(np.int64)
+        ids = np.minimum(ids, self.max_buckets - 1)
+        # The last existing bucket may continue with the new samples, so it is reduced with them
+        keep = self._ids.size
+        if keep and self._ids[-1] == ids[0]:
+            keep -= 1
+        new = _reduce_buckets(
+            np.r_[self._ids[keep:], ids],
+            np.r_[self._x_min[keep:], x],
+            np.r_[self._y_min[keep:], y],
+            np.r_[self._x_max[keep:], x],
+            np.r_[self._y_max[keep:], y],
+        )
+        self._set(*(np.r_[old[:keep], fresh] for old, fresh in zip(self._all(), new)))
+
+    def points(self):
+        """
+        The decimated series as (x, y) arrays in x order: the minimum and the maximum of every
+        bucket, or a single point for buckets holding one sample.
+        """
+        min_first = self._x_min <= self._x_max
+        first_x = np.where(min_first, self._x_min, self._x_max)
+        first_y = np.where(min_first, self._y_min, self._y_max)
+        second_x = np.where(min_first, self._x_max, self._x_min)
+        second_y = np.where(min_first, self._y_max, self._y_min)
+        x = np.column_stack([first_x, second_x]).ravel()
+        y = np.column_stack([first_y, second_y]).ravel()
+        # A bucket with a single sample would otherwise be drawn twice
+        single = np.repeat(
+            (self._x_min == self._x_max) & (self._y_min == self._y_max), 2
+        ) & np.tile([False, True], self._ids.size)
+        return x[~single], y[~single]
+
+    def y_range(self):
+        """
+        (min, max) of all the samples appended so far, (inf, -inf) when empty.
+        """
+        if self._ids.size == 0:
+            return np.inf, -np.inf
+        return self._y_min.min(), self._y_max.max()
+
+    def _records(self):
+        return self._x_min, self._y_min, self._x_max, self._y_max
+
+    def _all(self):
+        return (self._ids,) + self._records()
+
+    def _set(self, ids, x_min, y_min, x_max, y_max):
+        self._ids, self._x_min, self._y_min, self._x_max, self._y_max = (
+            ids, x_min, y_min, x_max, y_max
+        )
@@ -0,0 +1,124 @@
+import collections
+
+import numpy as np
+
+# Shown in place of a quantity the row has no column for
+MISSING = "N/A"
+# Formatted rows kept by a TableFormatter, least recently used dropped first
+DEFAULT_CACHE_SIZE = 256
+
+
+def convert_and_round(degrees, sig_figs, angle_unit):
+    """
+    Angles in degrees (any array shape) converted to the display unit, "Degree" or "Radians",
+    then rounded to sig_figs decimals. Rounding comes last and happens once, so radians are not
+    computed from already rounded degrees.
+    """
+    values = np.asarray(degrees, dtype=np.float64)
+    if angle_unit == "Radians":
+        values = np.radians(values)
+    return np.round(values, sig_figs)
+
+
+class TableFormatter:
+    """
+    Format the look direction of every target at one time for the table, in one vectorized step.
+
+    display_quantities maps each display option (the AZ-EL/RA-Dec/Both dropdown) to the angle
+    quantities shown after the target name, e.g. ("az", "el"); the value of quantity q for target
+    T is read from the column "q_t" of the row. With an alert_quantity, a target whose displayed
+    value of that quantity is above alert_degrees (compared in the display unit) gets the "red"
+    tag.
+
+    The values of all the targets are converted and rounded together, and the table cells are
+    cached per rounded values and display settings. Refreshes that show the same numbers, e.g.
+    ticks closer together than the last displayed digit changes, or that only change the selected
+    targets, are served from the cache.
+    """
+
+    def __init__(
+        self,
+        targets,
+        display_quantities,
+        alert_quantity=None,
+        alert_degrees=None,
+        cache_size=DEFAULT_CACHE_SIZE,
+    ):
+        self.targets = list(targets)
+        self.display_quantities = dict(display_quantities)
+        self.alert_quantity = alert_quantity
+        self.alert_degrees = alert_degrees
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = collections.OrderedDict()
+
+    def rows(self, row, selected_keys, display_option, angle_unit, sig_figs):
+        """
+        The table rows of the selected targets, as (key, values, tags) tuples in selection order:
+        values is the target name followed by the rounded quantities (MISSING where the row has
+        no column for one) and tags alternates "evenrow"/"oddrow", preceded by "red" for an
+        alert. row is a pandas Series, e.g. one row of LookDirectionEngine.at().
+        """
+        rounded, available = self._round(row, display_option, angle_unit, sig_figs)
+        key = (rounded.tobytes(), available.tobytes(), display_option, angle_unit)
+        formatted = self._cache.get(key)
+        if formatted is None:
+            self.misses += 1
+            formatted = self._format(rounded, available, display_option, angle_unit)
+            self._cache[key] = formatted
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+
+        rows = []
+        for idx, target in enumerate(selected_keys):
+            values, alert = formatted[target]
+            row_tag = "evenrow" if idx % 2 == 0 else "oddrow"
+            rows.append((target, values, ("red", row_tag) if alert else (row_tag,)))
+        return rows
+
+    def clear(self):
+        self._cache.clear()
+
+    def _round(self, row, display_option, angle_unit, sig_figs):
+        """
+        (rounded, available): the displayed quantities of every target, one target per row, and
+        whether the row has a column for each of them.
+        """
+        quantities = self.display_quantities[display_option]
+        columns = [f"{q}_{target.lower()}" for target in self.targets for q in quantities]
+        shape = (len(self.targets), len(quantities))
+        # One array for all the cells, NaN where a column is missing. A dict is much cheaper to
+        # pick the cells from than pandas indexing
+        cells = row.to_dict()
+        degrees = np.array([cells.get(column, np.nan) for column in columns], dtype=np.float64)
+        rounded = convert_and_round(degrees, sig_figs, angle_unit).reshape(shape)
+        available = np.array([column in cells for column in columns]).reshape(shape)
+        return rounded, available
+
+    def _format(self, rounded, available, display_option, angle_unit):
+        """
+        {target: (values, alert)} for every target.
+        """
+        quantities = self.display_quantities[display_option]
+        alerts = np.zeros(len(self.targets), dtype=bool)
+        if self.alert_quantity in quantities:
+            threshold = self.alert_degrees
+            if angle_unit == "Radians":
+                threshold = np.radians(threshold)
+            column = quantities.index(self.alert_quantity)
+            # NaN and missing values never raise an alert
+            alerts = available[:, column] & (rounded[:, column] > threshold)
+
+        formatted = {}
+        for target, target_values, target_available, alert in zip(
+            self.targets, rounded.tolist(), available.tolist(), alerts.tolist()
+        ):
+            values = tuple(
+                value if ok else MISSING for value, ok in zip(target_values, target_available)
+            )
+            formatted[target] = ((target,) + values, alert)
+        return formatted
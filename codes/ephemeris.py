@@ -0,0 +1,166 @@
+import re
+
+import numpy as np
+import pandas as pd
+from time_index import TimeIndex, to_epoch_ns
+
+# Azimuth and right ascension columns wrap at 360°, e.g. "ra_mag" or "[Con2 Az (deg)]"
+WRAPPED_COLUMN_PATTERN = re.compile(r"^(az|ra)_|\b(Az|Ra) \(deg\)\]$")
+
+
+def is_wrapped_angle(column):
+    """
+    Whether a STK ephemeris column holds an angle that wraps around at 0/360°.
+    """
+    return WRAPPED_COLUMN_PATTERN.search(column) is not None
+
+
+def read_stk_ephemeris(file_name):
+    """
+    Read a STK angle export (e.g. LEXIAngleData_20250304.csv) into a DataFrame of float columns
+    indexed by a UTC epoch_utc index, sorted by time and without duplicate epochs.
+    """
+    data = pd.read_csv(file_name)
+
+    # Convert 'epoch_utc' column to datetime and set the timezone to UTC
+    data["epoch_utc"] = pd.to_datetime(data["epoch_utc"])
+    data["epoch_utc"] = data["epoch_utc"].dt.tz_localize("UTC")
+    data = data.set_index("epoch_utc").sort_index()
+    data = data[~data.index.duplicated(keep="first")]
+    return data.astype(np.float64)
+
+
+class EphemerisInterpolator:
+    """
+    Piecewise-polynomial interpolation of the STK ephemeris columns, evaluated on demand.
+
+    The per-segment coefficients are computed once from the source samples, so memory scales with
+    the number of samples in the STK file and not with how finely it is queried. order=3 uses cubic
+    Hermite segments with finite-difference slopes (continuous first derivative), order=1 is plain
+    linear interpolation. Wrapped angles (AZ/RA) are unwrapped before fitting and wrapped back into
+    [0, 360) on evaluation, so a target crossing 0/360° is interpolated the short way round.
+    Queries outside the sampled span hold the first/last sample, NaT queries give NaN.
+    """
+
+    def __init__(self, epochs, values, columns, wrapped=None, order=3):
+        if order not in (1, 3):
+            raise ValueError("order must be 1 (linear) or 3 (cubic Hermite).")
+
+        self.index = TimeIndex(epochs)
+        self.columns = list(columns)
+        self._column_positions = {column: i for i, column in enumerate(self.columns)}
+        if wrapped is None:
+            wrapped = [is_wrapped_angle(column) for column in self.columns]
+        self.wrapped = np.asarray(wrapped, dtype=bool)
+        self.order = order
+
+        values = np.array(values, dtype=np.float64, ndmin=2)
+        if values.shape != (len(self.index), len(self.columns)):
+            raise ValueError("values must have shape (n_samples, n_columns).")
+        if len(self.index) < 2:
+            raise ValueError("At least two samples are needed to interpolate.")
+        values[:, self.wrapped] = np.unwrap(values[:, self.wrapped], period=360.0, axis=0)
+        self.coefficients = self._fit(self.index.epochs_ns, values, order)
+
+    @classmethod
+    def from_frame(cls, df, order=3):
+        """
+        Build an interpolator from a DataFrame with a DatetimeIndex and float columns.
+        """
+        return cls(df.index, df.to_numpy(), df.columns, order=order)
+
+    @classmethod
+    def from_csv(cls, file_name, order=3):
+        """
+        Build an interpolator straight from a STK angle export.
+        """
+        return cls.from_frame(read_stk_ephemeris(file_name), order=order)
+
+    @classmethod
+    def from_coefficients(cls, epochs, coefficients, columns, wrapped, order=3):
+        """
+        Rebuild an interpolator from the fitted state of another one (its index epochs,
+        coefficients, columns, wrapped and order) without fitting again. The arrays are used as
+        they are, e.g. read-only views of shared memory.
+        """
+        interpolator = cls.__new__(cls)
+        interpolator.index = TimeIndex(epochs, assume_sorted=True)
+        interpolator.columns = list(columns)
+        interpolator._column_positions = {column: i for i, column in enumerate(columns)}
+        interpolator.wrapped = np.asarray(wrapped, dtype=bool)
+        interpolator.order = order
+        interpolator.coefficients = coefficients
+        return interpolator
+
+    @staticmethod
+    def _fit(epochs_ns, values, order):
+        """
+        Per-segment coefficients c0..c3 of y(s) = c0 + c1 s + c2 s^2 + c3 s^3, where s in [0, 1]
+        is the position within the segment. Returns an array of shape (4, n_segments, n_columns).
+        """
+        y0 = values[:-1]
+        dy = values[1:] - values[:-1]
+        coefficients = np.zeros((4,) + y0.shape)
+        coefficients[0] = y0
+        if order == 1:
+            coefficients[1] = dy
+            return coefficients
+
+        # Knot slopes per second: centred differences inside, one-sided at both ends
+        t = (epochs_ns - epochs_ns[0]) / 1e9
+        h = np.diff(t)[:, np.newaxis]
+        slopes = np.empty_like(values)
+        slopes[1:-1] = (values[2:] - values[:-2]) / (t[2:] - t[:-2])[:, np.newaxis]
+        slopes[0] = dy[0] / h[0]
+        slopes[-1] = dy[-1] / h[-1]
+
+        # Cubic Hermite basis in the normalized segment coordinate
+        d0 = slopes[:-1] * h
+        d1 = slopes[1:] * h
+        coefficients[1] = d0
+        coefficients[2] = 3 * dy - 2 * d0 - d1
+        coefficients[3] = d0 + d1 - 2 * dy
+        return coefficients
+
+    def evaluate(self, times, columns=None):
+        """
+        Evaluate the selected columns (all by default) at the query times. Returns an array of
+        shape (n_times, n_columns).
+        """
+        if columns is None:
+            positions = np.arange(len(self.columns))
+        else:
+            positions = np.array([self._column_positions[column] for column in columns], dtype=int)
+
+        knots_ns = self.index.epochs_ns
+        query_ns = np.atleast_1d(to_epoch_ns(times)).astype(np.int64, copy=False)
+        missing = query_ns == np.iinfo(np.int64).min
+        query_ns = np.clip(query_ns, knots_ns[0], knots_ns[-1])
+        segment = np.searchsorted(knots_ns, query_ns, side="right") - 1
+        segment = np.clip(segment, 0, knots_ns.size - 2)
+        s = (query_ns - knots_ns[segment]) / (knots_ns[segment + 1] - knots_ns[segment])
+        s = s[:, np.newaxis]
+
+        # Horner's scheme in place, so only one gathered coefficient array is alive at a time
+        coefficients = self.coefficients[:, :, positions]
+        result = coefficients[3][segment]
+        for k in (2, 1, 0):
+            result *= s
+            result += coefficients[k][segment]
+
+        wrapped = self.wrapped[positions]
+        result[:, wrapped] = np.mod(result[:, wrapped], 360.0)
+        # NaT queries have no value
+        result[missing] = np.nan
+        return result
+
+    def at(self, times, columns=None):
+        """
+        Evaluate the selected columns at the query times and return them as a DataFrame with an
+        epoch_utc column holding the query times.
+        """
+        columns = self.columns if columns is None else list(columns)
+        query_ns = np.atleast_1d(to_epoch_ns(times))
+        data = {"epoch_utc": pd.to_datetime(query_ns, utc=True)}
+        data.update(zip(columns, self.evaluate(query_ns, columns).T))
+        return pd.DataFrame(data)
@@ -0,0 +1,262 @@
+"""
+Fast reader for the Grafana CSV exports of the LEXI telemetry.
+
+Every export (LEXI_Pointing_Measured, and the from_lexi "LEXI Gimbal Angles", "LEXI Position"
+and "LEXI Gimbal Measurements CBI" files) has the same layout: a UTF-8 BOM, a "sep=," line, a
+quoted header line, then one row per sample with a "YYYY-MM-DD HH:MM:SS" UTC timestamp followed by
+numeric values, most of them with a " °" suffix:
+
+    sep=,
+    "_time","DERIVED_LEXI_DEC_J2000_rad","DERIVED_LEXI_RA_J2000_rad"
+    2025-03-03 23:08:08,-21.1 °,-136 °
+
+The reader works on the raw bytes: the suffix is removed from the whole buffer in one pass, the
+timestamps are decoded from their fixed character positions with NumPy and only the value
+columns go through NumPy's C tokenizer, straight to float64. No column of Python strings is ever
+built. Rows whose timestamp does not follow the fixed layout (e.g. with fractional seconds) are
+handed to pandas instead.
+
+    python grafana_csv.py ../data/from_lexi/*.csv
+"""
+
+import argparse
+import csv
+import glob
+import io
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BOM = b"\xef\xbb\xbf"
+DEGREE_SUFFIX = " °".encode()
+DEGREE = "°".encode()
+# Bytes read at a time by iter_grafana_blocks
+DEFAULT_BLOCK_SIZE = 8 << 20
+# The first read of iter_grafana_blocks is at least this long, so it holds the whole preamble
+PREAMBLE_SIZE = 64 << 10
+
+# "YYYY-MM-DD HH:MM:SS" timestamps: field positions and widths, and the separator positions
+TIME_LENGTH = 19
+TIME_FIELDS = [(0, 4), (5, 2), (8, 2), (11, 2), (14, 2), (17, 2)]
+TIME_SEPARATORS = [(4, "-"), (7, "-"), (10, " "), (13, ":"), (16, ":"), (TIME_LENGTH, ",")]
+
+
+def split_preamble(data):
+    """
+    Split the bytes at the start of an export into its header (the value column names, None when
+    there is no header line) and the offset of the first data row. The BOM, the "sep=," line and
+    the quoted header line are all optional.
+    """
+    offset = len(BOM) if data.startswith(BOM) else 0
+    columns = None
+    while offset < len(data) and data.startswith((b"sep=", b'"'), offset):
+        end = data.find(b"\n", offset)
+        end = len(data) if end < 0 else end + 1
+        if data.startswith(b'"', offset):
+            line = data[offset:end].decode("utf-8").strip()
+            columns = next(csv.reader([line]))[1:]
+        offset = end
+    return columns, offset
+
+
+def _days_from_civil(year, month, day):
+    """
+    Days since 1970-01-01 of proleptic Gregorian dates, vectorized.
+    """
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _decode_times(buffer, starts):
+    """
+    Epoch nanoseconds of the "YYYY-MM-DD HH:MM:SS" timestamps at the given offsets of buffer,
+    and a mask of the rows that do not follow that layout.
+    """
+    # Rows too short to hold a timestamp are read from position 0 and flagged as invalid
+    invalid = starts + TIME_LENGTH >= buffer.size
+    starts = np.where(invalid, 0, starts)
+    for position, separator in TIME_SEPARATORS:
+        invalid |= buffer[starts + position] != ord(separator)
+
+    # One character position at a time, so no (n_rows, 19) temporary is ever built
+    fields = []
+    for position, width in TIME_FIELDS:
+        value = np.zeros(starts.size, dtype=np.int32)
+        for k in range(position, position + width):
+            # Bytes below "0" wrap around in uint8, so one comparison catches every non-digit
+            digit = buffer[starts + k] - np.uint8(ord("0"))
+            invalid |= digit > 9
+            value *= 10
+            value += digit
+        fields.append(value)
+    year, month, day, hour, minute, second = fields
+
+    # Consecutive samples mostly share their date, so the calendar is only worked out per run
+    date = (year * 16 + month) * 32 + day
+    runs = np.flatnonzero(np.r_[True, date[1:] != date[:-1]])
+    run_year, run_month, run_day = (field[runs].astype(np.int64) for field in (year, month, day))
+    run_days = _days_from_civil(run_year, run_month, run_day)
+    # A day past the end of its month would silently land on another date
+    next_month = _days_from_civil(run_year + run_month // 12, run_month % 12 + 1, 1)
+    run_invalid = (
+        (run_month < 1) | (run_month > 12) | (run_day < 1) | (run_days >= next_month)
+    )
+    lengths = np.diff(np.r_[runs, starts.size])
+    days = np.repeat(run_days, lengths)
+    invalid |= np.repeat(run_invalid, lengths)
+    invalid |= (hour > 23) | (minute > 59) | (second > 60)
+
+    seconds = days * 86400 + (hour * 3600 + minute * 60 + second)
+    return seconds * 1_000_000_000, invalid
+
+
+def parse_grafana_rows(data, n_columns=None):
+    """
+    Parse complete data rows of an export (bytes, optionally still starting with the BOM, the
+    "sep=," line and the header) into epoch nanoseconds and a float64 array of shape
+    (n_rows, n_columns) with the value columns. Empty values become NaN. n_columns defaults to the
+    number of values on the first row.
+    """
+    _, offset = split_preamble(data)
+    data = data[offset:]
+    if DEGREE in data:
+        data = data.replace(DEGREE_SUFFIX, b"").replace(DEGREE, b"")
+    if b"\r" in data:
+        data = data.replace(b"\r", b"")
+
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(buffer == ord("\n"))
+    starts = np.r_[0, ends + 1]
+    ends = np.r_[ends, buffer.size]
+    # Blank lines, including the empty one after a final line break, are not rows
+    starts = starts[ends > starts]
+
+    if n_columns is None:
+        first_row = data[: data.find(b"\n")] if starts.size else b""
+        n_columns = first_row.count(b",")
+    if starts.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty((0, n_columns))
+
+    epochs_ns, invalid = _decode_times(buffer, starts)
+    try:
+        # loadtxt rounds every value exactly like float() and skips the time column unconverted
+        values = np.loadtxt(
+            io.BytesIO(data),
+            delimiter=",",
+            usecols=range(1, n_columns + 1),
+            dtype=np.float64,
+            ndmin=2,
+            encoding=None,
+        )
+    except ValueError:
+        # Empty or missing values, which the pandas tokenizer turns into NaN
+        values = pd.read_csv(
+            io.BytesIO(data),
+            header=None,
+            names=range(n_columns + 1),
+            usecols=range(1, n_columns + 1),
+            dtype=np.float64,
+            float_precision="round_trip",
+        ).to_numpy()
+
+    if invalid.any():
+        # Any other timestamp layout goes through pandas, one row at a time is fine for those
+        rows = [
+            data[start : data.find(b",", start)].decode("utf-8") for start in starts[invalid]
+        ]
+        times = pd.DatetimeIndex(pd.to_datetime(rows, utc=True, format="ISO8601"))
+        epochs_ns[invalid] = times.as_unit("ns").asi8
+    return epochs_ns, values
+
+
+def read_grafana_csv(file):
+    """
+    Read a whole export. Returns the value column names (without the time column), the epoch
+    nanoseconds and the (n_rows, n_columns) float64 values.
+    """
+    with open(file, "rb") as f:
+        data = f.read()
+    columns, _ = split_preamble(data)
+    epochs_ns, values = parse_grafana_rows(data, None if columns is None else len(columns))
+    return columns, epochs_ns, values
+
+
+def iter_grafana_blocks(file, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Yield the (epochs_ns, values) of an export block by block, reading about block_size bytes
+    at a time. A block always ends on a complete row, the row cut at the end of a read is carried
+    over to the next block.
+    """
+    with open(file, "rb") as f:
+        data = f.read(max(block_size, PREAMBLE_SIZE))
+        columns, offset = split_preamble(data)
+        n_columns = None if columns is None else len(columns)
+        carry = data[offset:]
+        while True:
+            data = f.read(block_size)
+            block = carry + data
+            end = len(block) if not data else block.rfind(b"\n") + 1
+            carry = block[end:]
+            if end:
+                epochs_ns, values = parse_grafana_rows(block[:end], n_columns)
+                if epochs_ns.size:
+                    yield epochs_ns, values
+            if not data:
+                return
+
+
+def read_grafana_csv_pandas(file):
+    """
+    The generic pandas path the reader replaces: string columns, suffix removal with .str.replace
+    and pd.to_datetime. Kept as the reference for the benchmark.
+    """
+    df = pd.read_csv(file, skiprows=1, dtype=str)
+    columns = list(df.columns[1:])
+    values = np.column_stack(
+        [df[column].str.replace("°", "").astype(float).to_numpy() for column in columns]
+    )
+    epochs_ns = pd.DatetimeIndex(pd.to_datetime(df.iloc[:, 0], utc=True)).as_unit("ns").asi8
+    return columns, epochs_ns, values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Grafana export reader against the generic pandas path."
+    )
+    parser.add_argument("files", nargs="+", help="Export files or glob patterns")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of this many runs")
+    args = parser.parse_args(argv)
+
+    files = [file for pattern in args.files for file in sorted(glob.glob(pattern)) or [pattern]]
+    for file in files:
+        timings = {}
+        results = {}
+        for name, reader in (("pandas", read_grafana_csv_pandas), ("grafana_csv", read_grafana_csv)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results[name] = reader(file)
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+
+        (_, expected_ns, expected), (_, epochs_ns, values) = results["pandas"], results["grafana_csv"]
+        same = np.array_equal(expected_ns, epochs_ns) and np.array_equal(
+            expected, values, equal_nan=True
+        )
+        speedup = timings["pandas"] / timings["grafana_csv"]
+        print(
+            f"{file}: {epochs_ns.size} rows, pandas {timings['pandas'] * 1e3:.1f} ms, "
+            f"grafana_csv {timings['grafana_csv'] * 1e3:.1f} ms ({speedup:.1f}x)"
+            f"{'' if same else ', RESULTS DIFFER'}",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
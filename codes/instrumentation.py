@@ -0,0 +1,220 @@
+import functools
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Samples kept per stage, the statistics and the report cover the most recent ones
+DEFAULT_CAPACITY = 1024
+# Percentiles in the report
+REPORT_PERCENTILES = (50, 95, 99)
+
+
+class RingBuffer:
+    """
+    The last capacity float64 samples of a stage, in a preallocated array.
+
+    Each stage is meant to be recorded from one thread. Two threads recording the same stage
+    at once can at worst overwrite each other's sample, which only costs a sample.
+    """
+
+    __slots__ = ("capacity", "count", "_values")
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        # Samples recorded since the start, including those already overwritten
+        self.count = 0
+        self._values = np.zeros(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, value):
+        self._values[self.count % self.capacity] = value
+        self.count += 1
+
+    def last(self):
+        return self._values[(self.count - 1) % self.capacity] if self.count else np.nan
+
+    def values(self):
+        """
+        A copy of the samples still held, oldest first.
+        """
+        count = self.count
+        if count <= self.capacity:
+            return self._values[:count].copy()
+        split = count % self.capacity
+        return np.concatenate((self._values[split:], self._values[:split]))
+
+
+class _StageTimer:
+    __slots__ = ("_buffer", "_start")
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._buffer.append(time.perf_counter() - self._start)
+        return False
+
+
+class RefreshProfiler:
+    """
+    Ring buffers of stage durations and tick intervals, in seconds, with a one-line status for
+    the GUI and a full report for when the program exits. Recording a sample is two perf_counter
+    calls and a store into a preallocated array, so the profiler can stay on.
+
+    Stages are created on first use and keep the order they were first seen in.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.started = time.perf_counter()
+        self._buffers = {}
+        # Only taken to create a stage, recording never waits on it
+        self._lock = threading.Lock()
+        # Tick name -> perf_counter of its last tick
+        self._ticks = {}
+
+    def _buffer(self, stage):
+        buffer = self._buffers.get(stage)
+        if buffer is None:
+            with self._lock:
+                buffer = self._buffers.setdefault(stage, RingBuffer(self.capacity))
+        return buffer
+
+    @property
+    def stages(self):
+        return list(self._buffers)
+
+    def record(self, stage, seconds):
+        """
+        Add one duration to a stage.
+        """
+        self._buffer(stage).append(seconds)
+
+    def stage(self, stage):
+        """
+        Context manager timing its block into a stage.
+        """
+        return _StageTimer(self._buffer(stage))
+
+    def timed(self, stage):
+        """
+        Decorator timing every call of a function into a stage.
+        """
+        buffer = self._buffer(stage)
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    buffer.append(time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def tick(self, name="tick", period=None):
+        """
+        Mark one iteration of a periodic loop: the time since the previous tick of the same name
+        is recorded as the stage name. With a nominal period, how late or early the tick came
+        is also recorded as the stage "<name> jitter". The first tick only starts the clock.
+        """
+        now = time.perf_counter()
+        last = self._ticks.get(name)
+        self._ticks[name] = now
+        if last is None:
+            return
+        interval = now - last
+        self._buffer(name).append(interval)
+        if period is not None:
+            self._buffer(f"{name} jitter").append(interval - period)
+
+    def restart_tick(self, name="tick"):
+        """
+        Forget the previous tick, e.g. when a paused loop starts again, so the pause is not
+        recorded as an interval.
+        """
+        self._ticks.pop(name, None)
+
+    def stats(self, stage):
+        """
+        Statistics of the samples of a stage still held: count (all samples ever recorded),
+        last, mean, min, max and the REPORT_PERCENTILES as p50, p95, ...
+        """
+        buffer = self._buffers.get(stage)
+        values = buffer.values() if buffer is not None else np.empty(0)
+        stats = {"count": buffer.count if buffer is not None else 0}
+        if values.size == 0:
+            return stats
+        percentiles = np.percentile(values, REPORT_PERCENTILES)
+        stats.update(
+            last=float(buffer.last()),
+            mean=float(values.mean()),
+            min=float(values.min()),
+            max=float(values.max()),
+        )
+        stats.update({f"p{p}": float(v) for p, v in zip(REPORT_PERCENTILES, percentiles)})
+        return stats
+
+    def status_text(self, stages=None):
+        """
+        One line for a status bar: the median of every stage in milliseconds, and for ticks with
+        a nominal period the 95th percentile of the absolute jitter.
+        """
+        parts = []
+        for stage in self.stages if stages is None else stages:
+            buffer = self._buffers.get(stage)
+            if buffer is None or not len(buffer) or stage.endswith(" jitter"):
+                continue
+            values = buffer.values()
+            text = f"{stage} {np.median(values) * 1e3:.1f}"
+            jitter = self._buffers.get(f"{stage} jitter")
+            if jitter is not None and len(jitter):
+                text += f" ±{np.percentile(np.abs(jitter.values()), 95) * 1e3:.1f}"
+            parts.append(text + " ms")
+        return " | ".join(parts)
+
+    def report(self):
+        """
+        A text table with the statistics of every stage, in milliseconds.
+        """
+        columns = ["mean", "min"] + [f"p{p}" for p in REPORT_PERCENTILES] + ["max"]
+        lines = [
+            f"Refresh profile over {time.perf_counter() - self.started:.1f} s, "
+            f"last {self.capacity} samples per stage (ms)",
+            f"{'stage':<16} {'count':>8}" + "".join(f" {column:>9}" for column in columns),
+        ]
+        for stage in self.stages:
+            stats = self.stats(stage)
+            if "mean" not in stats:
+                continue
+            lines.append(
+                f"{stage:<16} {stats['count']:>8}"
+                + "".join(f" {stats[column] * 1e3:>9.2f}" for column in columns)
+            )
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        """
+        Write the report to path, or to stderr without one. Meant for atexit, so when path cannot
+        be written the report goes to stderr instead of raising.
+        """
+        text = self.report() + "\n"
+        if path is not None:
+            try:
+                with open(path, "w") as f:
+                    f.write(text)
+                return
+            except OSError as e:
+                text = f"Could not write the refresh profile to {path}: {e}\n" + text
+        sys.stderr.write(text)
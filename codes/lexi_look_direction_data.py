@@ -1,6 +1,7 @@
 import glob
 
 import pandas as pd
+from pointing_ingest import load_pointing_files
 
 
 def get_lexi_look_direction_data():
@@ -8,30 +9,12 @@ def get_lexi_look_direction_data():
     files = glob.glob("../data/LEXI_gimbal_pointing_values/LEXI_Pointing_Measured*.csv")
 
     print(f"Found {len(files)} files")
-    # Create an empty dataframe
-    df_list = []
-
-    # Loop through all the files
-    for file in files:
-        # Read the file
-        data = pd.read_csv(file, skiprows=1)
-
-        # Append the data to the list
-        df_list.append(data)
-
-    # Concatenate the data
-    df = pd.concat(df_list)
-
-    df.columns = ["epoch_utc", "dec_lexi", "ra_lexi"]
-
-    # Remove the degree symbol
-    df["dec_lexi"] = df["dec_lexi"].str.replace("°", "").astype(float)
-    df["ra_lexi"] = df["ra_lexi"].str.replace("°", "").astype(float)
-    # Set the time zone to UTC
-    df["epoch_utc"] = pd.to_datetime(df["epoch_utc"], utc=True)
-    df = df.set_index("epoch_utc")
-    # Sort the data
-    df = df.sort_index()
+    # Parse the files in parallel and merge them in time order
+    epochs_ns, dec, ra = load_pointing_files(files)
+    df = pd.DataFrame(
+        {"dec_lexi": dec, "ra_lexi": ra},
+        index=pd.DatetimeIndex(pd.to_datetime(epochs_ns, utc=True), name="epoch_utc"),
+    )
 
     # Check for duplicate indices
     # df = df[~df.index.duplicated(keep="first")]
@@ -0,0 +1,104 @@
+import matplotlib.dates as mdates
+import numpy as np
+from decimate import MinMaxDecimator
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+
+class LivePlot:
+    """
+    A time-series plot with a left and a right y-axis that is built once and updated in place.
+
+    The figure, both axes, the Tk canvas and one marker-only line artist per series are created
+    once. Each tick only appends the new samples to the series, moves the limits and schedules a
+    render for when Tk is idle, so the per-tick cost does not include rebuilding any matplotlib
+    objects or Tk widgets. Blitting is not used because the x-axis limits, and therefore the tick labels, change
+    on every tick.
+
+    Every series goes through a MinMaxDecimator with one bucket per pixel of axis width, so the
+    artists hold at most two points per pixel column however long the history gets. With a
+    profiler (instrumentation.RefreshProfiler), every render is timed as the "render" stage.
+    """
+
+    def __init__(self, master, figsize=(8, 4), dpi=100, profiler=None):
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.ax = self.figure.add_subplot(111)
+        self.ax_twin = self.ax.twinx()
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.ax.xaxis_date()
+        # Series name -> (side, line artist, decimator)
+        self._series = {}
+        self.profiler = profiler
+        # Tk id of the scheduled render, so draws in a row only render once
+        self._render_id = None
+
+    def axis(self, side):
+        return self.ax if side == "left" else self.ax_twin
+
+    def set_series(self, series):
+        """
+        Make the plot show exactly the given series, a dict of name -> (side, style), where side
+        is "left" or "right" and style holds the Line2D keyword arguments (label, color, marker).
+        Returns True if the set of series changed, in which case all the data was cleared and the
+        caller should append the full history again.
+        """
+        if list(series) == list(self._series):
+            return False
+
+        for _, line, _ in self._series.values():
+            line.remove()
+        self._series = {}
+        # One decimation bucket per pixel column of the axes
+        n_pixels = self.ax.bbox.width
+        for name, (side, style) in series.items():
+            (line,) = self.axis(side).plot([], [], linestyle="none", **style)
+            self._series[name] = (side, line, MinMaxDecimator(n_pixels))
+
+        # The legends only change with the set of series
+        for ax in (self.ax, self.ax_twin):
+            if ax.get_legend() is not None:
+                ax.get_legend().remove()
+        if any(side == "left" for side, _ in series.values()):
+            self.ax.legend(loc="upper left")
+        if any(side == "right" for side, _ in series.values()):
+            self.ax_twin.legend(loc="upper right")
+        return True
+
+    def append(self, times, values):
+        """
+        Append samples to the series. times are the sample times (datetime64 or datetimes) shared
+        by all the series, values maps a series name to its y values at those times.
+        """
+        if len(times) == 0:
+            return
+        x = mdates.date2num(times)
+        for name, y in values.items():
+            _, line, decimator = self._series[name]
+            decimator.append(x, y)
+            line.set_data(*decimator.points())
+
+    def set_xlim(self, start, end):
+        self.ax.set_xlim(start, end)
+
+    def draw(self):
+        """
+        Rescale the y-axes to the data and schedule a redraw for when Tk is idle.
+        """
+        for side in ("left", "right"):
+            ranges = [decimator.y_range() for s, _, decimator in self._series.values() if s == side]
+            y_min = min((low for low, _ in ranges), default=np.inf)
+            y_max = max((high for _, high in ranges), default=-np.inf)
+            if y_min <= y_max:
+                margin = 0.05 * (y_max - y_min) or 1.0
+                self.axis(side).set_ylim(y_min - margin, y_max + margin)
+        if self._render_id is None:
+            self._render_id = self.canvas.get_tk_widget().after_idle(self._render)
+
+    def _render(self):
+        self._render_id = None
+        if self.profiler is None:
+            self.canvas.draw()
+            return
+        with self.profiler.stage("render"):
+            self.canvas.draw()
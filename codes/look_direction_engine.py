@@ -0,0 +1,348 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+from ephemeris import EphemerisInterpolator, read_stk_ephemeris
+from pointing_ingest import (
+    DEFAULT_CHUNK_SIZE,
+    PointingIngestor,
+    PointingTable,
+    iter_pointing_chunks,
+    load_pointing_files,
+    resample_pointing,
+)
+from separation import SeparationKernel, radec_to_unit_vectors, vector_separation
+from table_cache import load_or_build
+from time_index import NO_MATCH, TimeCursor, to_epoch_ns
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data"))
+EPHEMERIS_FILE = os.path.join(DATA_DIR, "LEXIAngleData_20250304.csv")
+POINTING_FILE_PATTERN = os.path.join(
+    DATA_DIR, "LEXI_gimbal_pointing_values", "LEXI_Pointing_Measured*.csv"
+)
+LEXI_LOOK_DIRECTION_FILE = os.path.join(DATA_DIR, "lexi_look_direction_data.csv")
+CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+
+# Targets whose angular distance to the LEXI look direction is tracked
+TARGETS = ["Earth", "Sun", "Crab", "Sco", "Mag", "Bonus"]
+
+# Bump when the cached tables change meaning so they are rebuilt
+PIPELINE_VERSION = 2
+
+# Live LEXI samples further than this from the requested time are not used
+LIVE_POINTING_TOLERANCE = pd.Timedelta(minutes=1)
+
+
+def angular_distance(ra1, dec1, ra2, dec2):
+    """
+    Calculate the angular distance between two points on the celestial sphere
+    given their right ascension (RA) and declination (Dec) in degrees.
+    """
+    return vector_separation(radec_to_unit_vectors(ra1, dec1), radec_to_unit_vectors(ra2, dec2))
+
+
+def target_separations(df, targets=TARGETS, dtype=np.float64):
+    """
+    Angular distance in degrees of LEXI to each target for every row of df, computed for all
+    targets in one batched pass. Returns an array of shape (len(targets), len(df)).
+    """
+    kernel = SeparationKernel(
+        df[[f"ra_{target.lower()}" for target in targets]].to_numpy().T,
+        df[[f"dec_{target.lower()}" for target in targets]].to_numpy().T,
+        dtype=dtype,
+    )
+    return kernel.separations(df["ra_lexi"].to_numpy(), df["dec_lexi"].to_numpy())
+
+
+def get_lexi_look_direction_data(
+    pattern=POINTING_FILE_PATTERN, save_file_name=LEXI_LOOK_DIRECTION_FILE, processes=None
+):
+    # Parse the files in parallel, one worker process per file (processes=None uses every core)
+    epochs_ns, dec, ra = load_pointing_files(glob.glob(pattern), processes)
+
+    # The loader strips the degree symbols, converts to UTC and sorts by time
+    df = pd.DataFrame(
+        {"dec_lexi": dec, "ra_lexi": ra},
+        index=pd.DatetimeIndex(pd.to_datetime(epochs_ns, utc=True), name="epoch_utc"),
+    )
+
+    # NOTE: The start time is hardcoded for now. Once we start getting actual data, we will no longer
+    # need this. and will need to remove the next few lines.
+    # start_time = "2025-03-02 12:00:00"
+    # start_time = pd.to_datetime(start_time, utc=True)
+
+    # # Shift the index by the time difference between the first time in the data and the start time
+    # df.index = df.index - (df.index[0] - start_time)
+    # ---End of the code to be removed---
+
+    # Check for duplicate indices
+    # df = df[~df.index.duplicated(keep="first")]
+    # Save the data to a file name lexi_look_direction_data.csv
+    df.to_csv(save_file_name, index=True)
+
+    return df, save_file_name
+
+
+def build_lexi_pointing_df(pointing_pattern=POINTING_FILE_PATTERN, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Load the gimbal exports and resample the LEXI RA/Dec to 1 minute intervals.
+
+    The exports are streamed in time-ordered chunks and averaged bin by bin, so only the 1-minute
+    result is ever held in memory, not the raw telemetry.
+    """
+    chunks = iter_pointing_chunks(glob.glob(pointing_pattern), chunk_size)
+    bins = list(resample_pointing(chunks, "1min"))
+    epochs_ns, dec, ra = (
+        (np.concatenate(column) for column in zip(*bins))
+        if bins
+        else (np.empty(0, dtype=np.int64), np.empty(0), np.empty(0))
+    )
+    return pd.DataFrame(
+        {"dec_lexi": dec, "ra_lexi": ra},
+        index=pd.DatetimeIndex(pd.to_datetime(epochs_ns, utc=True), name="epoch_utc"),
+    )
+
+
+class LookDirectionEngine:
+    """
+    Headless access to the LEXI look direction and the target ephemeris at any time.
+
+    Nothing is loaded until the first query. The STK ephemeris is turned into an
+    EphemerisInterpolator, so targets are evaluated at the exact query times, and the 1-minute LEXI
+    pointing comes from the on-disk cache, or from build_lexi_pointing_df() when a gimbal export
+    changed. When live_pointing is on, the gimbal exports are also tailed so that refresh() picks up
+    new telemetry, and LEXI samples within live_tolerance of a query take precedence over the
+    1-minute values. A stream (telemetry_ingest.TelemetryRing) attached to the engine is used the
+    same way and takes precedence over both. processes is the number of worker processes used to
+    parse a large backlog of exports (the first poll), None for every core. Only pass more than 1
+    from a program whose entry point is guarded by if __name__ == "__main__", as the workers may
+    re-import it.
+    """
+
+    def __init__(
+        self,
+        ephemeris_file=EPHEMERIS_FILE,
+        pointing_pattern=POINTING_FILE_PATTERN,
+        cache_dir=CACHE_DIR,
+        live_pointing=True,
+        live_tolerance=LIVE_POINTING_TOLERANCE,
+        processes=1,
+    ):
+        self.ephemeris_file = ephemeris_file
+        self.pointing_pattern = pointing_pattern
+        self.cache_dir = cache_dir
+        self.live_pointing = live_pointing
+        self.live_tolerance = live_tolerance
+        self.processes = processes
+        self._ephemeris = None
+        self._pointing = None
+        self._ingestor = None
+        # Source of live samples received over the network, with a table() of them
+        self.stream = None
+
+    def load(self):
+        """
+        Load the ephemeris and the LEXI pointing tables, if that has not happened yet.
+        """
+        if self._ephemeris is not None:
+            return
+
+        ephemeris_df = load_or_build(
+            "ephemeris",
+            [self.ephemeris_file],
+            lambda: read_stk_ephemeris(self.ephemeris_file),
+            cache_dir=self.cache_dir,
+            version=PIPELINE_VERSION,
+        )
+        lexi_df = load_or_build(
+            "lexi_pointing_1min",
+            glob.glob(self.pointing_pattern),
+            lambda: build_lexi_pointing_df(self.pointing_pattern),
+            cache_dir=self.cache_dir,
+            version=PIPELINE_VERSION,
+        )
+        self._pointing = PointingTable.from_dataframe(lexi_df)
+        self._ephemeris = EphemerisInterpolator.from_frame(ephemeris_df)
+
+        if self.live_pointing:
+            self._ingestor = PointingIngestor(self.pointing_pattern, processes=self.processes)
+            # Start from the samples and offsets of the previous run and only tail what was added
+            ingestor_cache = os.path.join(self.cache_dir, "lexi_pointing_live")
+            restored = self._ingestor.restore(ingestor_cache)
+            if self._ingestor.poll() or not restored:
+                self._ingestor.save(ingestor_cache)
+
+    @property
+    def ephemeris(self):
+        self.load()
+        return self._ephemeris
+
+    @property
+    def pointing(self):
+        self.load()
+        return self._pointing
+
+    @property
+    def live_table(self):
+        """
+        The PointingTable of the live gimbal telemetry, None without live pointing.
+        """
+        self.load()
+        return None if self._ingestor is None else self._ingestor.table
+
+    @property
+    def columns(self):
+        """
+        Names of the columns returned by at() and range().
+        """
+        return (
+            ["epoch_utc"]
+            + self.ephemeris.columns
+            + ["epoch_lexi", "dec_lexi", "ra_lexi"]
+            + [f"angular_distance_{target.lower()}" for target in TARGETS]
+        )
+
+    def refresh(self):
+        """
+        Merge any newly exported gimbal telemetry. Returns the number of new samples.
+        """
+        self.load()
+        if self._ingestor is None:
+            return 0
+        return self._ingestor.poll()
+
+    def at(self, times, mode="nearest", tolerance=None):
+        """
+        Return the look direction at each query time, one output row per query, in query order.
+
+        Target columns are interpolated at the query time itself (epoch_utc). The LEXI RA/Dec comes
+        from the pointing sample found with TimeIndex.lookup(mode, tolerance), whose time is
+        reported in epoch_lexi; queries without a LEXI match get NaN for LEXI and the distances.
+        """
+        data = self.at_arrays(times, mode=mode, tolerance=tolerance)
+        for column in ("epoch_utc", "epoch_lexi"):
+            data[column] = pd.DatetimeIndex(data[column]).tz_localize("UTC")
+        # One DataFrame constructor over all the arrays, adding ~80 columns one by one is slow
+        return pd.DataFrame(data)
+
+    def at_arrays(self, times, mode="nearest", tolerance=None):
+        """
+        The columns of at() as a dict of arrays, with epoch_utc and epoch_lexi as UTC
+        datetime64[ns]. For callers that pass the values on and do not need the DataFrame.
+        """
+        query_ns = np.atleast_1d(to_epoch_ns(times)).astype(np.int64, copy=False)
+        columns = self.ephemeris.columns
+        values = self.ephemeris.evaluate(query_ns)
+        epoch_lexi, dec_lexi, ra_lexi = self._lexi_pointing(query_ns, mode, tolerance)
+
+        # Find the angular distance between the LEXI and every target's ra and dec in one pass
+        ra_positions = [columns.index(f"ra_{target.lower()}") for target in TARGETS]
+        dec_positions = [columns.index(f"dec_{target.lower()}") for target in TARGETS]
+        kernel = SeparationKernel(values[:, ra_positions].T, values[:, dec_positions].T)
+        distances = kernel.separations(ra_lexi, dec_lexi)
+
+        data = {"epoch_utc": query_ns.view("datetime64[ns]")}
+        data.update(zip(columns, values.T))
+        data["epoch_lexi"] = epoch_lexi.view("datetime64[ns]")
+        data["dec_lexi"] = dec_lexi
+        data["ra_lexi"] = ra_lexi
+        for target, distance in zip(TARGETS, distances):
+            data[f"angular_distance_{target.lower()}"] = distance
+        return data
+
+    def lookup(self, times, targets=None, mode="nearest", tolerance=None):
+        """
+        Return only the LEXI pointing and the angular distance to each target at every query
+        time: the epoch_utc, epoch_lexi, dec_lexi, ra_lexi and angular_distance_* columns of at(),
+        without interpolating the other ephemeris columns. Meant for large batches.
+        """
+        targets = TARGETS if targets is None else list(targets)
+        query_ns = np.atleast_1d(to_epoch_ns(times)).astype(np.int64, copy=False)
+        target_ra = self.ephemeris.evaluate(query_ns, [f"ra_{t.lower()}" for t in targets])
+        target_dec = self.ephemeris.evaluate(query_ns, [f"dec_{t.lower()}" for t in targets])
+        epoch_lexi, dec_lexi, ra_lexi = self._lexi_pointing(query_ns, mode, tolerance)
+        distances = SeparationKernel(target_ra.T, target_dec.T).separations(ra_lexi, dec_lexi)
+
+        rows = pd.DataFrame(
+            {
+                "epoch_utc": pd.to_datetime(query_ns, utc=True),
+                "epoch_lexi": pd.to_datetime(epoch_lexi, utc=True),
+                "dec_lexi": dec_lexi,
+                "ra_lexi": ra_lexi,
+            }
+        )
+        for target, distance in zip(targets, distances):
+            rows[f"angular_distance_{target.lower()}"] = distance
+        return rows
+
+    def separations(self, times, targets=None, mode="nearest", tolerance=None):
+        """
+        Return the angular distance in degrees between LEXI and each target at every query time,
+        as a DataFrame with one column per target, indexed by the query times.
+        """
+        targets = TARGETS if targets is None else list(targets)
+        query_ns = np.atleast_1d(to_epoch_ns(times)).astype(np.int64, copy=False)
+        ra_columns = [f"ra_{target.lower()}" for target in targets]
+        dec_columns = [f"dec_{target.lower()}" for target in targets]
+        target_ra = self.ephemeris.evaluate(query_ns, ra_columns)
+        target_dec = self.ephemeris.evaluate(query_ns, dec_columns)
+        _, dec_lexi, ra_lexi = self._lexi_pointing(query_ns, mode, tolerance)
+
+        distances = SeparationKernel(target_ra.T, target_dec.T).separations(ra_lexi, dec_lexi)
+        return pd.DataFrame(
+            distances.T,
+            columns=targets,
+            index=pd.DatetimeIndex(pd.to_datetime(query_ns, utc=True), name="query_time"),
+        )
+
+    def range(self, t0, t1, step=None):
+        """
+        Return the look direction for t0 <= epoch_utc <= t1, at the STK sample times within the
+        window, or on a regular grid when step (e.g. "1min") is given.
+        """
+        if step is None:
+            return self.at(self.ephemeris.index.window(t0, t1))
+        start = pd.Timestamp(to_epoch_ns(t0), tz="UTC")
+        times = pd.date_range(start, pd.Timestamp(to_epoch_ns(t1), tz="UTC"), freq=step)
+        return self.at(times)
+
+    def cursor(self, start=None):
+        """
+        A TimeCursor over the STK sample times, for consuming the look direction tick by tick with
+        rows(cursor.pending(now)).
+        """
+        return TimeCursor(self.ephemeris.index, start)
+
+    def rows(self, rows):
+        """
+        Return the look direction at the STK sample times selected by rows, a slice of the
+        ephemeris index (e.g. from a TimeCursor).
+        """
+        return self.at(self.ephemeris.index.epochs_ns[rows])
+
+    def _lexi_pointing(self, query_ns, mode, tolerance):
+        """
+        LEXI (epoch_ns, dec, ra) for every query time. A live telemetry sample within
+        live_tolerance of the query is preferred over the 1-minute table, and a streamed one over
+        both.
+        """
+        epoch_ns = np.full(query_ns.shape, np.iinfo(np.int64).min, dtype=np.int64)
+        dec = np.full(query_ns.shape, np.nan)
+        ra = np.full(query_ns.shape, np.nan)
+
+        live_tolerance = pd.Timedelta(self.live_tolerance)
+        if tolerance is not None:
+            live_tolerance = min(live_tolerance, pd.Timedelta(tolerance))
+        # Later tables overwrite the matches of earlier ones
+        tables = [(self.pointing, tolerance)]
+        for live_table in (self.live_table, None if self.stream is None else self.stream.table()):
+            if live_table is not None:
+                tables.append((live_table, live_tolerance))
+        for table, table_tolerance in tables:
+            positions = table.index.lookup(query_ns, mode=mode, tolerance=table_tolerance)
+            hit = positions != NO_MATCH
+            epoch_ns[hit] = table.index.epochs_ns[positions[hit]]
+            dec[hit] = table.dec_lexi[positions[hit]]
+            ra[hit] = table.ra_lexi[positions[hit]]
+        return epoch_ns, dec, ra
@@ -0,0 +1,604 @@
+"""
+Local look direction service: one process loads the data and answers queries over TCP.
+
+Every operator console otherwise parses and merges the same exports and keeps its own copy of the
+table. With the service running, LookupClient gives the viewers and scripts the query methods of
+LookDirectionEngine (at, lookup, separations, range, cursor, rows, refresh) without loading
+anything themselves. They use it when LEXI_LOOKUP_SERVICE is set to the service's host:port.
+
+Protocol. Every message is a frame: two big-endian uint32 (header length, payload length), a JSON
+header, then a binary payload. A request header holds an "id" chosen by the client, the "op" and
+its parameters; query times go in the payload as int64 epoch ns. A response header echoes the id
+and either describes the result, a table whose columns are packed one after the other in the
+payload (float64, int64, or int64 ns for UTC times), or holds an "error".
+
+Clients may pipeline: send any number of requests before reading the responses, which come back
+in request order. The service answers the requests that arrived together as one batch, and runs
+consecutive at/lookup/separations queries with the same parameters as a single vectorized
+lookup, so many single-time queries cost about as much as one.
+
+    python lookup_service.py serve --port 8765
+    LEXI_LOOKUP_SERVICE=127.0.0.1:8765 python look_direction.py
+    python lookup_service.py query "2025-03-03 23:10:00" --op separations
+    python lookup_service.py bench --queries 2000 --pipeline 100
+"""
+
+import argparse
+import itertools
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from look_direction_engine import TARGETS, LookDirectionEngine
+from shared_table import SHARED_TABLE_ENV, SharedLookDirectionEngine
+from telemetry_ingest import TelemetryReceiver, parse_stream_address
+from time_index import LOOKUP_MODES, TimeCursor, TimeIndex, to_epoch_ns
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# host:port of a running service, used by open_engine()
+SERVICE_ENV = "LEXI_LOOKUP_SERVICE"
+# (header length, payload length) in front of every frame
+FRAME_PREFIX = struct.Struct(">II")
+# Larger headers are a protocol error, the payload carries the bulk data
+MAX_HEADER_BYTES = 1 << 20
+RECV_SIZE = 1 << 16
+# How often the service merges newly exported gimbal telemetry, in seconds
+DEFAULT_REFRESH_INTERVAL_S = 5.0
+
+# Operations whose consecutive requests with the same parameters are merged into one lookup
+BATCHED_OPS = ("at", "lookup", "separations")
+OPS = BATCHED_OPS + ("ping", "info", "range", "epochs", "refresh")
+
+
+class LookupServiceError(RuntimeError):
+    """
+    An error reported by the service for one request.
+    """
+
+
+def encode_frame(header, payload=b""):
+    header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return FRAME_PREFIX.pack(len(header), len(payload)) + header + payload
+
+
+def split_frames(buffer):
+    """
+    The complete (header, payload bytes) frames at the start of buffer, and the number of bytes
+    they take.
+    """
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= FRAME_PREFIX.size:
+        header_size, payload_size = FRAME_PREFIX.unpack_from(buffer, offset)
+        if header_size > MAX_HEADER_BYTES:
+            raise ValueError(f"Frame header of {header_size} bytes, over {MAX_HEADER_BYTES}.")
+        start = offset + FRAME_PREFIX.size
+        end = start + header_size + payload_size
+        if end > len(buffer):
+            break
+        header = json.loads(bytes(buffer[start : start + header_size]))
+        frames.append((header, bytes(buffer[start + header_size : end])))
+        offset = end
+    return frames, offset
+
+
+def table_matrix(df):
+    """
+    (columns, index, matrix) of a DataFrame of float, integer and UTC datetime columns: the
+    [name, kind] of every column, the name of the index column or None, and the values as one
+    row-major (n_rows, n_columns) little-endian 8-byte matrix, integers and times (as epoch ns)
+    stored by bit pattern. A named index (e.g. the query_time of separations) is sent as a
+    column and restored. Rows of the matrix can be sliced and sent as they are.
+    """
+    index = None
+    if df.index.name is not None:
+        index = df.index.name
+        df = df.reset_index()
+    columns = []
+    matrix = np.empty((len(df), df.shape[1]), dtype="<f8")
+    floats = [
+        i
+        for i, dtype in enumerate(df.dtypes)
+        if not isinstance(dtype, pd.DatetimeTZDtype) and not np.issubdtype(dtype, np.integer)
+    ]
+    # All the float columns in one copy, they are most of the table
+    matrix[:, floats] = df.iloc[:, floats].to_numpy(dtype=np.float64)
+    for i, (name, dtype) in enumerate(df.dtypes.items()):
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            kind = "datetime"
+            matrix[:, i] = pd.DatetimeIndex(df.iloc[:, i]).as_unit("ns").asi8.view("<f8")
+        elif np.issubdtype(dtype, np.integer):
+            kind = "int64"
+            matrix[:, i] = df.iloc[:, i].to_numpy(dtype="<i8").view("<f8")
+        else:
+            kind = "float64"
+        columns.append([str(name), kind])
+    return columns, index, matrix
+
+
+def arrays_matrix(arrays):
+    """
+    The (columns, index, matrix) of table_matrix() for a dict of equally long float, integer and
+    UTC datetime64[ns] arrays, e.g. LookDirectionEngine.at_arrays(), without a DataFrame.
+    """
+    columns = []
+    n_rows = len(next(iter(arrays.values()))) if arrays else 0
+    matrix = np.empty((n_rows, len(arrays)), dtype="<f8")
+    for i, (name, values) in enumerate(arrays.items()):
+        if values.dtype.kind == "M":
+            kind = "datetime"
+            matrix[:, i] = values.astype("datetime64[ns]").view("<f8")
+        elif values.dtype.kind in "iu":
+            kind = "int64"
+            matrix[:, i] = values.astype("<i8").view("<f8")
+        else:
+            kind = "float64"
+            matrix[:, i] = values
+        columns.append([str(name), kind])
+    return columns, None, matrix
+
+
+def encode_table(columns, index, rows):
+    """
+    (header fields, payload) of rows of a table_matrix().
+    """
+    return {"rows": len(rows), "columns": columns, "index": index}, rows.tobytes()
+
+
+def decode_table(header, payload):
+    """
+    The DataFrame of encode_table(). The float columns are built from the payload in one block.
+    """
+    columns = header["columns"]
+    matrix = np.frombuffer(payload, dtype="<f8").reshape(header["rows"], len(columns))
+    df = pd.DataFrame(matrix.copy(), columns=[name for name, _ in columns])
+    # Replacing the few other columns in place is cheaper than inserting them
+    for i, (name, kind) in enumerate(columns):
+        if kind == "datetime":
+            df.isetitem(i, pd.DatetimeIndex(matrix[:, i].view("datetime64[ns]")).tz_localize("UTC"))
+        elif kind == "int64":
+            df.isetitem(i, matrix[:, i].view("<i8").copy())
+    if header.get("index") is not None:
+        df = df.set_index(header["index"])
+    return df
+
+
+def _times(header, payload):
+    """
+    Query times of a request: n int64 epoch ns in the payload, or a JSON list of times, or the
+    current time without either.
+    """
+    if "n" in header:
+        return np.frombuffer(payload, dtype="<i8", count=header["n"]).astype(np.int64)
+    if "times" in header:
+        return np.atleast_1d(to_epoch_ns(header["times"])).astype(np.int64, copy=False)
+    return np.array([time.time_ns()], dtype=np.int64)
+
+
+class LookupService:
+    """
+    Answers decoded requests with one LookDirectionEngine. Engine calls are serialized with a
+    lock, so connections served on different threads and the periodic refresh never overlap.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.requests = 0
+        self.lookups = 0
+        self._lock = threading.Lock()
+
+    def handle_batch(self, frames):
+        """
+        Encoded responses to a list of (header, payload) requests, in the same order.
+        """
+        responses = []
+        for group in self._groups(frames):
+            try:
+                results = self._run_group(group)
+            except Exception as e:
+                if len(group) == 1:
+                    results = [e]
+                else:
+                    # Find out which of the merged requests failed
+                    results = [self._run_one(frame) for frame in group]
+            for (header, _), result in zip(group, results):
+                responses.append(self._response(header, result))
+        self.requests += len(frames)
+        return responses
+
+    def _groups(self, frames):
+        """
+        Split the requests into runs of consecutive batched queries with the same parameters,
+        every other request on its own.
+        """
+        group, group_key = [], None
+        for header, payload in frames:
+            op = header.get("op")
+            key = None
+            if op in BATCHED_OPS:
+                params = {k: v for k, v in header.items() if k not in ("id", "n", "times")}
+                key = json.dumps(params, sort_keys=True)
+            if group and (key is None or key != group_key):
+                yield group
+                group = []
+            group.append((header, payload))
+            group_key = key
+        if group:
+            yield group
+
+    def _run_one(self, frame):
+        try:
+            return self._run_group([frame])[0]
+        except Exception as e:
+            return e
+
+    def _run_group(self, group):
+        header = group[0][0]
+        op = header.get("op")
+        if op not in OPS:
+            raise ValueError(f"Unknown op {op!r}, expected one of {list(OPS)}.")
+        if op in BATCHED_OPS:
+            times = [_times(h, p) for h, p in group]
+            with self._lock:
+                table = self._query(op, np.concatenate(times), header)
+                self.lookups += 1
+            # Converted once for the whole group, every response is a slice of rows
+            if isinstance(table, dict):
+                columns, index, matrix = arrays_matrix(table)
+            else:
+                columns, index, matrix = table_matrix(table)
+            bounds = np.cumsum([0] + [t.size for t in times])
+            return [
+                encode_table(columns, index, matrix[start:stop])
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+        with self._lock:
+            return [self._command(op, header)]
+
+    def refresh(self):
+        """
+        Merge newly exported gimbal telemetry, between two requests.
+        """
+        with self._lock:
+            return self.engine.refresh()
+
+    def _query(self, op, query_ns, header):
+        mode = header.get("mode", "nearest")
+        tolerance = header.get("tolerance")
+        if op == "at":
+            return self.engine.at_arrays(query_ns, mode=mode, tolerance=tolerance)
+        targets = header.get("targets")
+        if op == "lookup":
+            return self.engine.lookup(query_ns, targets=targets, mode=mode, tolerance=tolerance)
+        return self.engine.separations(query_ns, targets=targets, mode=mode, tolerance=tolerance)
+
+    def _command(self, op, header):
+        if op == "ping":
+            return {}
+        if op == "info":
+            epochs_ns = self.engine.ephemeris.index.epochs_ns
+            return {
+                "targets": TARGETS,
+                "ephemeris_rows": int(epochs_ns.size),
+                "start_ns": int(epochs_ns[0]) if epochs_ns.size else None,
+                "end_ns": int(epochs_ns[-1]) if epochs_ns.size else None,
+                "requests": self.requests,
+                "lookups": self.lookups,
+            }
+        if op == "range":
+            return self.engine.range(header["t0"], header["t1"], header.get("step"))
+        if op == "epochs":
+            return pd.DataFrame({"epoch_ns": self.engine.ephemeris.index.epochs_ns})
+        return {"new_samples": int(self.engine.refresh())}
+
+    def _response(self, header, result):
+        response = {"id": header.get("id")}
+        if isinstance(result, Exception):
+            response["error"] = f"{type(result).__name__}: {result}"
+            return encode_frame(response)
+        if isinstance(result, pd.DataFrame):
+            result = encode_table(*table_matrix(result))
+        if isinstance(result, tuple):
+            fields, payload = result
+            response["table"] = fields
+            return encode_frame(response, payload)
+        response["result"] = result
+        return encode_frame(response)
+
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        buffer = bytearray()
+        while True:
+            data = self.request.recv(RECV_SIZE)
+            if not data:
+                return
+            buffer += data
+            try:
+                frames, consumed = split_frames(buffer)
+            except ValueError as e:
+                print(f"Closing connection from {self.client_address}: {e}")
+                return
+            if not frames:
+                continue
+            # Everything that arrived together is answered as one batch
+            del buffer[:consumed]
+            responses = self.server.service.handle_batch(frames)
+            self.request.sendall(b"".join(responses))
+
+
+class LookupServer(socketserver.ThreadingTCPServer):
+    """
+    TCP server for a LookupService, one thread per connection. With a refresh_interval, newly
+    exported gimbal telemetry is merged into the engine every refresh_interval seconds.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, service, address=(DEFAULT_HOST, DEFAULT_PORT), refresh_interval=None):
+        super().__init__(address, _ConnectionHandler)
+        self.service = service
+        self._stop_refresh = threading.Event()
+        if refresh_interval:
+            thread = threading.Thread(
+                target=self._refresh, args=(refresh_interval,), name="service-refresh", daemon=True
+            )
+            thread.start()
+
+    def _refresh(self, interval):
+        while not self._stop_refresh.wait(interval):
+            try:
+                self.service.refresh()
+            except Exception as e:
+                # A bad export must not stop the service, the next refresh tries again
+                print(f"Could not refresh the pointing data: {e}")
+
+    def server_close(self):
+        self._stop_refresh.set()
+        super().server_close()
+
+
+class LookupClient:
+    """
+    Client of a LookupServer with the query methods of LookDirectionEngine, so it can stand in
+    for one. Results are DataFrames with the same columns as the engine's.
+
+    send() and receive() expose the pipelining: send many requests, then read their results.
+    A client may be shared between threads.
+    """
+
+    def __init__(self, address=(DEFAULT_HOST, DEFAULT_PORT), timeout=60.0):
+        self.address = address
+        self._socket = socket.create_connection(address, timeout=timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._ids = itertools.count(1)
+        self._buffer = bytearray()
+        # Responses read while looking for another one, by request id
+        self._responses = {}
+        self._send_lock = threading.Lock()
+        self._receive_lock = threading.Lock()
+        self._epochs = None
+
+    def close(self):
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, op, times=None, **params):
+        """
+        Send one request without waiting for its response. times (anything to_epoch_ns takes) go
+        in the binary payload. Returns the request id to pass to receive().
+        """
+        header = {"op": op, **{key: value for key, value in params.items() if value is not None}}
+        if "tolerance" in header:
+            header["tolerance"] = int(pd.Timedelta(header["tolerance"]).value)
+        payload = b""
+        if times is not None:
+            query_ns = np.atleast_1d(to_epoch_ns(times)).astype("<i8", copy=False)
+            header["n"] = int(query_ns.size)
+            payload = query_ns.tobytes()
+        with self._send_lock:
+            header["id"] = request_id = next(self._ids)
+            self._socket.sendall(encode_frame(header, payload))
+        return request_id
+
+    def receive(self, request_id):
+        """
+        The result of a request sent with send(): a DataFrame for queries, a dict otherwise.
+        Raises LookupServiceError if the service could not answer it.
+        """
+        with self._receive_lock:
+            while request_id not in self._responses:
+                data = self._socket.recv(RECV_SIZE)
+                if not data:
+                    raise ConnectionError(f"The look direction service at {self.address} closed.")
+                self._buffer += data
+                frames, consumed = split_frames(self._buffer)
+                for header, payload in frames:
+                    self._responses[header["id"]] = (header, payload)
+                del self._buffer[:consumed]
+            header, payload = self._responses.pop(request_id)
+        if "error" in header:
+            raise LookupServiceError(header["error"])
+        if "table" in header:
+            return decode_table(header["table"], payload)
+        return header.get("result")
+
+    def request(self, op, times=None, **params):
+        return self.receive(self.send(op, times, **params))
+
+    def pipeline(self, requests):
+        """
+        Send every (op, times, params) request, then return their results in the same order.
+        """
+        ids = [self.send(op, times, **params) for op, times, params in requests]
+        return [self.receive(request_id) for request_id in ids]
+
+    # LookDirectionEngine methods
+
+    def load(self):
+        """
+        Check that the service answers; the data is already loaded there.
+        """
+        self.request("ping")
+        return self
+
+    def at(self, times, mode="nearest", tolerance=None):
+        return self.request("at", times, mode=mode, tolerance=tolerance)
+
+    def lookup(self, times, targets=None, mode="nearest", tolerance=None):
+        return self.request("lookup", times, targets=targets, mode=mode, tolerance=tolerance)
+
+    def separations(self, times, targets=None, mode="nearest", tolerance=None):
+        return self.request("separations", times, targets=targets, mode=mode, tolerance=tolerance)
+
+    def range(self, t0, t1, step=None):
+        return self.request("range", t0=int(to_epoch_ns(t0)), t1=int(to_epoch_ns(t1)), step=step)
+
+    def refresh(self):
+        return self.request("refresh")["new_samples"]
+
+    def cursor(self, start=None):
+        return TimeCursor(self._ephemeris_index(), start)
+
+    def rows(self, rows):
+        return self.at(self._ephemeris_index().epochs_ns[rows])
+
+    def _ephemeris_index(self):
+        if self._epochs is None:
+            epochs_ns = self.request("epochs")["epoch_ns"].to_numpy()
+            self._epochs = TimeIndex(epochs_ns, assume_sorted=True)
+        return self._epochs
+
+
+def parse_address(text):
+    """
+    (host, port) of "host:port", ":port" or "port".
+    """
+    host, _, port = text.rpartition(":")
+    return host or DEFAULT_HOST, int(port)
+
+
+def open_engine(**engine_kwargs):
+    """
+    A LookupClient connected to the service named by the LEXI_LOOKUP_SERVICE environment
+    variable, else a SharedLookDirectionEngine on the shared table named by LEXI_SHARED_TABLE,
+    else a local LookDirectionEngine(**engine_kwargs).
+    """
+    address = os.environ.get(SERVICE_ENV)
+    if address:
+        return LookupClient(parse_address(address))
+    shared_name = os.environ.get(SHARED_TABLE_ENV)
+    if shared_name:
+        return SharedLookDirectionEngine(shared_name)
+    return LookDirectionEngine(**engine_kwargs)
+
+
+def serve(args):
+    engine = LookDirectionEngine(processes=args.processes, live_pointing=not args.no_live)
+    start = time.perf_counter()
+    engine.load()
+    print(f"Loaded the look direction data in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    if args.telemetry:
+        protocol, address = parse_stream_address(args.telemetry)
+        engine.stream = TelemetryReceiver(address, protocol).start().ring
+        print(f"Receiving telemetry on {args.telemetry}", file=sys.stderr)
+    refresh_interval = None if args.no_live else args.refresh_interval
+    with LookupServer(LookupService(engine), (args.host, args.port), refresh_interval) as server:
+        print(f"Serving look directions on {args.host}:{server.server_address[1]}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def query(args):
+    with LookupClient((args.host, args.port)) as client:
+        times = args.times or None
+        if args.op == "at":
+            result = client.at(times, mode=args.mode, tolerance=args.tolerance)
+        elif args.op == "lookup":
+            result = client.lookup(times, args.targets, mode=args.mode, tolerance=args.tolerance)
+        else:
+            result = client.separations(times, args.targets, args.mode, args.tolerance)
+    print(result.to_csv(index=args.op == "separations"), end="")
+
+
+def bench(args):
+    """
+    Single-time queries from one client, args.pipeline in flight at a time.
+    """
+    with LookupClient((args.host, args.port)) as client:
+        info = client.request("info")
+        query_ns = np.linspace(info["start_ns"], info["end_ns"], args.queries).astype(np.int64)
+        start = time.perf_counter()
+        for first in range(0, args.queries, args.pipeline):
+            batch = query_ns[first : first + args.pipeline]
+            client.pipeline([(args.op, query, {}) for query in batch])
+        elapsed = time.perf_counter() - start
+    rate = args.queries / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"{args.queries} {args.op} queries, pipeline depth {args.pipeline}: {elapsed:.2f} s "
+        f"({rate:,.0f} queries/s)",
+        file=sys.stderr,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Service address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Service port")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Load the data and answer queries")
+    serve_parser.add_argument(
+        "--processes", type=int, help="Processes to parse the exports with (default: all cores)"
+    )
+    serve_parser.add_argument(
+        "--no-live", action="store_true", help="Only use the 1-minute table, never refresh"
+    )
+    serve_parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=DEFAULT_REFRESH_INTERVAL_S,
+        help="Seconds between checks for new gimbal telemetry",
+    )
+    serve_parser.add_argument(
+        "--telemetry", help="Also take live telemetry from this stream, e.g. udp://:8766"
+    )
+    serve_parser.set_defaults(func=serve)
+
+    query_parser = commands.add_parser("query", help="Query a running service, print CSV")
+    query_parser.add_argument("times", nargs="*", help="Query times (default: now)")
+    query_parser.add_argument("--op", choices=BATCHED_OPS, default="at", help="Query to run")
+    query_parser.add_argument("--targets", nargs="+", choices=TARGETS, help="Targets to report")
+    query_parser.add_argument("--mode", choices=LOOKUP_MODES, default="nearest")
+    query_parser.add_argument("--tolerance", help="Maximum distance to the LEXI sample, e.g. 1min")
+    query_parser.set_defaults(func=query)
+
+    bench_parser = commands.add_parser("bench", help="Measure the query rate of one client")
+    bench_parser.add_argument("--queries", type=int, default=1000, help="Queries to send")
+    bench_parser.add_argument("--pipeline", type=int, default=50, help="Requests in flight")
+    bench_parser.add_argument("--op", choices=BATCHED_OPS, default="at", help="Query to run")
+    bench_parser.set_defaults(func=bench)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,18 +16,70 @@ from tkinter import (
     VERTICAL,
     HORIZONTAL,
 )
+import atexit
 import datetime
 import time
+import os
 import numpy as np
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
-
-# Load the CSV file (replace 'your_file.csv' with the actual file path)
-data = pd.read_csv("../data/20241114_LEXIAngleData_20250302Landing.csv")
-data["epoch_utc"] = pd.to_datetime(data["epoch_utc"])
-# Set the timezones to UTC
-data["epoch_utc"] = data["epoch_utc"].dt.tz_localize("UTC")
+from compute_worker import ComputeWorker
+from display_format import TableFormatter
+from instrumentation import RefreshProfiler
+from live_plot import LivePlot
+from refresh_scheduler import RefreshScheduler
+from snapshot_writer import SnapshotWriter
+from look_direction_engine import DATA_DIR, TARGETS
+from lookup_service import open_engine
+from table_presenter import TablePresenter
+from telemetry_ingest import open_telemetry_stream
+
+# Table columns for each entry of the AZ-EL/RA-Dec/Both dropdown
+DISPLAY_COLUMNS = {
+    "AZ-EL": ("Target", "AZ", "EL"),
+    "RA-Dec": ("Target", "RA", "Dec"),
+    "Both": ("Target", "AZ", "EL", "RA", "Dec"),
+}
+# Angle quantities of those columns after the target, read from the "<quantity>_<target>" columns
+DISPLAY_QUANTITIES = {
+    "AZ-EL": ("az", "el"),
+    "RA-Dec": ("ra", "dec"),
+    "Both": ("az", "el", "ra", "dec"),
+}
+
+# STK export whose target AZ/EL is plotted. Before the plot went through the engine it read
+# 20241114_LEXIAngleData_20250302Landing.csv, which is not in data/; this is the export the
+# table lookups use
+EPHEMERIS_FILE = os.path.join(DATA_DIR, "LEXIAngleData_20250304.csv")
+
+# The plot is saved to this file from a background thread, at most once every interval seconds
+SNAPSHOT_FILE = "plot.png"
+SNAPSHOT_INTERVAL_S = 5.0
+
+# Period of the live refresh while "Use Current Time" is checked, and the choices in the GUI (s)
+REFRESH_INTERVAL_MS = 1000
+REFRESH_INTERVALS_S = ("1", "0.5", "0.25", "0.1")
+# Stage timings of the refresh loop are shown in the status line and written here on exit
+PROFILE_FILE = "refresh_profile.txt"
+PROFILE_STATUS_INTERVAL_MS = 1000
+
+# Always on: timing a stage costs a few microseconds, against milliseconds for the stage
+profiler = RefreshProfiler()
+atexit.register(profiler.dump, PROFILE_FILE)
+
+# All the table lookups go through the headless engine, which owns the merged pointing table.
+# With LEXI_LOOKUP_SERVICE set, a running lookup_service answers them instead and nothing is loaded;
+# the plot then shows the ephemeris the service loaded, not EPHEMERIS_FILE
+engine = open_engine(ephemeris_file=EPHEMERIS_FILE)
+engine.load()
+# Last STK sample already on the plot, so every tick only evaluates the samples after it
+plot_cursor = engine.cursor()
+# Converts and rounds the table values of all targets at once, reused while they round the same
+table_formatter = TableFormatter(TARGETS, DISPLAY_QUANTITIES)
+# With LEXI_TELEMETRY_STREAM set, the LEXI pointing received over the network is used by the
+# lookups as it arrives, and its AZ/EL is plotted
+telemetry = open_telemetry_stream(engine, profiler)
+# Records of the telemetry stream already on the plot, as a count of its ring
+stream_cursor = 0
 
 
 class DynamicMockDateTime(datetime.datetime):
@@ -61,145 +113,155 @@ class DynamicMockDateTime(datetime.datetime):
         return cls._mock_start_time + datetime.timedelta(days=ordinal)
 
 
+# Make a dictionary of color and marker for each key
+color_dict_az = {
+    "Earth": "blue",
+    "Sun": "orange",
+    "Crab": "green",
+    "Sco": "red",
+    "Mag": "purple",
+    "Bonus": "brown",
+}
+marker_dict_az = {
+    "Earth": "o",
+    "Sun": "x",
+    "Crab": "^",
+    "Sco": "s",
+    "Mag": "p",
+    "Bonus": "P",
+}
+color_dict_el = {
+    "Earth": "cyan",
+    "Sun": "magenta",
+    "Crab": "yellow",
+    "Sco": "black",
+    "Mag": "pink",
+    "Bonus": "gray",
+}
+marker_dict_el = {
+    "Earth": "o",
+    "Sun": "x",
+    "Crab": "^",
+    "Sco": "s",
+    "Mag": "p",
+    "Bonus": "P",
+}
+
+
+def plot_series(selected_keys):
+    """
+    The AZ (left axis) and EL (right axis) series of the selected keys, as expected by
+    LivePlot.set_series.
+    """
+    series = {}
+    for key in selected_keys:
+        series[f"{key} AZ"] = (
+            "left",
+            {"label": f"{key} AZ", "color": color_dict_az[key], "marker": marker_dict_az[key]},
+        )
+    for key in selected_keys:
+        series[f"{key} EL"] = (
+            "right",
+            {"label": f"{key} EL", "color": color_dict_el[key], "marker": marker_dict_el[key]},
+        )
+    if telemetry is not None:
+        series["LEXI AZ"] = ("left", {"label": "LEXI AZ", "color": "black", "marker": "."})
+        series["LEXI EL"] = ("right", {"label": "LEXI EL", "color": "gray", "marker": "."})
+    return series
+
+
 def update_plot():
-    # try:
-    for i in range(1):
-        # Get the selected keywords
-        selected_keys = [key for key, var in checkboxes.items() if var.get() == 1]
+    global stream_cursor
+    # Get the selected keywords
+    selected_keys = [key for key, var in checkboxes.items() if var.get() == 1]
+
+    if not selected_keys:
+        messagebox.showwarning("Warning", "No keys selected for plotting.")
+        return
+
+    # A new selection clears the plot, which then needs the whole history again
+    if live_plot.set_series(plot_series(selected_keys)):
+        plot_cursor.reset(mock_start_time)
+        stream_cursor = 0
+
+    # Only the rows after the last one already on the plot, up to the current UTC time, found by
+    # binary search; the cursor is advanced once they are drawn
+    current_time = datetime.datetime.now(datetime.timezone.utc)
+    worker.submit(
+        "plot",
+        prepare_plot_data,
+        plot_cursor.pending(current_time),
+        current_time,
+        selected_keys,
+        stream_cursor,
+        on_result=draw_plot,
+        on_error=show_error,
+    )
+
+
+# Runs on the compute worker: evaluate the new rows and pull out the arrays to plot
+@profiler.timed("plot_data")
+def prepare_plot_data(rows, current_time, selected_keys, stream_count):
+    filtered_data = engine.rows(rows)
+    x_data = np.array(filtered_data["epoch_utc"].values)
+    values = {}
+    for key in selected_keys:
+        az_col = f"az_{key.lower()}"
+        el_col = f"el_{key.lower()}"
+        if az_col in filtered_data.columns and el_col in filtered_data.columns:
+            values[f"{key} AZ"] = np.array(filtered_data[az_col].values)
+            values[f"{key} EL"] = np.array(filtered_data[el_col].values)
+
+    # The LEXI AZ/EL records received since the last update, on their own times
+    stream = None
+    if telemetry is not None:
+        stream_count, epochs_ns, stream_values = telemetry.ring.since(stream_count)
+        fields = telemetry.ring.fields
+        stream = (
+            stream_count,
+            epochs_ns.astype("datetime64[ns]"),
+            {
+                "LEXI AZ": stream_values[:, fields.index("az_lexi")],
+                "LEXI EL": stream_values[:, fields.index("el_lexi")],
+            },
+        )
+    return current_time, x_data, values, stream
 
-        if not selected_keys:
-            messagebox.showwarning("Warning", "No keys selected for plotting.")
-            return
 
-        # Filter data from the start time to the current UTC time
-        current_time = datetime.datetime.now(datetime.timezone.utc)
-        filtered_data = data[
-            (data["epoch_utc"] >= mock_start_time) & (data["epoch_utc"] <= current_time)
-        ]
-        # Make a dictionary of color and marker for each key
-        color_dict_az = {
-            "Earth": "blue",
-            "Sun": "orange",
-            "Crab": "green",
-            "Sco": "red",
-            "Mag": "purple",
-            "Bonus": "brown",
-        }
-        marker_dict_az = {
-            "Earth": "o",
-            "Sun": "x",
-            "Crab": "^",
-            "Sco": "s",
-            "Mag": "p",
-            "Bonus": "P",
-        }
-        color_dict_el = {
-            "Earth": "cyan",
-            "Sun": "magenta",
-            "Crab": "yellow",
-            "Sco": "black",
-            "Mag": "pink",
-            "Bonus": "gray",
-        }
-        marker_dict_el = {
-            "Earth": "o",
-            "Sun": "x",
-            "Crab": "^",
-            "Sco": "s",
-            "Mag": "p",
-            "Bonus": "P",
-        }
-        # Create a new figure
-        fig = Figure(figsize=(8, 4), dpi=100)
-        ax = fig.add_subplot(111)
-        ax_twin = ax.twinx()
-
-        # Plot data for each selected key
-        for key in selected_keys:
-            az_col = f"az_{key.lower()}"
-            el_col = f"el_{key.lower()}"
-            if az_col in data.columns and el_col in data.columns:
-                x_data = np.array(filtered_data["epoch_utc"].values)
-                y_data_az = np.array(filtered_data[az_col].values)
-                ax.scatter(
-                    x_data,
-                    y_data_az,
-                    label=f"{key} AZ",
-                    color=color_dict_az[key],
-                    marker=marker_dict_az[key],
-                )
-
-                y_data_el = np.array(filtered_data[el_col].values)
-                ax_twin.scatter(
-                    x_data,
-                    y_data_el,
-                    label=f"{key} EL",
-                    color=color_dict_el[key],
-                    marker=marker_dict_el[key],
-                )
-
-        # Format the plot
-        ax.set_title("Key Data as a Function of Time")
-        ax.set_xlabel("Time (UTC)")
-        ax.set_ylabel("AZ (Degree)")
-        ax.legend(loc="upper left")
-        ax.grid()
-        ax.tick_params(axis="x", rotation=45)
-        ax.set_xlim(mock_start_time, current_time)
-        # ax.set_ylim(0, 360)
-        ax_twin.set_ylabel("EL (Degree)")
-        ax_twin.legend(loc="upper right")
-        # ax_twin.set_ylim(-90, 90)
-
-        # Format the x-ticks so that the date and time are always displayed in the format "YYYY-MM-DD
-        # HH:MM:SS"
-        # ax.xaxis.set_major_formatter(
-        #     plt.FuncFormatter(
-        #         lambda x, _: time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(x))
-        #     )
-        # )
-        # Rotate the x-ticks for better readability
-        ax.tick_params(axis="x", rotation=0)
-        # fig.autofmt_xdate()
-
-        # Display at most 5 ticks on the x-axis
-        ax.xaxis.set_major_locator(plt.MaxNLocator(5))
-        # Save the plot to a file
-        fig.savefig("plot.png")
-        # Clear any existing plot in the canvas frame
-        for widget in plot_frame.winfo_children():
-            widget.destroy()
-
-        # Embed the figure in the Tkinter GUI
-        canvas = FigureCanvasTkAgg(fig, master=plot_frame)
-        canvas_widget = canvas.get_tk_widget()
-        canvas_widget.pack(fill="both", expand=True)
-        canvas.draw()
-
-    # except Exception as e:
-    #     # messagebox.showerror("Error", f"Failed to update plot: {e}")
-    #     print(e)
-    # pass
+# Runs on the Tk thread with the result of prepare_plot_data: only the new points are appended
+@profiler.timed("plot_draw")
+def draw_plot(result):
+    global stream_cursor
+    current_time, x_data, values, stream = result
+    live_plot.append(x_data, values)
+    if len(x_data):
+        plot_cursor.mark(x_data[-1])
+    if stream is not None:
+        stream_cursor, stream_times, stream_values = stream
+        live_plot.append(stream_times, stream_values)
+    live_plot.set_xlim(mock_start_time, current_time)
+    live_plot.draw()
 
 
 # Function to fetch and display data based on user inputs
 def fetch_data(event=None):
     try:
         # Determine the time input: user-specified or current UTC
-        if use_current_time.get():
-            input_time = datetime.datetime.now(datetime.timezone.utc)
-        else:
-            user_input = timestamp_input.get()
-            input_time = pd.to_datetime(user_input)
-            # Set the timezone to UTC
-            input_time = input_time.tz_localize("UTC")
-            if pd.isnull(input_time):
-                # Print that the input is null, so default to current time
-                messagebox.showwarning(
-                    "Warning",
-                    "Invalid timestamp. Defaulting to current UTC time.",
-                )
+        with profiler.stage("parse"):
+            if use_current_time.get():
                 input_time = datetime.datetime.now(datetime.timezone.utc)
+            else:
+                user_input = timestamp_input.get()
+                input_time = pd.to_datetime(user_input)
+                # Set the timezone to UTC
+                input_time = input_time.tz_localize("UTC")
+        if pd.isnull(input_time):
+            # Print that the input is null, so default to current time
+            messagebox.showwarning(
+                "Warning",
+                "Invalid timestamp. Defaulting to current UTC time.",
+            )
+            input_time = datetime.datetime.now(datetime.timezone.utc)
 
         # Get the dropdown selections
         display_option = dropdown_selection.get()
@@ -218,34 +280,6 @@ def fetch_data(event=None):
             )
             return
 
-        # Find the closest timestamp in the dataset
-        closest_idx = (data["epoch_utc"] - input_time).abs().idxmin()
-        row = data.iloc[closest_idx]
-
-        # Clear the table
-        for i in table.get_children():
-            table.delete(i)
-
-        # Adjust table columns dynamically based on the dropdown selection
-        if display_option == "AZ-EL":
-            table["columns"] = ("Target", "AZ", "EL")
-            table.heading("AZ", text="AZ")
-            table.heading("EL", text="EL")
-        elif display_option == "RA-Dec":
-            table["columns"] = ("Target", "RA", "Dec")
-            table.heading("RA", text="RA")
-            table.heading("Dec", text="Dec")
-        elif display_option == "Both":
-            table["columns"] = ("Target", "AZ", "EL", "RA", "Dec")
-            table.heading("AZ", text="AZ")
-            table.heading("EL", text="EL")
-            table.heading("RA", text="RA")
-            table.heading("Dec", text="Dec")
-
-        # Set the column width dynamically
-        for col in table["columns"]:
-            table.column(col, width=100, anchor="center")
-
         # Check which checkboxes are selected
         selected_keys = []
         for key, var in checkboxes.items():
@@ -253,76 +287,105 @@ def fetch_data(event=None):
                 selected_keys.append(key)
 
         if not selected_keys:
+            worker.cancel("table")
+            table_presenter.update([])
             messagebox.showwarning("Warning", "No keys selected.")
             return
 
-        # Prepare table data based on dropdown selection and selected keys
-        # Add row to the table with alternating row colors
-        for idx, key in enumerate(selected_keys):
-            az_col = f"az_{key.lower()}"
-            el_col = f"el_{key.lower()}"
-            ra_col = f"ra_{key.lower()}"
-            dec_col = f"dec_{key.lower()}"
-
-            az = round(row[az_col], sig_figs) if az_col in row.index else "N/A"
-            el = round(row[el_col], sig_figs) if el_col in row.index else "N/A"
-            ra = round(row[ra_col], sig_figs) if ra_col in row.index else "N/A"
-            dec = round(row[dec_col], sig_figs) if dec_col in row.index else "N/A"
-
-            # Convert to radians if selected
-            if angle_unit == "Radians":
-                az = round(np.radians(az), sig_figs) if az != "N/A" else "N/A"
-                el = round(np.radians(el), sig_figs) if el != "N/A" else "N/A"
-                ra = round(np.radians(ra), sig_figs) if ra != "N/A" else "N/A"
-                dec = round(np.radians(dec), sig_figs) if dec != "N/A" else "N/A"
-
-            # Determine row tag (evenrow or oddrow)
-            row_tag = "evenrow" if idx % 2 == 0 else "oddrow"
-
-            # Insert the row with the correct tag
-            if display_option == "AZ-EL":
-                table.insert("", "end", values=(key, az, el), tags=(row_tag,))
-            elif display_option == "RA-Dec":
-                table.insert("", "end", values=(key, ra, dec), tags=(row_tag,))
-            elif display_option == "Both":
-                table.insert("", "end", values=(key, az, el, ra, dec), tags=(row_tag,))
+        # The lookup and formatting run on the compute worker, a newer request replaces this one
+        worker.submit(
+            "table",
+            compute_table_rows,
+            input_time,
+            selected_keys,
+            display_option,
+            angle_unit,
+            sig_figs,
+            on_result=show_table_rows,
+            on_error=show_error,
+        )
+
+    except Exception as e:
+        messagebox.showerror("Error", str(e))
+
+
+# Runs on the compute worker: find the closest data and format the table rows
+def compute_table_rows(input_time, selected_keys, display_option, angle_unit, sig_figs):
+    # Find the closest timestamp in the dataset
+    with profiler.stage("lookup"):
+        row = engine.at(input_time).iloc[0]
+
+    # Prepare table data based on dropdown selection and selected keys, with alternating row
+    # colors. Values that round the same as an earlier row come from the cache
+    with profiler.stage("format"):
+        rows = table_formatter.rows(
+            row,
+            selected_keys,
+            display_option,
+            angle_unit,
+            sig_figs,
+        )
+    return display_option, rows, row["epoch_lexi"]
+
+
+# Runs on the Tk thread with the result of compute_table_rows
+@profiler.timed("table")
+def show_table_rows(result):
+    display_option, rows, closest_timestamp = result
+
+    # Adjust table columns based on the dropdown selection, only rebuilt when it changes
+    table_presenter.set_columns(DISPLAY_COLUMNS[display_option])
 
+    # Only the cells whose values changed are written to the table
+    if table_presenter.update(rows):
         # Adjust window size dynamically
-        num_rows = len(selected_keys)
-        window_height = 600 + min(
-            30 * num_rows, 400
-        )  # Base height + row-dependent height
+        num_rows = len(rows)
+        window_height = 600 + min(30 * num_rows, 400)  # Base height + row-dependent height
         root.geometry(f"800x{window_height}")
 
-        # Update the closest timestamp label
-        closest_timestamp_label.config(
-            text=f"Closest timestamp found: {row['epoch_utc']}"
-        )
+    # Update the closest timestamp label
+    closest_timestamp_label.config(text=f"Closest timestamp found: {closest_timestamp}")
 
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+
+def show_error(error):
+    messagebox.showerror("Error", str(error))
 
 
-# Function to update current time label and table periodically
-def periodic_update():
+# Function to update the current time label, the table and the plot. The scheduler runs it on
+# every tick while "Use Current Time" is checked, and once per burst of UI changes
+def refresh():
     if use_current_time.get():
         # Update the current UTC time label
         current_time_label.config(
             text=f"Current UTC Time: {datetime.datetime.now(datetime.timezone.utc):%Y-%m-%d %H:%M:%S}"
         )
-        # Refresh the table with the latest data
-        fetch_data()
+    # Refresh the table with the latest data
+    fetch_data()
+    # fetch_data already warns when no key is selected
+    if any(var.get() == 1 for var in checkboxes.values()):
         update_plot()
-        # Schedule the next update in 1000 ms (1 second)
-        root.after(1000, periodic_update)
+
+
+# Function to change the cadence of the live refresh, from the dropdown in seconds
+def set_refresh_interval(value):
+    scheduler.set_interval(float(value) * 1000)
+
+
+# Function to show the median stage timings of the refresh loop in the status line
+def show_profile():
+    profile_label.config(
+        text=f"{profiler.status_text()} | skipped ticks {scheduler.skipped_ticks}"
+    )
+    root.after(PROFILE_STATUS_INTERVAL_MS, show_profile)
 
 
 # Modify the toggle_current_time function to start or stop periodic updates
 def toggle_current_time():
     if use_current_time.get():
         timestamp_input_field.config(state=DISABLED)
-        periodic_update()  # Start periodic updates
+        scheduler.start()  # Start periodic updates
     else:
+        scheduler.stop()
         timestamp_input_field.config(state=NORMAL)
         current_time_label.config(text="")
 
@@ -335,8 +398,7 @@ def toggle_checkboxes():
     new_state = 0 if all_checked else 1
     for var in checkboxes.values():
         var.set(new_state)
-    fetch_data()  # Fetch data automatically
-    update_plot()  # Update the plot automatically
+    scheduler.request()  # Fetch data and update the plot automatically
 
 
 # Initialize the mock datetime class
@@ -352,6 +414,12 @@ root = Tk()
 root.title("LEXI Pointing Data Viewer")
 root.geometry("800x600")
 
+# Lookups and plot data run on a background thread, their results come back through root.after
+worker = ComputeWorker(root)
+worker.start()
+# Refreshes on wall-clock aligned ticks, and merges the refreshes asked for by the widgets
+scheduler = RefreshScheduler(root, refresh, REFRESH_INTERVAL_MS, profiler=profiler)
+
 # Set the font for the entire GUI
 root.option_add("*Font", "Helvetica 12")
 
@@ -381,6 +449,23 @@ plot_frame.grid(row=2, column=0, columnspan=2, sticky="nsew")
 # Configure row weights for the plot frame
 root.grid_rowconfigure(2, weight=1)
 
+# The figure, axes and canvas are created once, every tick only appends the new points
+live_plot = LivePlot(plot_frame, figsize=(8, 4), dpi=100, profiler=profiler)
+ax = live_plot.ax
+# Format the plot
+ax.set_title("Key Data as a Function of Time")
+ax.set_xlabel("Time (UTC)")
+ax.set_ylabel("AZ (Degree)")
+ax.grid()
+# Rotate the x-ticks for better readability
+ax.tick_params(axis="x", rotation=0)
+# Display at most 5 ticks on the x-axis
+ax.xaxis.set_major_locator(plt.MaxNLocator(5))
+live_plot.ax_twin.set_ylabel("EL (Degree)")
+# Save the plot to a file, without ever making the display wait on it
+snapshot_writer = SnapshotWriter(SNAPSHOT_FILE, interval=SNAPSHOT_INTERVAL_S, profiler=profiler)
+snapshot_writer.attach(live_plot.canvas)
+
 
 # Input field for timestamp
 Label(left_frame, text="Enter Timestamp (YYYY-MM-DD HH:MM:SS):").grid(
@@ -426,7 +511,7 @@ Label(left_frame, text="Select Data to Display:").grid(
 )
 dropdown_selection = StringVar(value="AZ-EL")
 dropdown_menu = OptionMenu(
-    right_frame, dropdown_selection, "AZ-EL", "RA-Dec", "Both", command=fetch_data
+    right_frame, dropdown_selection, "AZ-EL", "RA-Dec", "Both", command=scheduler.request
 )
 dropdown_menu.grid(row=right_row + 4, column=1, sticky="E", padx=5, pady=5)
 
@@ -436,7 +521,7 @@ Label(left_frame, text="Select Angle Unit:").grid(
 )
 angle_unit_selection = StringVar(value="Degree")
 OptionMenu(
-    right_frame, angle_unit_selection, "Degree", "Radians", command=fetch_data
+    right_frame, angle_unit_selection, "Degree", "Radians", command=scheduler.request
 ).grid(row=right_row + 5, column=1, sticky="e", padx=5, pady=5)
 
 # Checkboxes for keys
@@ -452,7 +537,7 @@ for i, key in enumerate(keys):
     var = IntVar()
     checkboxes[key] = var
     # Place the checkbox in the second column (column=1) with its label on the left side
-    cb = Checkbutton(right_frame, text=key, variable=var, command=fetch_data)
+    cb = Checkbutton(right_frame, text=key, variable=var, command=scheduler.request)
     # Place the checkbox with the label in the second column, aligned to the left by default
     cb.grid(row=right_row + 6 + i, column=1, sticky="E", padx=5, pady=5)
 
@@ -468,8 +553,17 @@ Button(left_frame, text="Check/Uncheck All", command=toggle_checkboxes).grid(
     row=left_row + 7, column=0, sticky="w", padx=5, pady=5
 )
 
+# Dropdown menu for the cadence of the live refresh
+Label(left_frame, text="Refresh Interval (s):").grid(
+    row=left_row + 8, column=0, sticky="w", padx=5, pady=5
+)
+refresh_interval_selection = StringVar(value=f"{REFRESH_INTERVAL_MS / 1000:g}")
+OptionMenu(
+    left_frame, refresh_interval_selection, *REFRESH_INTERVALS_S, command=set_refresh_interval
+).grid(row=left_row + 8, column=1, sticky="w", padx=5, pady=5)
+
 # Fetch button
-Button(left_frame, text="Fetch Data", command=fetch_data, fg="green").grid(
+Button(left_frame, text="Fetch Data", command=scheduler.request, fg="green").grid(
     row=left_row + 9,
     column=0,
     sticky="w",
@@ -522,14 +616,12 @@ table = ttk.Treeview(
 )
 
 table.pack(side="left", fill="both", expand=True)
+# Keeps one persistent item per target and only rewrites changed cells
+table_presenter = TablePresenter(table)
 # Set custom tag styles for alternating row colors
 table.tag_configure("evenrow", background="#b1babf")
 table.tag_configure("oddrow", background="#f7f0f0")
 
-# Get the columns in the table
-columns = table["columns"]
-
-print(columns)
 # Add scrollbars
 vsb = Scrollbar(table_frame, orient=VERTICAL, command=table.yview)
 vsb.pack(side="right", fill="y")
@@ -539,13 +631,18 @@ hsb.pack(side="bottom", fill="x")
 table.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
 
 # Add a button above quit button to clear the table
-Button(
-    left_frame, text="Clear Table", command=lambda: table.delete(*table.get_children())
-).grid(row=left_row + 10, column=0, sticky="w", padx=5, pady=10)
+Button(left_frame, text="Clear Table", command=table_presenter.clear).grid(
+    row=left_row + 10, column=0, sticky="w", padx=5, pady=10
+)
 # Quit button
 Button(left_frame, text="Quit", command=root.destroy, fg="red").grid(
     row=left_row + 11, column=0, sticky="w", padx=5, pady=10
 )
 
+# Status line with the median time of every stage of the refresh loop
+profile_label = Label(root, text="", fg="gray", anchor="w")
+profile_label.grid(row=3, column=0, columnspan=2, sticky="ew", padx=10)
+root.after(PROFILE_STATUS_INTERVAL_MS, show_profile)
+
 # Run the tkinter event loop
 root.mainloop()
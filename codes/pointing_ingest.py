@@ -0,0 +1,433 @@
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from grafana_csv import iter_grafana_blocks, parse_grafana_rows
+from table_cache import load_table, save_table
+from time_index import TimeIndex, merge_column
+
+POINTING_FILE_PATTERN = "../data/LEXI_gimbal_pointing_values/LEXI_Pointing_Measured*.csv"
+POINTING_COLUMNS = ["epoch_utc", "dec_lexi", "ra_lexi"]
+# A poll only uses worker processes when it has at least this many bytes to parse
+PARALLEL_MIN_BYTES = 8 << 20
+# Rows read at a time by the streaming readers
+DEFAULT_CHUNK_SIZE = 100_000
+# Typical size of one export row ("2025-03-03 23:08:08,-21.1 °,-136 °"), to size the reads
+POINTING_ROW_BYTES = 40
+# A file untouched for this long is complete, even if its last row has no line break
+SETTLE_SECONDS = 2.0
+# File next to a saved ingestor table holding the per-file offsets it was built from
+INGESTOR_STATE_FILE = "ingestor.json"
+
+
+def _pointing_arrays(epochs_ns, values):
+    """
+    Split the parsed values of a LEXI_Pointing_Measured export into (epochs_ns, dec, ra).
+    """
+    return epochs_ns, values[:, 0].copy(), values[:, 1].copy()
+
+
+def parse_pointing_rows(data):
+    """
+    Parse the bytes of complete LEXI_Pointing_Measured rows (time, dec and ra with a degree
+    suffix) into epoch nanoseconds, dec and ra arrays. A leading "sep=," and header line are
+    skipped.
+    """
+    return _pointing_arrays(*parse_grafana_rows(data, len(POINTING_COLUMNS) - 1))
+
+
+def load_pointing_file(file):
+    """
+    Parse a whole LEXI_Pointing_Measured export into compact (epochs_ns, dec, ra) arrays.
+    """
+    with open(file, "rb") as f:
+        return parse_pointing_rows(f.read())
+
+
+def map_files(func, jobs, processes=None):
+    """
+    Return [func(*job) for job in jobs], spread over a pool of worker processes. processes=None
+    uses every core, processes=1 (or a single job) runs in this process. func and its results
+    must be picklable, so workers should return plain arrays rather than DataFrames.
+    """
+    jobs = list(jobs)
+    processes = os.cpu_count() if processes is None else processes
+    processes = min(processes, len(jobs))
+    if processes <= 1:
+        return [func(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(func, *zip(*jobs)))
+
+
+def load_pointing_files(files, processes=None):
+    """
+    Parse many exports in parallel, one file per worker task, and merge the results into single
+    time-sorted (epochs_ns, dec, ra) arrays.
+    """
+    results = map_files(load_pointing_file, [(file,) for file in files], processes)
+    if not results:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    epochs_ns, dec, ra = (np.concatenate(column) for column in zip(*results))
+    order = np.argsort(epochs_ns, kind="stable")
+    return epochs_ns[order], dec[order], ra[order]
+
+
+class PointingTable:
+    """
+    In-memory LEXI pointing samples (epoch, dec, ra) kept sorted by a TimeIndex.
+    """
+
+    def __init__(self):
+        self.index = TimeIndex(np.empty(0, dtype=np.int64))
+        self.dec_lexi = np.empty(0, dtype=np.float64)
+        self.ra_lexi = np.empty(0, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.index)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Build a table from a DataFrame with a DatetimeIndex and dec_lexi/ra_lexi columns.
+        """
+        table = cls()
+        table.merge(df.index, df["dec_lexi"].to_numpy(), df["ra_lexi"].to_numpy())
+        return table
+
+    @classmethod
+    def from_arrays(cls, epochs_ns, dec, ra):
+        """
+        Wrap sorted epoch, dec and ra arrays in a table without copying them.
+        """
+        table = cls()
+        table.index = TimeIndex(epochs_ns, assume_sorted=True)
+        table.dec_lexi = dec
+        table.ra_lexi = ra
+        return table
+
+    def merge(self, epochs_ns, dec, ra):
+        """
+        Merge a batch of samples, in any order, into the sorted table. Returns the (order,
+        positions) pair of TimeIndex.extend, to merge columns kept alongside the table.
+        """
+        order, positions = self.index.extend(epochs_ns)
+        self.dec_lexi = merge_column(self.dec_lexi, dec, order, positions)
+        self.ra_lexi = merge_column(self.ra_lexi, ra, order, positions)
+        return order, positions
+
+    def to_dataframe(self):
+        """
+        Return the table as a DataFrame indexed by a UTC epoch_utc column.
+        """
+        epochs = pd.to_datetime(self.index.epochs_ns, utc=True)
+        return pd.DataFrame(
+            {"dec_lexi": self.dec_lexi, "ra_lexi": self.ra_lexi},
+            index=pd.DatetimeIndex(epochs, name="epoch_utc"),
+        )
+
+
+class PointingIngestor:
+    """
+    Tail the LEXI_Pointing_Measured exports and merge only new files or newly appended rows.
+
+    For every file it remembers the byte offset of the last complete row it consumed along with the
+    file size and mtime, so each poll only stats the files and reads the bytes that were added
+    since the previous one. A file that shrinks, or that changed without growing, is treated as
+    rewritten: its rows are taken out of the table and it is read again from the top.
+    The exports do not end with a line break, so a trailing row without one is only consumed once
+    the file has not been modified for SETTLE_SECONDS. save and restore carry the table and this
+    state over to the next run, so a restart only reads what was appended in between.
+    """
+
+    def __init__(self, pattern=POINTING_FILE_PATTERN, table=None, processes=1):
+        self.pattern = pattern
+        self.table = PointingTable() if table is None else table
+        # Worker processes used to parse the files of one poll, None for every core
+        self.processes = processes
+        # File path -> {"offset": bytes consumed, "size": bytes, "mtime_ns": last seen mtime,
+        # "source": number of the file}
+        self.files = {}
+        # Number of the file every row of the table comes from
+        self.sources = np.empty(0, dtype=np.int32)
+
+    def poll(self):
+        """
+        Check the export directory once and merge any new rows into the table.
+        Returns the number of rows merged.
+        """
+        jobs = []
+        stats = {}
+        for file in sorted(glob.glob(self.pattern)):
+            stat = os.stat(file)
+            state = self.files.get(file)
+            if state is None:
+                offset = 0
+            elif stat.st_size > state["offset"]:
+                offset = state["offset"]
+            elif stat.st_size == state["offset"] and stat.st_mtime_ns == state["mtime_ns"]:
+                continue
+            else:
+                # Rewritten: shorter than what was read, or the same size with a new mtime
+                offset = 0
+
+            settled = time.time() - stat.st_mtime_ns / 1e9 >= SETTLE_SECONDS
+            if state is not None and not settled and stat.st_mtime_ns == state["mtime_ns"]:
+                continue
+            jobs.append((file, offset, settled))
+            stats[file] = stat
+
+        # Only a large backlog (e.g. the first poll over the whole archive) is worth a pool
+        n_bytes = sum(stats[file].st_size - offset for file, offset, _ in jobs)
+        processes = self.processes if n_bytes >= PARALLEL_MIN_BYTES else 1
+        results = map_files(self._read_from, jobs, processes)
+
+        new_rows = 0
+        for (file, start, _), (epochs_ns, dec, ra, offset) in zip(jobs, results):
+            state = self.files.get(file)
+            source = len(self.files) if state is None else state["source"]
+            if state is not None and start == 0:
+                self._drop(source)
+            if epochs_ns.size:
+                order, positions = self.table.merge(epochs_ns, dec, ra)
+                file_sources = np.full(epochs_ns.size, source, dtype=np.int32)
+                self.sources = merge_column(self.sources, file_sources, order, positions)
+                new_rows += epochs_ns.size
+
+            self.files[file] = {
+                "offset": offset,
+                "size": stats[file].st_size,
+                "mtime_ns": stats[file].st_mtime_ns,
+                "source": source,
+            }
+        return new_rows
+
+    def _drop(self, source):
+        """
+        Take the rows read from one file out of the table.
+        """
+        keep = self.sources != source
+        if keep.all():
+            return
+        table = self.table
+        self.table = PointingTable.from_arrays(
+            table.index.epochs_ns[keep], table.dec_lexi[keep], table.ra_lexi[keep]
+        )
+        self.sources = self.sources[keep]
+
+    def save(self, path):
+        """
+        Write the table and the per-file state to a cache directory, for restore in a later run.
+        """
+        df = self.table.to_dataframe()
+        df["source"] = self.sources
+        save_table(df, path, key=os.path.abspath(self.pattern))
+        with open(os.path.join(path, INGESTOR_STATE_FILE), "w") as f:
+            json.dump(self.files, f)
+
+    def restore(self, path):
+        """
+        Take the table and the per-file state saved by an earlier run, so the next poll only reads
+        the bytes appended since. Returns False, restoring nothing, when there is no such save or a
+        file it consumed has since disappeared or shrunk.
+        """
+        state_file = os.path.join(path, INGESTOR_STATE_FILE)
+        df = load_table(path, key=os.path.abspath(self.pattern))
+        if df is None or "source" not in df or not os.path.isfile(state_file):
+            return False
+        with open(state_file) as f:
+            files = json.load(f)
+
+        current = set(glob.glob(self.pattern))
+        for file, state in files.items():
+            if file not in current or os.stat(file).st_size < state["offset"]:
+                return False
+
+        self.table = PointingTable.from_arrays(
+            df.index.as_unit("ns").asi8, df["dec_lexi"].to_numpy(), df["ra_lexi"].to_numpy()
+        )
+        self.sources = np.array(df["source"], dtype=np.int32)
+        self.files = files
+        return True
+
+    @staticmethod
+    def _read_from(file, offset, settled):
+        """
+        Read the complete rows that follow the byte offset. Unless the file has settled, a trailing
+        row without a line break is left for the next poll. Returns the parsed arrays and the new
+        offset.
+        """
+        with open(file, "rb") as f:
+            f.seek(offset)
+            chunk = f.read()
+
+        # Only consume up to the last line break while the writer may still be mid-row
+        end = len(chunk) if settled else chunk.rfind(b"\n") + 1
+        chunk = chunk[:end]
+        new_offset = offset + end
+
+        # The first read also holds the "sep=," preamble and the header, which the parser skips
+        epochs_ns, dec, ra = parse_pointing_rows(chunk)
+        return epochs_ns, dec, ra, new_offset
+
+
+def read_pointing_chunks(file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the samples of one LEXI_Pointing_Measured export as (epochs_ns, dec, ra) chunks of at
+    most chunk_size rows, in file order.
+    """
+    epochs_ns = np.empty(0, dtype=np.int64)
+    values = np.empty((0, len(POINTING_COLUMNS) - 1))
+    for block_ns, block_values in iter_grafana_blocks(file, chunk_size * POINTING_ROW_BYTES):
+        # Rows left over from the previous block start the next chunk
+        epochs_ns = np.concatenate([epochs_ns, block_ns])
+        values = np.concatenate([values, block_values])
+        n_full = epochs_ns.size - epochs_ns.size % chunk_size
+        for start in range(0, n_full, chunk_size):
+            stop = start + chunk_size
+            yield _pointing_arrays(epochs_ns[start:stop], values[start:stop])
+        epochs_ns, values = epochs_ns[n_full:], values[n_full:]
+    if epochs_ns.size:
+        yield _pointing_arrays(epochs_ns, values)
+
+
+def _first_epoch_ns(file):
+    """
+    Epoch of the first sample of an export, or None if it has no samples.
+    """
+    epochs_ns, _, _ = next(read_pointing_chunks(file, chunk_size=1), (np.empty(0),) * 3)
+    return int(epochs_ns[0]) if epochs_ns.size else None
+
+
+class _ExportReader:
+    """
+    Chunk iterator over one export that remembers the last epoch it has read.
+    """
+
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunks = read_pointing_chunks(file, chunk_size)
+        self.last_ns = None
+
+    def read(self):
+        """
+        Return the next chunk, or None when the file is exhausted.
+        """
+        for epochs_ns, dec, ra in self.chunks:
+            if epochs_ns.size == 0:
+                continue
+            if np.any(np.diff(epochs_ns) < 0) or (
+                self.last_ns is not None and epochs_ns[0] < self.last_ns
+            ):
+                raise ValueError(f"{self.file} is not in time order.")
+            self.last_ns = int(epochs_ns[-1])
+            return epochs_ns, dec, ra
+        return None
+
+
+def iter_pointing_chunks(files, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the samples of many exports as globally time-ordered (epochs_ns, dec, ra) chunks,
+    reading every file chunk by chunk.
+
+    The exports may overlap in time, so this is a k-way merge: the files are opened in order of
+    their first sample, the chunks read so far are buffered, and only the samples that no open or
+    unopened file can still precede are emitted, in chunks of at most chunk_size rows. Every file
+    must be in time order on its own. Peak memory is about chunk_size rows per export that
+    overlaps the current time, independent of the total number of rows.
+    """
+    pending = sorted(
+        (start, file) for file in files if (start := _first_epoch_ns(file)) is not None
+    )
+    pending.reverse()
+    readers = []
+    buffer = (np.empty(0, dtype=np.int64), np.empty(0), np.empty(0))
+
+    def add(chunk):
+        nonlocal buffer
+        buffer = tuple(np.concatenate([old, new]) for old, new in zip(buffer, chunk))
+
+    while pending or readers:
+        # Open every export that starts before the position of all the open ones
+        while pending and (not readers or pending[-1][0] <= min(r.last_ns for r in readers)):
+            reader = _ExportReader(pending.pop()[1], chunk_size)
+            chunk = reader.read()
+            if chunk is not None:
+                add(chunk)
+                readers.append(reader)
+
+        # Samples up to the watermark cannot be preceded by anything still unread
+        watermark = min((r.last_ns for r in readers), default=np.iinfo(np.int64).max)
+        if pending:
+            watermark = min(watermark, pending[-1][0] - 1)
+        order = np.argsort(buffer[0], kind="stable")
+        buffer = tuple(column[order] for column in buffer)
+        n_ready = int(np.searchsorted(buffer[0], watermark, side="right"))
+        # Overlapping exports can make more than chunk_size rows ready at once
+        for start in range(0, n_ready, chunk_size):
+            yield tuple(column[start:min(start + chunk_size, n_ready)] for column in buffer)
+        buffer = tuple(column[n_ready:] for column in buffer)
+
+        # Advance the export that is furthest behind
+        if readers:
+            reader = min(readers, key=lambda r: r.last_ns)
+            chunk = reader.read()
+            if chunk is None:
+                readers.remove(reader)
+            else:
+                add(chunk)
+
+    for start in range(0, buffer[0].size, chunk_size):
+        yield tuple(column[start:start + chunk_size] for column in buffer)
+
+
+def resample_pointing(chunks, freq="1min"):
+    """
+    Streaming form of DataFrame.resample(freq).mean().interpolate() over time-ordered
+    (epochs_ns, dec, ra) chunks: yields (bin_epochs_ns, dec, ra) with the mean of every bin and
+    linear interpolation across empty bins. Bins are aligned to the Unix epoch, which matches
+    pandas for frequencies that divide a day. Only the bin that is still open and the last
+    finished one are carried between chunks.
+    """
+    freq_ns = pd.Timedelta(freq).value
+    # [bin id, dec sum, ra sum, count] of the last bin seen, which the next chunk may continue
+    open_bin = None
+    # (bin id, dec, ra) of the last emitted bin, the left end of a gap that spans two chunks
+    last_bin = None
+
+    def finish(ids, dec, ra):
+        nonlocal last_bin
+        if last_bin is not None:
+            ids, dec, ra = np.r_[last_bin[0], ids], np.r_[last_bin[1], dec], np.r_[last_bin[2], ra]
+        start = ids[0] if last_bin is None else ids[0] + 1
+        all_ids = np.arange(start, ids[-1] + 1)
+        last_bin = (ids[-1], dec[-1], ra[-1])
+        return all_ids * freq_ns, np.interp(all_ids, ids, dec), np.interp(all_ids, ids, ra)
+
+    for epochs_ns, dec, ra in chunks:
+        if epochs_ns.size == 0:
+            continue
+        ids, starts = np.unique(epochs_ns // freq_ns, return_index=True)
+        sums = [
+            np.add.reduceat(dec, starts),
+            np.add.reduceat(ra, starts),
+            np.diff(np.r_[starts, epochs_ns.size]).astype(np.float64),
+        ]
+        if open_bin is not None:
+            if open_bin[0] == ids[0]:
+                for column, carried in zip(sums, open_bin[1:]):
+                    column[0] += carried
+            else:
+                ids = np.r_[open_bin[0], ids]
+                sums = [np.r_[carried, column] for column, carried in zip(sums, open_bin[1:])]
+        dec_sum, ra_sum, count = sums
+        open_bin = [ids[-1], dec_sum[-1], ra_sum[-1], count[-1]]
+        if ids.size > 1:
+            yield finish(ids[:-1], dec_sum[:-1] / count[:-1], ra_sum[:-1] / count[:-1])
+
+    if open_bin is not None:
+        bin_id, dec_sum, ra_sum, count = open_bin
+        yield finish(np.r_[bin_id], np.r_[dec_sum / count], np.r_[ra_sum / count])
@@ -0,0 +1,133 @@
+import math
+import time
+
+
+class RefreshScheduler:
+    """
+    Run a refresh function on the Tk thread at a fixed cadence, on wall-clock aligned deadlines.
+
+    The deadlines are the multiples of the interval since the epoch (every whole second at 1000 ms),
+    and every timer is armed for the time left to the next deadline, so the time a refresh takes
+    never shifts the following ones. A refresh that overruns one or more deadlines does not queue
+    up catch-up runs: the missed deadlines are counted in skipped_ticks and the next refresh runs
+    on the next deadline still ahead.
+
+    UI callbacks (checkboxes, dropdowns, buttons) call request() instead of refreshing directly.
+    All the requests made until Tk is next idle, i.e. within one batch of events, are merged into
+    a single refresh, and a request still waiting when a timed refresh runs is covered by it.
+
+    With a profiler (instrumentation.RefreshProfiler), every timed refresh is recorded as a "tick"
+    and timed as the "refresh" stage.
+    """
+
+    def __init__(self, root, refresh, interval_ms=1000, profiler=None):
+        self.root = root
+        self.refresh = refresh
+        self.profiler = profiler
+        self.skipped_ticks = 0
+        self.coalesced_requests = 0
+        self._interval_s = None
+        # Deadline of the armed timer, as a number of intervals since the epoch
+        self._tick = None
+        self._timer_id = None
+        self._request_id = None
+        self.set_interval(interval_ms)
+
+    @property
+    def interval_ms(self):
+        return self._interval_s * 1000
+
+    @property
+    def running(self):
+        return self._timer_id is not None
+
+    def set_interval(self, interval_ms):
+        """
+        Change the cadence. A running scheduler moves to the deadlines of the new interval.
+        """
+        interval_ms = float(interval_ms)
+        if interval_ms <= 0:
+            raise ValueError(f"The refresh interval must be positive, got {interval_ms} ms.")
+        self._interval_s = interval_ms / 1000
+        if self.running:
+            self.stop()
+            self.start(refresh_now=False)
+
+    def start(self, refresh_now=True):
+        """
+        Start the timed refreshes, by default with one refresh right away.
+        """
+        if self.running:
+            return
+        if self.profiler is not None:
+            # The time the scheduler was stopped is not a tick interval
+            self.profiler.restart_tick("tick")
+        if refresh_now:
+            self._run()
+        self._arm(math.floor(time.time() / self._interval_s) + 1)
+
+    def stop(self):
+        """
+        Stop the timed refreshes. Requests made with request() still run.
+        """
+        if self._timer_id is not None:
+            self.root.after_cancel(self._timer_id)
+            self._timer_id = None
+
+    def request(self, *_):
+        """
+        Ask for a refresh as soon as Tk is idle. Takes and ignores any arguments, so it can be
+        used directly as a widget command (OptionMenu passes the selected value).
+        """
+        if self._request_id is not None:
+            self.coalesced_requests += 1
+            return
+        self._request_id = self.root.after_idle(self._on_request)
+
+    def _arm(self, tick):
+        self._tick = tick
+        # Rounded up, so the refresh never runs before its deadline (e.g. showing the last second)
+        delay_ms = max(0, math.ceil((tick * self._interval_s - time.time()) * 1000))
+        self._timer_id = self.root.after(delay_ms, self._on_timer)
+
+    def _on_timer(self):
+        if time.time() < self._tick * self._interval_s:
+            # Tk's timers do not follow the wall clock exactly, wait for the rest
+            self._arm(self._tick)
+            return
+
+        if self.profiler is not None:
+            self.profiler.tick("tick", period=self._interval_s)
+        timer_id = self._timer_id
+        try:
+            self._run()
+        finally:
+            # An error does not end the timed refreshes, unless the refresh stopped or restarted
+            # the scheduler itself
+            if self._timer_id == timer_id:
+                self._arm_next()
+
+    def _arm_next(self):
+        # Worked out after the refresh, so the deadlines it overran are skipped, not run back to
+        # back. A wall clock set back by more than an interval starts the deadlines over.
+        current = math.floor(time.time() / self._interval_s)
+        if current < self._tick - 1:
+            self._arm(current + 1)
+            return
+        self.skipped_ticks += max(0, current - self._tick)
+        self._arm(max(current, self._tick) + 1)
+
+    def _on_request(self):
+        self._request_id = None
+        self.refresh()
+
+    def _run(self):
+        # The timed refresh covers a request that has not run yet
+        if self._request_id is not None:
+            self.root.after_cancel(self._request_id)
+            self._request_id = None
+        if self.profiler is None:
+            self.refresh()
+            return
+        with self.profiler.stage("refresh"):
+            self.refresh()
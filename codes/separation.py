@@ -0,0 +1,65 @@
+import numpy as np
+
+
+def radec_to_unit_vectors(ra, dec, dtype=np.float64):
+    """
+    Convert RA/Dec in degrees to Cartesian unit vectors. The output has a leading axis of length 3
+    (x, y, z) followed by the broadcast shape of ra and dec.
+    """
+    ra_rad = np.radians(np.asarray(ra, dtype=dtype))
+    dec_rad = np.radians(np.asarray(dec, dtype=dtype))
+    ra_rad, dec_rad = np.broadcast_arrays(ra_rad, dec_rad)
+    cos_dec = np.cos(dec_rad)
+    return np.stack([cos_dec * np.cos(ra_rad), cos_dec * np.sin(ra_rad), np.sin(dec_rad)])
+
+
+def vector_separation(vectors1, vectors2):
+    """
+    Angle in degrees between unit vectors laid out as (3, ...), broadcast over the other axes.
+
+    Uses atan2(|a x b|, a . b), which keeps full precision for small and near-180° separations,
+    unlike the arccos of the spherical law of cosines.
+    """
+    x1, y1, z1 = vectors1
+    x2, y2, z2 = vectors2
+    cross_x = y1 * z2 - z1 * y2
+    cross_y = z1 * x2 - x1 * z2
+    cross_z = x1 * y2 - y1 * x2
+    sin_theta = np.sqrt(cross_x * cross_x + cross_y * cross_y + cross_z * cross_z)
+    cos_theta = x1 * x2 + y1 * y2 + z1 * z2
+    return np.degrees(np.arctan2(sin_theta, cos_theta))
+
+
+class SeparationKernel:
+    """
+    Angular separation of many targets from one look direction, computed in a single pass.
+
+    The target unit vectors are converted once, when the kernel is built, and reused for every
+    call. Targets are given as arrays of shape (n_targets, n_times), or (n_targets,) for fixed
+    targets. Use dtype=np.float32 to halve the memory of large batches at about 1e-4 degree
+    precision.
+    """
+
+    def __init__(self, target_ra, target_dec, dtype=np.float64):
+        self.dtype = dtype
+        target_vectors = radec_to_unit_vectors(target_ra, target_dec, dtype=dtype)
+        if target_vectors.ndim == 2:
+            # Fixed targets apply to every look direction
+            target_vectors = target_vectors[:, :, np.newaxis]
+        self.target_vectors = target_vectors
+
+    def separations(self, ra, dec):
+        """
+        Return the separation in degrees of every target from the look direction (ra, dec), with
+        shape (n_targets, n_times).
+        """
+        look_vectors = radec_to_unit_vectors(np.atleast_1d(ra), np.atleast_1d(dec), self.dtype)
+        return vector_separation(self.target_vectors, look_vectors[:, np.newaxis, :])
+
+
+def separation_matrix(target_ra, target_dec, ra, dec, dtype=np.float64):
+    """
+    One-shot form of SeparationKernel: the (n_targets, n_times) separations of all targets from
+    the look direction.
+    """
+    return SeparationKernel(target_ra, target_dec, dtype=dtype).separations(ra, dec)
@@ -0,0 +1,456 @@
+"""
+Publish the look direction tables in shared memory, for every viewer on the host to map.
+
+Each viewer process (look_direction.py, main_plot.py, a notebook) otherwise parses and keeps a
+private copy of the ephemeris and of the merged LEXI pointing. With a publisher running, the
+fitted ephemeris coefficients, the 1-minute pointing table and the live telemetry table each sit
+once in a multiprocessing.shared_memory segment, and SharedLookDirectionEngine maps them as
+read-only NumPy views: a new viewer starts without reading or fitting anything, and adding viewers
+does not add copies of the data. Viewers use it when LEXI_SHARED_TABLE is set to the table name.
+
+Layout. A header segment "<name>_header" starts with two little-endian uint64, a sequence number
+and the length of the JSON schema that follows. The schema lists every dataset: the segment
+holding it, the dtype, shape and byte offset of each of its arrays, and attributes (the ephemeris
+column names, ...). The publisher makes the sequence odd while it rewrites the schema and even
+again once done, and readers retry until they read the same even sequence before and after the
+schema. The sequence divided by two is the version: it changes with every update, so a reader
+finds out about new data by reading one integer.
+
+Arrays are never modified once published. The live table is published with spare rows, and
+telemetry that only adds later samples is written after the published rows with only the row
+count going up in the schema; anything else, or running out of spare rows, goes to a new segment
+and the old one is unlinked as soon as the new schema is written. A reader keeps the segments it
+mapped until it drops its views, so it can finish with the old data while it moves to the new one;
+a reader that read the old schema but had not mapped the segment yet reads the schema again.
+
+    python shared_table.py publish
+    LEXI_SHARED_TABLE=lexi_look_direction python look_direction.py
+    python shared_table.py info
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+from ephemeris import EphemerisInterpolator
+from look_direction_engine import LIVE_POINTING_TOLERANCE, LookDirectionEngine
+from pointing_ingest import PointingTable
+
+DEFAULT_NAME = "lexi_look_direction"
+# Environment variable naming the shared table the viewers should use instead of loading the data
+SHARED_TABLE_ENV = "LEXI_SHARED_TABLE"
+# Sequence number and schema length at the start of the header segment
+HEADER_PREFIX = struct.Struct("<QQ")
+# Size of the header segment, the schema must fit in it
+HEADER_SIZE = 1 << 16
+# Byte alignment of every array within a segment
+ALIGNMENT = 64
+# Spare rows given to the live table when it is (re)published, as a fraction of its rows
+DEFAULT_HEADROOM = 0.5
+# Minimum spare rows of the live table, so a small table does not move on every refresh
+MIN_SPARE_ROWS = 1 << 16
+DEFAULT_REFRESH_INTERVAL_S = 5.0
+
+# Segments created by the publishers of this process, which the resource tracker must keep tracking
+_created = set()
+
+
+class _AttachedSegment(shared_memory.SharedMemory):
+    """
+    A segment mapped by a reader. The mapping is released with the last NumPy view of it rather
+    than by close(), which would fail while views exist, so views can outlive the segment object.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        if os.name == "posix":
+            if self._name not in _created:
+                # Before Python 3.13, attaching also registers the segment with the resource
+                # tracker, which would unlink the publisher's segment when this process exits
+                resource_tracker.unregister(self._name, "shared_memory")
+            # The mapping does not need the descriptor
+            os.close(self._fd)
+            self._fd = -1
+
+    def __del__(self):
+        pass
+
+
+def _table_arrays(table):
+    # The arrays of a PointingTable as published
+    return {"epochs_ns": table.index.epochs_ns, "dec_lexi": table.dec_lexi, "ra_lexi": table.ra_lexi}
+
+
+def _table_columns(arrays):
+    # The published arrays of a table as PointingTable.from_arrays arguments
+    return {"epochs_ns": arrays["epochs_ns"], "dec": arrays["dec_lexi"], "ra": arrays["ra_lexi"]}
+
+
+def _view(segment, spec, rows=None):
+    shape = list(spec["shape"])
+    if rows is not None:
+        shape[0] = rows
+    return np.ndarray(shape, dtype=spec["dtype"], buffer=segment.buf, offset=spec["offset"])
+
+
+def _create(name, size):
+    segment = shared_memory.SharedMemory(name, create=True, size=size)
+    _created.add(segment._name)
+    return segment
+
+
+class SharedTablePublisher:
+    """
+    Owner of the shared segments of one table name. Datasets are dicts of arrays; publish()
+    replaces a dataset, append() adds rows to one in place when they fit. The segments are
+    unlinked by close(), or by the resource tracker if the process dies.
+    """
+
+    def __init__(self, name=DEFAULT_NAME):
+        self.name = name
+        self._sequence = 0
+        self._generation = 0
+        # Dataset -> (segment, schema entry)
+        self._datasets = {}
+        # Replaced segments, unlinked right after the next header write stops listing them. A
+        # reader that read the older schema but had not mapped them yet reads the schema again
+        self._retired = []
+        self._header = _create(f"{name}_header", HEADER_SIZE)
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    @property
+    def version(self):
+        return self._sequence // 2
+
+    def publish(self, dataset, arrays, attrs=None, headroom=0.0):
+        """
+        Copy arrays (name -> array) to a new segment and make them the dataset. With headroom,
+        room is left for that fraction more rows (first axis), at least MIN_SPARE_ROWS, for
+        append().
+        """
+        self._store(dataset, arrays, attrs, headroom)
+        self._write_header()
+
+    def append(self, dataset, arrays):
+        """
+        Write rows after the published rows of every array of the dataset, in place. Returns
+        False, changing nothing, when they do not fit in the spare rows.
+        """
+        segment, entry = self._datasets[dataset]
+        specs = entry["arrays"]
+        if set(arrays) != set(specs):
+            raise ValueError(f"Expected the arrays {sorted(specs)} for {dataset!r}.")
+        for name, array in arrays.items():
+            if specs[name]["shape"][0] + len(array) > specs[name]["capacity"]:
+                return False
+        for name, array in arrays.items():
+            spec = specs[name]
+            rows = spec["shape"][0]
+            _view(segment, spec, spec["capacity"])[rows : rows + len(array)] = array
+            # Readers only see the new rows once the header says so
+            spec["shape"][0] = rows + len(array)
+        self._write_header()
+        return True
+
+    def publish_table(self, dataset, table, headroom=DEFAULT_HEADROOM):
+        """
+        Publish a PointingTable as the dataset. When the table only gained samples after the
+        published ones, they are appended in place if they fit.
+        """
+        arrays = _table_arrays(table)
+        if dataset in self._datasets:
+            segment, entry = self._datasets[dataset]
+            spec = entry["arrays"]["epochs_ns"]
+            rows = spec["shape"][0]
+            published = _view(segment, spec)
+            unchanged = len(table) >= rows and np.array_equal(published, arrays["epochs_ns"][:rows])
+            del published
+            if unchanged:
+                if len(table) == rows:
+                    return
+                if self.append(dataset, {name: array[rows:] for name, array in arrays.items()}):
+                    return
+        self.publish(dataset, arrays, headroom=headroom)
+
+    def publish_engine(self, engine):
+        """
+        Publish the ephemeris, the 1-minute pointing and the live telemetry (if any) of a
+        LookDirectionEngine as one update.
+        """
+        ephemeris = engine.ephemeris
+        self._store(
+            "ephemeris",
+            {
+                "epochs_ns": ephemeris.index.epochs_ns,
+                "coefficients": ephemeris.coefficients,
+                "wrapped": ephemeris.wrapped,
+            },
+            {"columns": ephemeris.columns, "order": ephemeris.order},
+        )
+        self._store("pointing", _table_arrays(engine.pointing))
+        if engine.live_table is not None:
+            self._store("live", _table_arrays(engine.live_table), headroom=DEFAULT_HEADROOM)
+        self._write_header()
+
+    def close(self):
+        """
+        Unlink every segment. Readers keep what they already mapped.
+        """
+        self._retired.extend(segment for segment, _ in self._datasets.values())
+        self._datasets = {}
+        self._retired.append(self._header)
+        self._unlink_retired()
+
+    def _store(self, dataset, arrays, attrs=None, headroom=0.0):
+        arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+        specs = {}
+        size = 0
+        for name, array in arrays.items():
+            rows = array.shape[0]
+            capacity = rows
+            if headroom:
+                capacity += max(int(rows * headroom), MIN_SPARE_ROWS)
+            offset = -(-size // ALIGNMENT) * ALIGNMENT
+            specs[name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "capacity": capacity,
+                "offset": offset,
+            }
+            size = offset + array.nbytes // max(rows, 1) * capacity
+
+        self._generation += 1
+        segment = _create(f"{self.name}_{dataset}_{self._generation}", max(size, 1))
+        for name, array in arrays.items():
+            _view(segment, specs[name])[...] = array
+        entry = {"segment": segment.name, "arrays": specs, "attrs": attrs or {}}
+        previous = self._datasets.get(dataset)
+        if previous is not None:
+            self._retired.append(previous[0])
+        self._datasets[dataset] = (segment, entry)
+
+    def _write_header(self):
+        schema = json.dumps(
+            {"datasets": {dataset: entry for dataset, (_, entry) in self._datasets.items()}}
+        ).encode()
+        if HEADER_PREFIX.size + len(schema) > HEADER_SIZE:
+            raise ValueError(f"The schema of {self.name!r} does not fit in {HEADER_SIZE} bytes.")
+        buffer = self._header.buf
+        HEADER_PREFIX.pack_into(buffer, 0, self._sequence + 1, len(schema))
+        buffer[HEADER_PREFIX.size : HEADER_PREFIX.size + len(schema)] = schema
+        self._sequence += 2
+        HEADER_PREFIX.pack_into(buffer, 0, self._sequence, len(schema))
+        self._unlink_retired()
+
+    def _unlink_retired(self):
+        for segment in self._retired:
+            segment.close()
+            segment.unlink()
+        self._retired = []
+
+
+class SharedTableReader:
+    """
+    Zero-copy access to the datasets of a table published by a SharedTablePublisher.
+    """
+
+    def __init__(self, name=DEFAULT_NAME):
+        self.name = name
+        self.version = None
+        self._header = _AttachedSegment(f"{name}_header")
+        # Segment name -> _AttachedSegment, the segments the last read() mapped
+        self._segments = {}
+
+    def published_version(self):
+        """
+        The version the publisher is at, odd sequence numbers (an update in progress) rounded down.
+        """
+        return HEADER_PREFIX.unpack_from(self._header.buf, 0)[0] // 2
+
+    def changed(self):
+        """
+        Whether the publisher updated the table since the last read().
+        """
+        return self.published_version() != self.version
+
+    def read(self):
+        """
+        {dataset: (arrays, attrs)} of the current version, where arrays maps every array name to
+        a read-only view of the shared segment.
+        """
+        while True:
+            schema = self._read_schema()
+            try:
+                return self._attach(schema)
+            except FileNotFoundError:
+                # The publisher replaced and unlinked a segment between reading the schema and
+                # mapping it, so a newer schema lists its replacement. Without a newer schema the
+                # publisher is gone.
+                if self.published_version() == self.version:
+                    raise
+
+    def _attach(self, schema):
+        segments = {}
+        datasets = {}
+        for dataset, entry in schema["datasets"].items():
+            name = entry["segment"]
+            segment = self._segments.get(name) or segments.get(name) or _AttachedSegment(name)
+            segments[name] = segment
+            arrays = {}
+            for array_name, spec in entry["arrays"].items():
+                array = _view(segment, spec)
+                array.flags.writeable = False
+                arrays[array_name] = array
+            datasets[dataset] = (arrays, entry["attrs"])
+        self._segments = segments
+        return datasets
+
+    def _read_schema(self):
+        buffer = self._header.buf
+        while True:
+            sequence, length = HEADER_PREFIX.unpack_from(buffer, 0)
+            if sequence % 2 == 0:
+                schema = bytes(buffer[HEADER_PREFIX.size : HEADER_PREFIX.size + length])
+                if HEADER_PREFIX.unpack_from(buffer, 0)[0] == sequence:
+                    self.version = sequence // 2
+                    return json.loads(schema)
+            time.sleep(0)
+
+
+class SharedLookDirectionEngine(LookDirectionEngine):
+    """
+    A LookDirectionEngine whose tables are the views of a published shared table: same queries,
+    nothing parsed or fitted. refresh() picks up the updates of the publisher.
+    """
+
+    def __init__(self, name=DEFAULT_NAME, live_tolerance=LIVE_POINTING_TOLERANCE):
+        super().__init__(live_pointing=False, live_tolerance=live_tolerance)
+        self.name = name
+        self.reader = None
+        self._live = None
+
+    def load(self):
+        if self._ephemeris is not None:
+            return
+        self.reader = SharedTableReader(self.name)
+        self._attach()
+
+    @property
+    def live_table(self):
+        self.load()
+        return self._live
+
+    def refresh(self):
+        """
+        Map the latest version of the table if the publisher updated it. Returns the number of
+        new live telemetry samples.
+        """
+        self.load()
+        if not self.reader.changed():
+            return 0
+        before = 0 if self._live is None else len(self._live)
+        self._attach()
+        return max(0, (0 if self._live is None else len(self._live)) - before)
+
+    def _attach(self):
+        datasets = self.reader.read()
+        if "ephemeris" not in datasets or "pointing" not in datasets:
+            raise RuntimeError(f"Nothing has been published as {self.name!r} yet.")
+        arrays, attrs = datasets["ephemeris"]
+        ephemeris = EphemerisInterpolator.from_coefficients(
+            arrays["epochs_ns"],
+            arrays["coefficients"],
+            attrs["columns"],
+            arrays["wrapped"],
+            attrs["order"],
+        )
+        pointing = PointingTable.from_arrays(**_table_columns(datasets["pointing"][0]))
+        live = datasets.get("live")
+        self._live = None if live is None else PointingTable.from_arrays(**_table_columns(live[0]))
+        self._pointing = pointing
+        self._ephemeris = ephemeris
+
+
+def publish(args):
+    engine = LookDirectionEngine(processes=args.processes, live_pointing=not args.no_live)
+    start = time.perf_counter()
+    engine.load()
+    print(f"Loaded the look direction data in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    with SharedTablePublisher(args.name) as publisher:
+        publisher.publish_engine(engine)
+        print(f"Published {args.name!r}, version {publisher.version}", file=sys.stderr)
+        if args.no_live:
+            print("Press Ctrl+C to stop publishing", file=sys.stderr)
+        try:
+            while True:
+                time.sleep(args.refresh_interval)
+                if args.no_live:
+                    continue
+                try:
+                    new_samples = engine.refresh()
+                    if new_samples:
+                        start = time.perf_counter()
+                        publisher.publish_table("live", engine.live_table)
+                        print(
+                            f"Published {new_samples} new samples in "
+                            f"{(time.perf_counter() - start) * 1e3:.1f} ms, "
+                            f"version {publisher.version}",
+                            file=sys.stderr,
+                        )
+                except Exception as e:
+                    print(f"Could not refresh the live pointing: {e}")
+        except KeyboardInterrupt:
+            pass
+
+
+def info(args):
+    reader = SharedTableReader(args.name)
+    datasets = reader.read()
+    print(f"{args.name}: version {reader.version}")
+    for dataset, (arrays, attrs) in datasets.items():
+        size = sum(array.nbytes for array in arrays.values())
+        print(f"  {dataset}: {size / 2**20:.1f} MiB")
+        for array_name, array in arrays.items():
+            print(f"    {array_name:<14} {array.dtype.str:<4} {array.shape}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--name", default=DEFAULT_NAME, help="Name of the shared table")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    publish_parser = commands.add_parser("publish", help="Load the data and publish it")
+    publish_parser.add_argument(
+        "--processes", type=int, help="Processes to parse the exports with (default: all cores)"
+    )
+    publish_parser.add_argument(
+        "--no-live", action="store_true", help="Only publish the 1-minute table, never refresh"
+    )
+    publish_parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=DEFAULT_REFRESH_INTERVAL_S,
+        help="Seconds between checks for new gimbal telemetry",
+    )
+    publish_parser.set_defaults(func=publish)
+
+    info_parser = commands.add_parser("info", help="Print the datasets of a published table")
+    info_parser.set_defaults(func=info)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
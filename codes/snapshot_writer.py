@@ -0,0 +1,118 @@
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+
+class SnapshotWriter:
+    """
+    Write image snapshots of a matplotlib canvas from a background thread.
+
+    Attached to a canvas, the writer copies the pixels the canvas has just rendered (a plain
+    memory copy, no extra rendering) at most once every interval seconds. Encoding and writing
+    happen on the writer thread. Only the newest frame is kept: if the thread is still busy
+    with the previous one, the waiting frame is replaced and counted in skipped_frames rather
+    than queued. Every file is written to a temporary name in the same directory and renamed
+    over path, so a reader only ever sees complete images. A write that fails (e.g. on a full
+    disk) is counted in failed_frames, with its exception kept in last_error, and the next
+    frame is written as usual.
+
+    The format defaults to the extension of path (png, jpg, bmp, tiff, ...). With a profiler
+    (instrumentation.RefreshProfiler), the time of every write is recorded as the "snapshot"
+    stage.
+    """
+
+    def __init__(self, path, interval=5.0, format=None, profiler=None):
+        self.path = os.path.abspath(path)
+        self.interval = interval
+        self.format = format or os.path.splitext(path)[1].lstrip(".").lower() or "png"
+        self.profiler = profiler
+        self.skipped_frames = 0
+        self.written_frames = 0
+        self.failed_frames = 0
+        self.last_error = None
+        # The temporary files are private to their creator, the snapshot gets the usual mode of a
+        # new file. The umask can only be read by setting it, so it is read once, here
+        umask = os.umask(0o022)
+        os.umask(umask)
+        self._file_mode = 0o666 & ~umask
+        self._next_due = 0.0
+        self._pending = None
+        self._condition = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self._thread.start()
+
+    def attach(self, canvas):
+        """
+        Offer a snapshot every time the canvas finishes drawing.
+        """
+        return canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        if time.monotonic() < self._next_due:
+            return
+        self.offer(np.asarray(event.canvas.buffer_rgba()).copy())
+
+    def offer(self, pixels):
+        """
+        Queue an RGBA pixel array (height, width, 4) to be written, replacing a frame that is
+        still waiting.
+        """
+        self._next_due = time.monotonic() + self.interval
+        with self._condition:
+            if self._pending is not None:
+                self.skipped_frames += 1
+            self._pending = pixels
+            self._condition.notify()
+
+    def stop(self):
+        """
+        Stop the writer thread after the frame it is currently writing. A waiting frame is
+        dropped.
+        """
+        with self._condition:
+            self._running = False
+            self._pending = None
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                pixels, self._pending = self._pending, None
+            start = time.perf_counter()
+            try:
+                self._write(pixels)
+            except OSError as e:
+                # A failed write must not stop later snapshots
+                self.failed_frames += 1
+                self.last_error = e
+                continue
+            if self.profiler is not None:
+                self.profiler.record("snapshot", time.perf_counter() - start)
+
+    def _write(self, pixels):
+        image = Image.fromarray(pixels, "RGBA")
+        pil_format = {"jpg": "jpeg", "tif": "tiff"}.get(self.format, self.format)
+        if pil_format in ("jpeg", "bmp"):
+            # No alpha channel in these formats
+            image = image.convert("RGB")
+
+        directory, name = os.path.split(self.path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, format=pil_format)
+            os.chmod(tmp_path, self._file_mode)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.written_frames += 1
@@ -0,0 +1,157 @@
+"""
+Merge the measured LEXI pointing with the STK ephemeris without loading the telemetry at once.
+
+The gimbal exports are read in time-ordered chunks (iter_pointing_chunks), optionally resampled
+on the fly (resample_pointing), joined against the ephemeris one chunk at a time and written out
+before the next chunk is read. Peak memory is set by the chunk size, not by the length of the
+telemetry. The STK ephemeris itself is small and is held in memory as an EphemerisInterpolator.
+
+    python streaming_merge.py -o merged_lexi_look_direction_data.csv
+    python streaming_merge.py --resample 1min --format npy -o merged_1min_npy
+"""
+
+import argparse
+import glob
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from ephemeris import EphemerisInterpolator
+from look_direction_engine import (
+    EPHEMERIS_FILE,
+    POINTING_FILE_PATTERN,
+    TARGETS,
+    target_separations,
+)
+from pointing_ingest import DEFAULT_CHUNK_SIZE, iter_pointing_chunks, resample_pointing
+from table_cache import TableWriter
+from time_index import NO_MATCH
+
+# Pointing samples further than this from every STK sample get no ephemeris in a nearest join
+DEFAULT_TOLERANCE = pd.Timedelta(minutes=1)
+
+# The first one is the default
+JOIN_METHODS = ("interpolate", "nearest")
+
+
+def join_ephemeris(
+    chunks, ephemeris, targets=TARGETS, method="interpolate", tolerance=DEFAULT_TOLERANCE
+):
+    """
+    Join every (epochs_ns, dec, ra) pointing chunk with the ephemeris and yield DataFrames with
+    epoch_utc, dec_lexi, ra_lexi, epoch_stk, the ephemeris columns and angular_distance_* for
+    every target.
+
+    With method="interpolate" (the default) the ephemeris is evaluated at the sample time itself,
+    so every sample inside the STK span gets values. With method="nearest" each sample gets the
+    raw STK row closest in time (epoch_stk), or NaN when that row is further than tolerance, like
+    merge_asof(direction="nearest"); with hourly STK samples most rows are NaN.
+    """
+    if method not in JOIN_METHODS:
+        raise ValueError(f"Unknown join method {method!r}, expected one of {JOIN_METHODS}.")
+
+    for epochs_ns, dec, ra in chunks:
+        if method == "nearest":
+            positions = ephemeris.index.lookup(epochs_ns, mode="nearest", tolerance=tolerance)
+            stk_ns = np.where(
+                positions == NO_MATCH,
+                np.iinfo(np.int64).min,
+                ephemeris.index.epochs_ns[np.maximum(positions, 0)],
+            )
+        else:
+            stk_ns = epochs_ns
+
+        rows = pd.DataFrame(
+            {
+                "epoch_utc": pd.to_datetime(epochs_ns, utc=True),
+                "dec_lexi": dec,
+                "ra_lexi": ra,
+                "epoch_stk": pd.to_datetime(stk_ns, utc=True),
+            }
+        )
+        # The interpolator passes through the STK samples, and NaT evaluates to NaN
+        values = ephemeris.evaluate(stk_ns)
+        rows = pd.concat([rows, pd.DataFrame(values, columns=ephemeris.columns)], axis=1)
+
+        distances = target_separations(rows, targets)
+        for target, distance in zip(targets, distances):
+            rows[f"angular_distance_{target.lower()}"] = distance
+        yield rows
+
+
+def stream_merge(
+    output,
+    pattern=POINTING_FILE_PATTERN,
+    ephemeris_file=EPHEMERIS_FILE,
+    format="csv",
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    resample=None,
+    method="interpolate",
+    tolerance=DEFAULT_TOLERANCE,
+    targets=TARGETS,
+):
+    """
+    Run the whole pipeline and write the merged table to output, a CSV file or, with
+    format="npy", a directory in the table_cache layout. Returns the number of rows written.
+    """
+    ephemeris = EphemerisInterpolator.from_csv(ephemeris_file)
+    chunks = iter_pointing_chunks(glob.glob(pattern), chunk_size)
+    if resample is not None:
+        chunks = resample_pointing(chunks, resample)
+    merged = join_ephemeris(chunks, ephemeris, targets, method, tolerance)
+
+    n_rows = 0
+    if format == "npy":
+        with TableWriter(output) as writer:
+            for rows in merged:
+                writer.append(rows)
+                n_rows += len(rows)
+    else:
+        with open(output, "w", newline="") as f:
+            for rows in merged:
+                rows.to_csv(f, header=n_rows == 0, index=False)
+                n_rows += len(rows)
+    return n_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-o", "--output", required=True, help="Output CSV file or npy directory")
+    parser.add_argument("--format", choices=["csv", "npy"], default="csv", help="Output format")
+    parser.add_argument("--pattern", default=POINTING_FILE_PATTERN, help="Gimbal export files")
+    parser.add_argument("--ephemeris", default=EPHEMERIS_FILE, help="STK angle export")
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows read per chunk"
+    )
+    parser.add_argument("--resample", help="Average the pointing into bins first, e.g. 1min")
+    parser.add_argument(
+        "--method", choices=JOIN_METHODS, default="interpolate", help="Join method"
+    )
+    parser.add_argument(
+        "--tolerance", default=DEFAULT_TOLERANCE, help="Maximum gap of a nearest join"
+    )
+    parser.add_argument(
+        "--targets", nargs="+", choices=TARGETS, default=TARGETS, help="Targets to report"
+    )
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    n_rows = stream_merge(
+        args.output,
+        pattern=args.pattern,
+        ephemeris_file=args.ephemeris,
+        format=args.format,
+        chunk_size=args.chunk_size,
+        resample=args.resample,
+        method=args.method,
+        tolerance=args.tolerance,
+        targets=args.targets,
+    )
+    elapsed = time.perf_counter() - start
+    rate = n_rows / elapsed if elapsed > 0 else float("inf")
+    print(f"Merged {n_rows} rows in {elapsed:.2f} s ({rate:,.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Synthetic STK ephemeris and Grafana pointing exports, laid out like the real files, for exercising
+the pipeline at sizes the real data does not reach (up to 10^7 rows and beyond).
+
+The pointing exports copy the Grafana layout (BOM, "sep=," line, quoted header, degree suffix,
+CRLF line breaks, no line break after the last row) and consecutive exports overlap in time like
+the real ones. The ephemeris has the epoch_utc/epoch_mjd columns and az/el/ra/dec for every STK
+target. All values come from a seeded generator, so the same arguments always give the same files.
+
+    python synthetic_data.py /tmp/lexi_synthetic --rows 1000000 --files 4
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Targets of the STK angle export, in column order
+STK_TARGETS = ["earth", "sun", "crab", "sco", "mag", "bonus", "con1"]
+# "Mar 02 2025 09:34:00.000000000", the epoch format of the STK exports
+STK_TIME_FORMAT = "%b %d %Y %H:%M:%S.%f000"
+POINTING_HEADER = '"_time","DERIVED_LEXI_DEC_J2000_rad","DERIVED_LEXI_RA_J2000_rad"'
+POINTING_FILE_NAME = "LEXI_Pointing_Measured_J2000-data-{:04d}.csv"
+EPHEMERIS_FILE_NAME = "LEXIAngleData_synthetic.csv"
+
+DEFAULT_START = pd.Timestamp("2025-03-02 09:00:00", tz="UTC")
+DEFAULT_CADENCE = pd.Timedelta(seconds=1)
+# Rows formatted and written at a time, so memory stays bounded for any file size
+WRITE_CHUNK = 200_000
+
+
+def _slew(n, rng, low, high, period):
+    """
+    A smooth random track between low and high with a little noise, like a slewing gimbal.
+    """
+    t = np.arange(n, dtype=np.float64)
+    phase = rng.uniform(0, 2 * np.pi)
+    track = np.sin(2 * np.pi * t / period + phase) + 0.3 * np.sin(2 * np.pi * t / (period / 7))
+    values = low + (high - low) * (track / 2.6 + 0.5)
+    return values + rng.normal(0, 0.05, n)
+
+
+def synthetic_pointing(n_rows, start=DEFAULT_START, cadence=DEFAULT_CADENCE, seed=0):
+    """
+    (epochs_ns, dec, ra) of n_rows LEXI pointing samples, one every cadence from start. dec is in
+    [-90, 90] and ra in [-180, 180] degrees, like the gimbal exports.
+    """
+    rng = np.random.default_rng(seed)
+    epochs_ns = pd.Timestamp(start).value + np.arange(n_rows, dtype=np.int64) * pd.Timedelta(
+        cadence
+    ).value
+    dec = np.clip(_slew(n_rows, rng, -80, 80, 86_400), -90, 90)
+    ra = np.mod(_slew(n_rows, rng, -170, 170, 43_200) + 180, 360) - 180
+    return epochs_ns, dec, ra
+
+
+def format_pointing_rows(epochs_ns, dec, ra):
+    """
+    Export rows ("2025-03-03 23:08:08,-21.1 °,-136.0 °") joined by CRLF, without a final one.
+    """
+    times = np.datetime_as_string(epochs_ns.astype("datetime64[ns]"), unit="s")
+    return "\r\n".join(
+        f"{time[:10]} {time[11:]},{d:.2f} °,{r:.2f} °"
+        for time, d, r in zip(times, dec.tolist(), ra.tolist())
+    )
+
+
+def write_pointing_exports(
+    directory, n_rows, n_files=4, overlap=0.05, start=DEFAULT_START, cadence=DEFAULT_CADENCE, seed=0
+):
+    """
+    Write n_rows pointing samples as n_files consecutive Grafana exports in directory. Each export
+    also repeats the first overlap fraction of the next one, like overlapping dashboard exports.
+    Returns the file paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    epochs_ns, dec, ra = synthetic_pointing(n_rows, start, cadence, seed)
+    bounds = np.linspace(0, n_rows, n_files + 1).astype(int)
+    paths = []
+    for i, (first, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        stop = min(n_rows, stop + int((stop - first) * overlap))
+        path = os.path.join(directory, POINTING_FILE_NAME.format(i))
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            f.write("sep=,\r\n" + POINTING_HEADER)
+            for chunk in range(first, stop, WRITE_CHUNK):
+                end = min(chunk + WRITE_CHUNK, stop)
+                rows = format_pointing_rows(epochs_ns[chunk:end], dec[chunk:end], ra[chunk:end])
+                f.write("\r\n" + rows)
+        paths.append(path)
+    return paths
+
+
+def synthetic_ephemeris(n_rows, start=DEFAULT_START, end=None, seed=0):
+    """
+    A DataFrame shaped like the STK angle export: n_rows samples evenly spread from start to end
+    (one day after start by default), with epoch_utc, epoch_mjd and az/el/ra/dec of every target.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start)
+    end = start + pd.Timedelta(days=1) if end is None else pd.Timestamp(end)
+    epochs = pd.date_range(start, end, periods=n_rows)
+
+    df = pd.DataFrame(
+        {
+            "epoch_utc": epochs.tz_convert(None).strftime(STK_TIME_FORMAT),
+            "epoch_mjd": epochs.to_julian_date() - 2_400_000.5,
+        }
+    )
+    period = max(n_rows / 3, 2)
+    for target in STK_TARGETS:
+        df[f"az_{target}"] = np.mod(_slew(n_rows, rng, 0, 360, period), 360).round(3)
+        df[f"el_{target}"] = _slew(n_rows, rng, -80, 80, period).round(3)
+        df[f"ra_{target}"] = np.mod(_slew(n_rows, rng, 0, 360, period), 360).round(3)
+        df[f"dec_{target}"] = _slew(n_rows, rng, -80, 80, period).round(3)
+    return df
+
+
+def write_stk_ephemeris(path, n_rows, start=DEFAULT_START, end=None, seed=0):
+    """
+    Write synthetic_ephemeris() to path as CSV and return the path.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    synthetic_ephemeris(n_rows, start, end, seed).to_csv(path, index=False)
+    return path
+
+
+def write_dataset(
+    directory, n_rows, n_files=4, ephemeris_rows=10_000, cadence=DEFAULT_CADENCE, seed=0
+):
+    """
+    Write a complete synthetic data set: the pointing exports and an ephemeris covering the same
+    time span. Returns (ephemeris path, pointing file pattern).
+    """
+    write_pointing_exports(directory, n_rows, n_files, cadence=cadence, seed=seed)
+    end = DEFAULT_START + max(n_rows - 1, 1) * pd.Timedelta(cadence)
+    ephemeris = write_stk_ephemeris(
+        os.path.join(directory, EPHEMERIS_FILE_NAME), ephemeris_rows, DEFAULT_START, end, seed
+    )
+    return ephemeris, os.path.join(directory, "LEXI_Pointing_Measured*.csv")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory", help="Directory to write the files to")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Pointing samples")
+    parser.add_argument("--files", type=int, default=4, help="Pointing exports")
+    parser.add_argument("--ephemeris-rows", type=int, default=10_000, help="Ephemeris samples")
+    parser.add_argument("--cadence", default=DEFAULT_CADENCE, help="Pointing sample interval")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args(argv)
+
+    ephemeris, pattern = write_dataset(
+        args.directory, args.rows, args.files, args.ephemeris_rows, args.cadence, args.seed
+    )
+    print(f"Wrote {ephemeris} and {pattern}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# In the data directory next to codes/, like look_direction_engine.DATA_DIR, whatever the
+# working directory
+CACHE_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", ".cache")
+)
+# Bump when the on-disk layout changes so stale caches are rebuilt
+CACHE_FORMAT_VERSION = 1
+
+
+def input_fingerprint(files, hash_contents=False, version=None):
+    """
+    Hash the identity of a set of input files. By default a file is identified by its path, size
+    and mtime, which only needs a stat. With hash_contents=True the file bytes are hashed instead,
+    which survives touch/copy operations at the cost of reading every input.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"format={CACHE_FORMAT_VERSION};version={version}".encode())
+    for file in sorted(os.path.abspath(f) for f in files):
+        digest.update(file.encode())
+        if hash_contents:
+            with open(file, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        else:
+            stat = os.stat(file)
+            digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def save_table(df, path, key):
+    """
+    Write a DataFrame as one .npy file per column plus a meta.json describing the schema.
+
+    Timezone-aware datetime columns and a DatetimeIndex are stored as int64 epoch nanoseconds.
+    The directory is written next to its final location and renamed into place, so a reader never
+    sees a partially written cache.
+    """
+    index_name = df.index.name
+    if index_name is not None:
+        df = df.reset_index()
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+
+    columns = []
+    for position, column in enumerate(df.columns):
+        values = df[column]
+        kind = "values"
+        if isinstance(values.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(values):
+            kind = "datetime_utc"
+            if values.dt.tz is None:
+                values = values.dt.tz_localize("UTC")
+            array = pd.DatetimeIndex(values).tz_convert("UTC").as_unit("ns").asi8
+        else:
+            array = values.to_numpy()
+        file_name = f"col_{position:04d}.npy"
+        np.save(os.path.join(tmp_path, file_name), np.ascontiguousarray(array), allow_pickle=False)
+        columns.append({"name": column, "file": file_name, "kind": kind})
+
+    meta = {"key": key, "index": index_name, "n_rows": len(df), "columns": columns}
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=1)
+
+    _move_into_place(tmp_path, path)
+
+
+def _move_into_place(tmp_path, path):
+    """
+    Rename a finished table directory to path. A table already there is renamed aside first and
+    removed afterwards, so a reader or another writer never sees a half-deleted directory. When
+    two processes rebuild the same table at once, one of the copies ends up in place and the other
+    is discarded.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    aside = tempfile.mkdtemp(dir=parent, prefix=".old-")
+    try:
+        try:
+            os.replace(path, aside)
+        except FileNotFoundError:
+            pass
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # Another writer put its table in place since, which is as good as this one
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    finally:
+        shutil.rmtree(aside, ignore_errors=True)
+
+
+def _npy_header(dtype, n_rows):
+    """
+    The .npy v1.0 header of a 1-D array. Its length is padded to a multiple of 64 bytes, so it
+    does not change with the number of rows for the numeric dtypes written here.
+    """
+    buffer = io.BytesIO()
+    header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (n_rows,)}
+    np.lib.format.write_array_header_1_0(buffer, header)
+    return buffer.getvalue()
+
+
+class TableWriter:
+    """
+    Write a table in the save_table layout one chunk of rows at a time, with memory bounded by
+    the chunk size.
+
+    Every chunk is appended to the column files as raw bytes behind a .npy header that is
+    rewritten with the final row count on close. Like save_table, the table is built in a
+    temporary directory and renamed into place on close, and it can be memory-mapped back with
+    load_table. Use it as a context manager so a failed write leaves nothing behind.
+    """
+
+    def __init__(self, path, key=None):
+        self.path = path
+        self.key = key
+        self.n_rows = 0
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._tmp_path = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+        self._columns = None
+        self._files = []
+
+    def append(self, df):
+        """
+        Append the rows of df. Every chunk must have the same columns and dtypes as the first.
+        """
+        if self._columns is None:
+            self._open(df)
+        elif list(df.columns) != [column["name"] for column in self._columns]:
+            raise ValueError("All chunks written to a TableWriter must have the same columns.")
+
+        for column, f in zip(self._columns, self._files):
+            values = df[column["name"]]
+            if column["kind"] == "datetime_utc":
+                array = pd.DatetimeIndex(values).tz_convert("UTC").as_unit("ns").asi8
+            else:
+                array = values.to_numpy()
+            f.write(np.ascontiguousarray(array, dtype=column["dtype"]).tobytes())
+        self.n_rows += len(df)
+
+    def _open(self, df):
+        self._columns = []
+        for position, column in enumerate(df.columns):
+            values = df[column]
+            if isinstance(values.dtype, pd.DatetimeTZDtype):
+                kind, dtype = "datetime_utc", np.dtype(np.int64)
+            elif values.dtype.kind in "biuf":
+                kind, dtype = "values", values.dtype
+            else:
+                raise TypeError(f"Column {column!r} of dtype {values.dtype} cannot be streamed.")
+            file_name = f"col_{position:04d}.npy"
+            f = open(os.path.join(self._tmp_path, file_name), "wb")
+            f.write(_npy_header(dtype, 0))
+            self._files.append(f)
+            self._columns.append({"name": column, "file": file_name, "kind": kind, "dtype": dtype})
+
+    def close(self):
+        """
+        Finalize the column headers and the meta.json and move the table into place.
+        """
+        for column, f in zip(self._columns or [], self._files):
+            header = _npy_header(column["dtype"], self.n_rows)
+            if len(header) != len(_npy_header(column["dtype"], 0)):
+                raise ValueError(f"The .npy header of {column['name']!r} changed length.")
+            f.seek(0)
+            f.write(header)
+            f.close()
+
+        columns = [
+            {"name": column["name"], "file": column["file"], "kind": column["kind"]}
+            for column in self._columns or []
+        ]
+        meta = {"key": self.key, "index": None, "n_rows": self.n_rows, "columns": columns}
+        with open(os.path.join(self._tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=1)
+
+        _move_into_place(self._tmp_path, self.path)
+
+    def abort(self):
+        """
+        Discard everything written so far.
+        """
+        for f in self._files:
+            f.close()
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def load_table(path, key=None):
+    """
+    Load a table written by save_table with every numeric column memory-mapped read-only.
+    Returns None when the cache is missing or was written for a different key.
+    """
+    meta_file = os.path.join(path, "meta.json")
+    if not os.path.isfile(meta_file):
+        return None
+    with open(meta_file) as f:
+        meta = json.load(f)
+    if key is not None and meta["key"] != key:
+        return None
+
+    data = {}
+    for column in meta["columns"]:
+        array = np.load(os.path.join(path, column["file"]), mmap_mode="r", allow_pickle=False)
+        if column["kind"] == "datetime_utc":
+            data[column["name"]] = pd.to_datetime(np.asarray(array), utc=True)
+        else:
+            data[column["name"]] = array
+
+    df = pd.DataFrame(data, copy=False)
+    if meta["index"] is not None:
+        df = df.set_index(meta["index"])
+    return df
+
+
+def load_or_build(name, input_files, build, cache_dir=CACHE_DIR, hash_contents=False, version=None):
+    """
+    Return the cached table called name if its input files are unchanged, otherwise call build(),
+    cache its result and return it. version lets the caller invalidate the cache when the code
+    that builds the table changes.
+    """
+    key = input_fingerprint(input_files, hash_contents=hash_contents, version=version)
+    path = os.path.join(cache_dir, name)
+
+    try:
+        df = load_table(path, key)
+    except (OSError, ValueError, KeyError):
+        # A damaged cache is simply rebuilt
+        df = None
+    if df is not None:
+        return df
+
+    df = build()
+    save_table(df, path, key)
+    return df
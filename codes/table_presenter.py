@@ -0,0 +1,82 @@
+class TablePresenter:
+    """
+    Keep a ttk.Treeview in sync with a list of rows without rebuilding it.
+
+    Every target keeps one persistent item. Columns are only reconfigured when the set of columns
+    changes, and on every update only the items whose formatted values or tags changed are touched
+    through table.item(...), which avoids the flicker and Tk churn of a full clear-and-reinsert.
+    """
+
+    def __init__(self, table, column_width=100, anchor="center"):
+        self.table = table
+        self.column_width = column_width
+        self.anchor = anchor
+        self.columns = None
+        # Row key -> Treeview item id, and the values/tags last written to it
+        self._items = {}
+        self._values = {}
+        self._tags = {}
+
+    def set_columns(self, columns, headings=None):
+        """
+        Configure the table columns, unless they are already the given ones. headings maps a column
+        to its heading text and defaults to the column name. Returns True if the columns changed.
+        """
+        columns = tuple(columns)
+        if columns == self.columns:
+            return False
+
+        headings = {} if headings is None else headings
+        self.table["columns"] = columns
+        for column in columns:
+            self.table.heading(column, text=headings.get(column, column))
+            self.table.column(column, width=self.column_width, anchor=self.anchor)
+        self.columns = columns
+        # The cells have a different layout now, so every item must be written again
+        self._values.clear()
+        return True
+
+    def update(self, rows):
+        """
+        Show the given rows, a list of (key, values, tags) in display order. Items for keys that are
+        no longer present are removed and new keys get a new item. Returns True if the number of
+        rows changed.
+        """
+        previous_count = len(self._items)
+        keys = [key for key, _, _ in rows]
+
+        for key in set(self._items) - set(keys):
+            self.table.delete(self._items.pop(key))
+            self._values.pop(key, None)
+            self._tags.pop(key, None)
+
+        for position, (key, values, tags) in enumerate(rows):
+            values = tuple(values)
+            tags = tuple(tags)
+            item_id = self._items.get(key)
+            if item_id is None:
+                item_id = self.table.insert("", position, values=values, tags=tags)
+                self._items[key] = item_id
+                self._values[key] = values
+                self._tags[key] = tags
+                continue
+
+            if self.table.index(item_id) != position:
+                self.table.move(item_id, "", position)
+            if self._values.get(key) != values:
+                self.table.item(item_id, values=values)
+                self._values[key] = values
+            if self._tags.get(key) != tags:
+                self.table.item(item_id, tags=tags)
+                self._tags[key] = tags
+
+        return len(self._items) != previous_count
+
+    def clear(self):
+        """
+        Remove every row from the table.
+        """
+        self.table.delete(*self.table.get_children())
+        self._items.clear()
+        self._values.clear()
+        self._tags.clear()
@@ -0,0 +1,538 @@
+"""
+Live LEXI telemetry from a UDP or TCP stream, into a fixed-size ring buffer.
+
+The gimbal exports only arrive every so often, so the "current time" view can be hours behind the
+gimbal. A TelemetryReceiver takes timestamped records from a socket as they are sent and writes
+them into a TelemetryRing, preallocated NumPy arrays holding the last capacity records. Attached
+to a LookDirectionEngine (its stream), the ring's samples are preferred over the exports within
+live_tolerance of a query; main_plot.py also plots the LEXI AZ/EL it receives.
+
+Records. One record per line, several lines per datagram or TCP read are fine:
+
+    time,dec_lexi,ra_lexi[,az_lexi,el_lexi]
+
+time is integer epoch nanoseconds or an ISO 8601 timestamp (UTC unless it has an offset), the
+angles are degrees, and a missing or empty angle is NaN. Malformed lines are counted and dropped.
+
+Every batch of records received is timed from the read to the records being in the ring ("stream
+ingest"), and the newest record of the batch from its own timestamp to the same point ("stream
+latency"). With a sender that stamps records as it samples them, like the replay below, the latter
+is the delay from the gimbal sample to the tables.
+
+    python telemetry_ingest.py listen --protocol udp --port 8766
+    python telemetry_ingest.py replay --protocol udp --port 8766 --speed 10
+    LEXI_TELEMETRY_STREAM=udp://127.0.0.1:8766 python look_direction.py
+"""
+
+import argparse
+import glob
+import math
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+import numpy as np
+from instrumentation import RefreshProfiler
+from look_direction_engine import LookDirectionEngine
+from pointing_ingest import POINTING_FILE_PATTERN, PointingTable, load_pointing_files
+from time_index import to_epoch_ns
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+# Environment variable with the address the viewers receive telemetry on, e.g. udp://:8766
+TELEMETRY_ENV = "LEXI_TELEMETRY_STREAM"
+PROTOCOLS = ("udp", "tcp")
+# Angle columns of a record, after its time
+FIELDS = ("dec_lexi", "ra_lexi", "az_lexi", "el_lexi")
+# Records kept by a ring, over a day of 1 Hz telemetry
+DEFAULT_CAPACITY = 1 << 17
+# Largest read from a TCP connection or UDP datagram
+RECV_SIZE = 1 << 16
+# Records sent per datagram or write by a replay that does not wait between records
+REPLAY_BATCH = 100
+# Seconds between the statistics printed by listen
+REPORT_INTERVAL_S = 5.0
+
+
+class _SortedRecords:
+    """
+    The dec/ra records of a TelemetryRing sorted by time, with the arrival number of each, in
+    arrays with room to grow at the end. Records later than the last one are written after it
+    and the records overwritten in the ring are cut from the front, so an update only touches the
+    records that changed. Records reordered on the way, or leaving the ring out of time order,
+    rebuild the arrays. Nothing is written inside a window that was already handed out, so the
+    earlier tables stay valid.
+    """
+
+    def __init__(self, capacity):
+        # Room for two rings, so the window is only moved back once every capacity records
+        self.size = 2 * capacity
+        # Records of the ring merged so far
+        self.count = 0
+        self.table = PointingTable()
+        self._start = self._stop = 0
+        self._columns = self._allocate(self.size)
+        # Whether the arrival numbers ascend along the window, as they do without reordering
+        self._in_order = True
+
+    @staticmethod
+    def _allocate(size):
+        return [
+            np.empty(size, dtype=np.int64),
+            np.empty(size, dtype=np.int64),
+            np.empty(size, dtype=np.float64),
+            np.empty(size, dtype=np.float64),
+        ]
+
+    def _window(self):
+        """
+        [epochs_ns, arrivals, dec, ra] of the records held.
+        """
+        return [column[self._start : self._stop] for column in self._columns]
+
+    def _rebuild(self, columns):
+        self._columns = self._allocate(max(self.size, columns[0].size))
+        for column, values in zip(self._columns, columns):
+            column[: values.size] = values
+        self._start, self._stop = 0, columns[0].size
+        self._in_order = bool(np.all(np.diff(columns[1]) > 0))
+
+    def update(self, count, epochs_ns, arrivals, dec, ra, oldest):
+        """
+        Merge the new records, then drop the ones that arrived before oldest.
+        """
+        window = self._window()
+        if not self._in_order or (self._stop > self._start and window[1][0] < oldest):
+            if self._in_order:
+                self._start += int(np.searchsorted(window[1], oldest))
+            else:
+                keep = window[1] >= oldest
+                if not keep.all():
+                    self._rebuild([column[keep] for column in window])
+
+        if epochs_ns.size:
+            order = np.argsort(epochs_ns, kind="stable")
+            new = [epochs_ns[order], arrivals[order], dec[order], ra[order]]
+            if self._stop == self._start or new[0][0] >= self._columns[0][self._stop - 1]:
+                if self._stop + epochs_ns.size > self.size:
+                    self._rebuild(self._window())
+                for column, values in zip(self._columns, new):
+                    column[self._stop : self._stop + epochs_ns.size] = values
+                self._stop += epochs_ns.size
+                self._in_order = self._in_order and bool(np.all(np.diff(order) > 0))
+            else:
+                window = self._window()
+                positions = np.searchsorted(window[0], new[0], side="right")
+                self._rebuild([np.insert(a, positions, b) for a, b in zip(window, new)])
+
+        epochs_ns, _, dec, ra = self._window()
+        self.table = PointingTable.from_arrays(epochs_ns, dec, ra)
+        self.count = count
+
+
+class TelemetryRing:
+    """
+    The last capacity records of a stream: int64 epoch ns and float64 FIELDS, in preallocated
+    arrays written in arrival order. Appending never allocates; once full, the oldest records are
+    overwritten.
+
+    count is the number of records appended since the start. since(count) returns the records
+    appended after an earlier count, for consumers that follow the stream incrementally (the
+    plot), and table() the dec/ra samples held as a time-sorted PointingTable (the lookups).
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, fields=FIELDS):
+        self.capacity = capacity
+        self.fields = list(fields)
+        self.count = 0
+        self._epochs = np.zeros(capacity, dtype=np.int64)
+        self._values = np.full((capacity, len(self.fields)), np.nan)
+        # Appends come from the receiver threads, reads from the lookups and the plot
+        self._lock = threading.Lock()
+        # The sorted records behind table(), updated by one caller at a time
+        self._records = _SortedRecords(capacity)
+        self._records_lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, epochs_ns, values):
+        """
+        Append records: epochs_ns of shape (n,) and values of shape (n, len(fields)).
+        """
+        epochs_ns = np.asarray(epochs_ns, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        n_records = epochs_ns.size
+        # Of a batch larger than the ring, only the end would survive
+        epochs_ns, values = epochs_ns[-self.capacity :], values[-self.capacity :]
+        with self._lock:
+            start = (self.count + n_records - epochs_ns.size) % self.capacity
+            first = min(epochs_ns.size, self.capacity - start)
+            self._epochs[start : start + first] = epochs_ns[:first]
+            self._values[start : start + first] = values[:first]
+            self._epochs[: epochs_ns.size - first] = epochs_ns[first:]
+            self._values[: epochs_ns.size - first] = values[first:]
+            self.count += n_records
+
+    def since(self, count=0):
+        """
+        (count, epochs_ns, values) of the records appended after the given count that are still
+        held, in arrival order, with the count to pass next time.
+        """
+        with self._lock:
+            end = self.count
+            start = max(count, end - self.capacity)
+            first, last = start % self.capacity, end % self.capacity
+            if end - start == self.capacity or last < first:
+                epochs_ns = np.concatenate((self._epochs[first:], self._epochs[:last]))
+                values = np.concatenate((self._values[first:], self._values[:last]))
+            else:
+                epochs_ns = self._epochs[first:last].copy()
+                values = self._values[first:last].copy()
+        return end, epochs_ns, values
+
+    def latest(self):
+        """
+        (epoch_ns, values) of the last record received, None before the first one.
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            position = (self.count - 1) % self.capacity
+            return int(self._epochs[position]), self._values[position].copy()
+
+    def table(self):
+        """
+        The records held that have a dec and ra, as a PointingTable sorted by time. Only the
+        records appended since the last call are merged in.
+        """
+        with self._records_lock:
+            records = self._records
+            if records.count != self.count:
+                count, epochs_ns, values = self.since(records.count)
+                arrivals = np.arange(count - epochs_ns.size, count, dtype=np.int64)
+                dec = values[:, self.fields.index("dec_lexi")]
+                ra = values[:, self.fields.index("ra_lexi")]
+                keep = ~(np.isnan(dec) | np.isnan(ra))
+                if not keep.all():
+                    epochs_ns, arrivals, dec, ra = (
+                        epochs_ns[keep], arrivals[keep], dec[keep], ra[keep]
+                    )
+                records.update(count, epochs_ns, arrivals, dec, ra, count - self.capacity)
+            return records.table
+
+
+def _parse_time(field):
+    # Signed integer epoch nanoseconds, or a timestamp string
+    if field.lstrip(b"+-").isdigit():
+        return int(field)
+    return int(to_epoch_ns(field.decode()))
+
+
+def parse_records(data, n_fields=len(FIELDS)):
+    """
+    (epochs_ns, values, rejected) of the complete record lines in data (bytes): values has
+    n_fields columns, NaN where a record has no value, and rejected counts the malformed lines.
+    """
+    epochs_ns = []
+    rows = []
+    rejected = 0
+    for line in data.split(b"\n"):
+        line = line.strip()
+        if not line:
+            continue
+        fields = line.split(b",")
+        try:
+            epoch_ns = _parse_time(fields[0].strip())
+            values = [float(field) if field.strip() else math.nan for field in fields[1:]]
+        except ValueError:
+            rejected += 1
+            continue
+        if len(values) > n_fields:
+            rejected += 1
+            continue
+        epochs_ns.append(epoch_ns)
+        rows.append(values + [math.nan] * (n_fields - len(values)))
+    values = np.array(rows, dtype=np.float64).reshape(len(rows), n_fields)
+    return np.array(epochs_ns, dtype=np.int64), values, rejected
+
+
+def format_records(epochs_ns, values):
+    """
+    The record lines of epochs_ns and values (n, up to len(FIELDS)) as bytes, NaN left empty.
+    """
+    lines = []
+    for epoch_ns, row in zip(epochs_ns.tolist(), values.tolist()):
+        fields = ["" if math.isnan(value) else repr(value) for value in row]
+        lines.append(",".join([str(epoch_ns)] + fields) + "\n")
+    return "".join(lines).encode()
+
+
+class _UDPHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.server.receiver.ingest(self.request[0], time.perf_counter())
+
+
+class _TCPHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        pending = b""
+        while True:
+            data = self.request.recv(RECV_SIZE)
+            received = time.perf_counter()
+            if not data:
+                break
+            # Only complete lines, the rest waits for the next read
+            complete, _, pending = (pending + data).rpartition(b"\n")
+            if complete:
+                self.server.receiver.ingest(complete, received)
+        if pending.strip():
+            self.server.receiver.ingest(pending, time.perf_counter())
+
+
+class _UDPServer(socketserver.UDPServer):
+    max_packet_size = RECV_SIZE
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class TelemetryReceiver:
+    """
+    Receive records on a UDP or TCP socket into a TelemetryRing, on a background thread.
+
+    Each datagram or read is parsed and appended as one batch. The "stream ingest" and "stream
+    latency" stages of every batch go to the profiler, a RefreshProfiler of its own without one.
+    """
+
+    def __init__(
+        self, address=(DEFAULT_HOST, DEFAULT_PORT), protocol="udp", ring=None, profiler=None
+    ):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown protocol {protocol!r}, expected one of {PROTOCOLS}.")
+        self.protocol = protocol
+        self.ring = TelemetryRing() if ring is None else ring
+        self.profiler = RefreshProfiler() if profiler is None else profiler
+        self.rejected = 0
+        server_class = _UDPServer if protocol == "udp" else _TCPServer
+        self.server = server_class(address, _UDPHandler if protocol == "udp" else _TCPHandler)
+        self.server.receiver = self
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread = None
+        self.server.server_close()
+
+    def ingest(self, data, received):
+        """
+        Parse record lines received at perf_counter time received and append them to the ring.
+        """
+        try:
+            epochs_ns, values, rejected = parse_records(data, len(self.ring.fields))
+        except Exception as e:
+            print(f"Could not parse the telemetry records: {e}")
+            return
+        self.rejected += rejected
+        if not epochs_ns.size:
+            return
+        self.ring.append(epochs_ns, values)
+        now_ns = time.time_ns()
+        self.profiler.record("stream ingest", time.perf_counter() - received)
+        self.profiler.record("stream latency", (now_ns - epochs_ns.max()) / 1e9)
+
+
+def parse_stream_address(text):
+    """
+    (protocol, (host, port)) of "udp://host:port", "tcp://:port" or "host:port" (UDP).
+    """
+    protocol, _, address = text.rpartition("://")
+    host, _, port = address.rpartition(":")
+    return protocol or "udp", (host or DEFAULT_HOST, int(port))
+
+
+def open_telemetry_stream(engine, profiler=None):
+    """
+    Start a TelemetryReceiver on the address in the LEXI_TELEMETRY_STREAM environment variable
+    and make engine use its samples. Returns the receiver, None when the variable is not set.
+    """
+    text = os.environ.get(TELEMETRY_ENV)
+    if not text:
+        return None
+    if not isinstance(engine, LookDirectionEngine):
+        raise ValueError(
+            f"{TELEMETRY_ENV} needs a local engine, start the lookup service with --telemetry."
+        )
+    protocol, address = parse_stream_address(text)
+    receiver = TelemetryReceiver(address, protocol, profiler=profiler).start()
+    engine.stream = receiver.ring
+    return receiver
+
+
+def load_replay(source):
+    """
+    (epochs_ns, values) to replay, sorted by time: the dec/ra of the LEXI_Pointing_Measured
+    exports ("pointing"), or the gimbal angles with the measured AZ/EL of the data/from_lexi
+    exports ("from_lexi").
+    """
+    if source == "pointing":
+        epochs_ns, dec, ra = load_pointing_files(sorted(glob.glob(POINTING_FILE_PATTERN)), 1)
+        values = np.full((epochs_ns.size, len(FIELDS)), np.nan)
+        values[:, 0], values[:, 1] = dec, ra
+        return epochs_ns, values
+
+    # Only needed for this source
+    from telemetry_streams import TelemetryStreams
+
+    df = TelemetryStreams().aligned(["gimbal_angles", "position"])
+    epochs_ns = to_epoch_ns(df["epoch_utc"])
+    values = df[["dec_lexi", "ra_lexi", "az_measure", "el_measure"]].to_numpy(dtype=np.float64)
+    return epochs_ns, values
+
+
+def replay_schedule(epochs_ns, speed=1.0, max_gap=None):
+    """
+    Seconds after the start of the replay to send every record at: the time since the first
+    record divided by speed, with gaps longer than max_gap seconds (after the speedup) shortened
+    to max_gap. All zero with speed 0, as fast as possible.
+    """
+    if not speed or epochs_ns.size == 0:
+        return np.zeros(epochs_ns.size)
+    gaps = np.diff(epochs_ns, prepend=epochs_ns[0]) / 1e9 / speed
+    if max_gap is not None:
+        gaps = np.minimum(gaps, max_gap)
+    return np.cumsum(gaps)
+
+
+def listen(args):
+    with TelemetryReceiver((args.host, args.port), args.protocol) as receiver:
+        print(
+            f"Receiving telemetry on {args.protocol}://{args.host}:{receiver.address[1]}",
+            file=sys.stderr,
+        )
+        previous = 0
+        try:
+            while True:
+                time.sleep(args.report_interval)
+                count = receiver.ring.count
+                latency = receiver.profiler.stats("stream latency")
+                ingest = receiver.profiler.stats("stream ingest")
+                text = f"{count} records ({(count - previous) / args.report_interval:,.0f}/s)"
+                if "p50" in latency:
+                    text += (
+                        f", ingest p50 {ingest['p50'] * 1e3:.2f} ms"
+                        f", latency p50 {latency['p50'] * 1e3:.2f} ms"
+                        f" p99 {latency['p99'] * 1e3:.2f} ms"
+                    )
+                print(text + f", {receiver.rejected} rejected", file=sys.stderr)
+                previous = count
+        except KeyboardInterrupt:
+            pass
+
+
+def replay(args):
+    epochs_ns, values = load_replay(args.source)
+    if args.limit:
+        epochs_ns, values = epochs_ns[: args.limit], values[: args.limit]
+    if not epochs_ns.size:
+        print(f"No {args.source} records to replay", file=sys.stderr)
+        return
+    schedule = replay_schedule(epochs_ns, args.speed, args.max_gap)
+    kind = socket.SOCK_DGRAM if args.protocol == "udp" else socket.SOCK_STREAM
+    batch = REPLAY_BATCH if not args.speed else 1
+    print(f"Replaying {epochs_ns.size} records over {schedule[-1]:.0f} s", file=sys.stderr)
+
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.connect((args.host, args.port))
+        if args.protocol == "tcp":
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        start_s = time.time()
+        start = time.perf_counter()
+        sent = 0
+        try:
+            for first in range(0, epochs_ns.size, batch):
+                delay = schedule[first] - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+                stop = first + batch
+                times = epochs_ns[first:stop]
+                if not args.keep_times:
+                    # Stamped as sent, like a live gimbal
+                    times = np.full(times.size, time.time_ns(), dtype=np.int64)
+                sock.sendall(format_records(times, values[first:stop]))
+                sent += times.size
+        except KeyboardInterrupt:
+            pass
+        elapsed = time.perf_counter() - start
+    rate = sent / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"Sent {sent} records in {elapsed:.1f} s ({rate:,.0f} records/s), "
+        f"starting {time.strftime('%H:%M:%S', time.gmtime(start_s))} UTC",
+        file=sys.stderr,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on or send to")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Telemetry port")
+    parser.add_argument("--protocol", choices=PROTOCOLS, default="udp")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    listen_parser = commands.add_parser("listen", help="Receive records and print statistics")
+    listen_parser.add_argument(
+        "--report-interval",
+        type=float,
+        default=REPORT_INTERVAL_S,
+        help="Seconds between statistics",
+    )
+    listen_parser.set_defaults(func=listen)
+
+    replay_parser = commands.add_parser("replay", help="Stream the exports as live telemetry")
+    replay_parser.add_argument(
+        "--source",
+        choices=("pointing", "from_lexi"),
+        default="pointing",
+        help="LEXI_Pointing_Measured dec/ra, or from_lexi gimbal angles with AZ/EL",
+    )
+    replay_parser.add_argument(
+        "--speed", type=float, default=1.0, help="Replay speedup, 0 for as fast as possible"
+    )
+    replay_parser.add_argument(
+        "--max-gap", type=float, default=5.0, help="Longest wait between records (s)"
+    )
+    replay_parser.add_argument("--limit", type=int, help="Only replay the first records")
+    replay_parser.add_argument(
+        "--keep-times",
+        action="store_true",
+        help="Send the recorded times instead of stamping records as they are sent",
+    )
+    replay_parser.set_defaults(func=replay)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Lazy loader for the gimbal telemetry exported from the LEXI Grafana dashboards (data/from_lexi).
+
+Each telemetry family is a stream, split across several overlapping, timestamped exports:
+
+    gimbal_angles  "LEXI Gimbal Angles-data-*.csv"            dec_lexi, ra_lexi (degrees)
+    position       "LEXI Position-data-*.csv"                 az_cmd, az_measure, el_cmd, el_measure
+    cbi            "LEXI Gimbal Measurements CBI-data-*.csv"  cbi_raw
+
+A stream is only read the first time it is used, so a viewer that needs the pointing never pays
+for parsing the position or CBI exports. The exports of a stream are merged into one time series
+sorted by time, where a sample exported more than once is kept once (from the first export, by
+file name). TelemetryStreams.aligned() puts several streams side by side on the timestamps of one
+of them, for any time range.
+"""
+
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+from grafana_csv import read_grafana_csv
+from look_direction_engine import DATA_DIR
+from time_index import NO_MATCH, TimeIndex
+
+FROM_LEXI_DIR = os.path.join(DATA_DIR, "from_lexi")
+
+# Stream name -> (file name pattern, {export column: column name})
+STREAMS = {
+    "gimbal_angles": (
+        "LEXI Gimbal Angles-data-*.csv",
+        # The exports label these "_rad", but the values are degrees like the other gimbal exports
+        {"DERIVED_LEXI_DEC_J2000_rad": "dec_lexi", "DERIVED_LEXI_RA_J2000_rad": "ra_lexi"},
+    ),
+    "position": (
+        "LEXI Position-data-*.csv",
+        {
+            "LEXI AZ CMD": "az_cmd",
+            "LEXI AZ Measure": "az_measure",
+            "LEXI EL CMD": "el_cmd",
+            "LEXI EL Measure": "el_measure",
+        },
+    ),
+    "cbi": ("LEXI Gimbal Measurements CBI-data-*.csv", {"raw": "cbi_raw"}),
+}
+
+# The dashboards sample every 20 s, so rows of another stream within 10 s belong to the same tick
+DEFAULT_ALIGN_TOLERANCE = pd.Timedelta(seconds=10)
+
+
+class TelemetrySeries:
+    """
+    The samples of one stream: a TimeIndex without duplicate epochs and a float64 array of shape
+    (n_samples, n_columns).
+    """
+
+    def __init__(self, name, epochs_ns, values, columns):
+        self.name = name
+        self.index = TimeIndex(epochs_ns)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.index), len(columns))
+        self.columns = list(columns)
+
+    def __len__(self):
+        return len(self.index)
+
+    def column(self, column):
+        """
+        All the samples of one column, as a view.
+        """
+        return self.values[:, self.columns.index(column)]
+
+    def window(self, t0=None, t1=None):
+        """
+        Epochs and values of the samples with t0 <= epoch <= t1, as views (no copy).
+        """
+        start, stop = self.index.bounds(t0, t1)
+        return self.index.epochs_ns[start:stop], self.values[start:stop]
+
+    def to_dataframe(self, t0=None, t1=None):
+        """
+        The samples with t0 <= epoch <= t1 as a DataFrame with an epoch_utc column.
+        """
+        epochs_ns, values = self.window(t0, t1)
+        df = pd.DataFrame(values, columns=self.columns)
+        df.insert(0, "epoch_utc", pd.to_datetime(epochs_ns, utc=True))
+        return df
+
+
+def load_stream(name, files, schema):
+    """
+    Read the exports of one stream into a TelemetrySeries. schema maps the export columns to the
+    column names of the series; an export missing one of them raises a ValueError.
+    """
+    epochs = []
+    values = []
+    for file in sorted(files):
+        columns, epochs_ns, file_values = read_grafana_csv(file)
+        missing = [column for column in schema if column not in (columns or [])]
+        if missing:
+            raise ValueError(f"{file} has no {', '.join(missing)} column for the {name} stream.")
+        epochs.append(epochs_ns)
+        values.append(file_values[:, [columns.index(column) for column in schema]])
+
+    if not epochs:
+        return TelemetrySeries(name, np.empty(0, dtype=np.int64), np.empty(0), schema.values())
+
+    epochs_ns = np.concatenate(epochs)
+    values = np.concatenate(values)
+    # A stable sort keeps the samples of the first export first among equal epochs
+    order = np.argsort(epochs_ns, kind="stable")
+    epochs_ns = epochs_ns[order]
+    keep = np.r_[True, epochs_ns[1:] != epochs_ns[:-1]]
+    return TelemetrySeries(name, epochs_ns[keep], values[order][keep], schema.values())
+
+
+class TelemetryStreams:
+    """
+    Registry of the telemetry streams in a directory of exports, loaded on first use.
+
+    streams maps a stream name to a file name pattern and a schema ({export column: column name}),
+    STREAMS by default. More streams can be added with register().
+    """
+
+    def __init__(self, directory=FROM_LEXI_DIR, streams=None):
+        self.directory = directory
+        self.streams = dict(STREAMS if streams is None else streams)
+        self._series = {}
+
+    @property
+    def names(self):
+        return list(self.streams)
+
+    def register(self, name, pattern, schema):
+        """
+        Add or replace a stream. A replaced stream is read again on its next use.
+        """
+        self.streams[name] = (pattern, dict(schema))
+        self._series.pop(name, None)
+
+    def is_loaded(self, name):
+        return name in self._series
+
+    def files(self, name):
+        """
+        The exports of a stream, sorted by file name.
+        """
+        pattern, _ = self._schema(name)
+        return sorted(glob.glob(os.path.join(glob.escape(self.directory), pattern)))
+
+    def __getitem__(self, name):
+        """
+        The TelemetrySeries of a stream, read from its exports the first time.
+        """
+        series = self._series.get(name)
+        if series is None:
+            _, schema = self._schema(name)
+            series = load_stream(name, self.files(name), schema)
+            self._series[name] = series
+        return series
+
+    def _schema(self, name):
+        if name not in self.streams:
+            raise KeyError(f"Unknown telemetry stream {name!r}, expected one of {self.names}.")
+        return self.streams[name]
+
+    def aligned(
+        self,
+        names=None,
+        t0=None,
+        t1=None,
+        on=None,
+        mode="nearest",
+        tolerance=DEFAULT_ALIGN_TOLERANCE,
+    ):
+        """
+        A DataFrame with the columns of the given streams (all by default) side by side, one row
+        per sample of the stream on (the first of names by default) with t0 <= epoch <= t1.
+
+        The other streams are matched to every row with TimeIndex.lookup(mode, tolerance), and
+        are NaN where they have no sample close enough. Only the streams asked for are loaded.
+        A column name used by more than one stream is prefixed with its stream name.
+        """
+        names = self.names if names is None else list(names)
+        on = names[0] if on is None else on
+        if on not in names:
+            names.insert(0, on)
+
+        epochs_ns, _ = self[on].window(t0, t1)
+        df = pd.DataFrame({"epoch_utc": pd.to_datetime(epochs_ns, utc=True)})
+        counts = pd.Series([c for name in names for c in self[name].columns]).value_counts()
+        for name in names:
+            series = self[name]
+            positions = series.index.lookup(epochs_ns, mode=mode, tolerance=tolerance)
+            values = series.values[np.maximum(positions, 0)]
+            values[positions == NO_MATCH] = np.nan
+            for i, column in enumerate(series.columns):
+                label = f"{name}_{column}" if counts[column] > 1 else column
+                df[label] = values[:, i]
+        return df
@@ -0,0 +1,252 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# Sentinel returned by the batch lookups when no row satisfies the query
+NO_MATCH = -1
+
+LOOKUP_MODES = ("nearest", "previous", "next")
+
+
+def to_epoch_ns(times, errors="raise"):
+    """
+    Convert a timestamp, or an array of timestamps, to int64 nanoseconds since the Unix epoch.
+    Naive timestamps are treated as UTC, aware timestamps are converted to UTC, also when both
+    kinds are mixed in one array. Integer input is assumed to already be in epoch nanoseconds and
+    is passed through. NaT becomes the int64 minimum. With errors="coerce", strings that cannot be
+    parsed become NaT instead of raising a ValueError.
+    """
+    if isinstance(times, (int, np.integer)):
+        return np.int64(times)
+    if times is None or isinstance(times, (str, datetime.date, np.datetime64)):
+        try:
+            timestamp = pd.Timestamp(times)
+        except ValueError:
+            if errors != "coerce":
+                raise
+            timestamp = pd.NaT
+        if pd.isnull(timestamp):
+            return np.iinfo(np.int64).min
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize("UTC")
+        return np.int64(timestamp.value)
+
+    if not isinstance(times, (pd.Series, pd.Index)):
+        times = np.asarray(times)
+    if pd.api.types.is_integer_dtype(times.dtype):
+        return np.asarray(times, dtype=np.int64)
+
+    if pd.api.types.is_object_dtype(times.dtype) or pd.api.types.is_string_dtype(times.dtype):
+        # Strings may mix precisions ("12:00:00" and "12:00:00.250"), which ISO8601 parsing
+        # accepts. utc=True localizes the naive ones and converts the aware ones, so both can mix
+        try:
+            index = pd.DatetimeIndex(pd.to_datetime(times, format="ISO8601", utc=True))
+        except ValueError:
+            # Other formats, inferred for every element
+            index = pd.DatetimeIndex(
+                pd.to_datetime(times, format="mixed", utc=True, errors=errors)
+            )
+    else:
+        index = pd.DatetimeIndex(pd.to_datetime(times))
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    else:
+        index = index.tz_convert("UTC")
+    return index.as_unit("ns").asi8
+
+
+def _tolerance_ns(tolerance):
+    """
+    Convert a staleness tolerance (Timedelta, timedelta, string or nanoseconds) to int64 ns.
+    """
+    if tolerance is None:
+        return None
+    if isinstance(tolerance, (int, np.integer)):
+        return np.int64(tolerance)
+    return np.int64(pd.Timedelta(tolerance).value)
+
+
+class TimeIndex:
+    """
+    Sorted int64-nanosecond epoch array with binary-search lookups.
+
+    Every lookup costs O(log n) per query time, so the cost stays flat as the table grows. The
+    batch form takes an array of query times and returns an array of row positions, with NO_MATCH
+    where the query falls outside the data or further than the tolerance from the matched row.
+    """
+
+    def __init__(self, epochs, assume_sorted=False):
+        epochs_ns = np.ascontiguousarray(to_epoch_ns(epochs), dtype=np.int64)
+        if not assume_sorted and epochs_ns.size > 1 and np.any(np.diff(epochs_ns) < 0):
+            raise ValueError("TimeIndex epochs must be sorted in ascending order.")
+        self.epochs_ns = epochs_ns
+
+    def __len__(self):
+        return self.epochs_ns.size
+
+    def lookup(self, times, mode="nearest", tolerance=None):
+        """
+        Find the row position matching each of the query times.
+
+        mode is "nearest" (closest row, earlier row on a tie), "previous" (last row at or before
+        the query) or "next" (first row at or after the query). tolerance is the maximum allowed
+        distance between the query and the matched row; rows further away are NO_MATCH.
+        """
+        if mode not in LOOKUP_MODES:
+            raise ValueError(f"Unknown lookup mode {mode!r}, expected one of {LOOKUP_MODES}.")
+
+        query_ns = np.atleast_1d(to_epoch_ns(times)).astype(np.int64, copy=False)
+        epochs_ns = self.epochs_ns
+        n_rows = epochs_ns.size
+        result = np.full(query_ns.shape, NO_MATCH, dtype=np.int64)
+        if n_rows == 0:
+            return result
+
+        # Positions of the neighbouring rows on either side of every query
+        next_pos = np.searchsorted(epochs_ns, query_ns, side="left")
+        prev_pos = np.searchsorted(epochs_ns, query_ns, side="right") - 1
+        has_prev = prev_pos >= 0
+        has_next = next_pos < n_rows
+
+        if mode == "previous":
+            result[has_prev] = prev_pos[has_prev]
+        elif mode == "next":
+            result[has_next] = next_pos[has_next]
+        else:
+            prev_gap = np.where(
+                has_prev, query_ns - epochs_ns[np.clip(prev_pos, 0, None)], np.iinfo(np.int64).max
+            )
+            next_gap = np.where(
+                has_next,
+                epochs_ns[np.clip(next_pos, None, n_rows - 1)] - query_ns,
+                np.iinfo(np.int64).max,
+            )
+            # On an exact hit take the first duplicate, on a true tie take the earlier row
+            use_prev = (prev_gap < next_gap) | ((prev_gap == next_gap) & (prev_gap > 0))
+            result = np.where(use_prev, prev_pos, next_pos)
+
+        # NaT queries never match anything
+        result[query_ns == np.iinfo(np.int64).min] = NO_MATCH
+
+        tolerance_ns = _tolerance_ns(tolerance)
+        if tolerance_ns is not None:
+            matched = result != NO_MATCH
+            gap = np.abs(epochs_ns[result[matched]] - query_ns[matched])
+            stale = np.flatnonzero(matched)[gap > tolerance_ns]
+            result[stale] = NO_MATCH
+
+        return result
+
+    def lookup_one(self, time, mode="nearest", tolerance=None):
+        """
+        Scalar form of lookup. Returns the row position, or None when there is no match.
+        """
+        position = self.lookup(time, mode=mode, tolerance=tolerance)[0]
+        return None if position == NO_MATCH else int(position)
+
+    def bounds(self, t0=None, t1=None):
+        """
+        Row positions (start, stop) of the rows with t0 <= epoch <= t1, found by binary search.
+        A missing bound leaves that side of the window open.
+        """
+        epochs_ns = self.epochs_ns
+        start = 0 if t0 is None else int(np.searchsorted(epochs_ns, to_epoch_ns(t0), side="left"))
+        stop = (
+            epochs_ns.size
+            if t1 is None
+            else int(np.searchsorted(epochs_ns, to_epoch_ns(t1), side="right"))
+        )
+        return start, max(start, stop)
+
+    def window(self, t0=None, t1=None):
+        """
+        Epochs with t0 <= epoch <= t1, as a view of the index (no copy).
+        """
+        start, stop = self.bounds(t0, t1)
+        return self.epochs_ns[start:stop]
+
+    def extend(self, epochs):
+        """
+        Merge new epochs into the index without re-sorting the existing ones.
+
+        Returns (order, positions): order sorts the new epochs, and positions are the insertion
+        points of the sorted new epochs in the old array, as expected by np.insert. Apply the same
+        pair to every column that travels with the index (see merge_column) to keep them aligned.
+        New epochs that are all later than the current last epoch are simply appended.
+        """
+        new_ns = np.atleast_1d(to_epoch_ns(epochs)).astype(np.int64, copy=False)
+        order = np.argsort(new_ns, kind="stable")
+        new_ns = new_ns[order]
+        if self.epochs_ns.size == 0 or new_ns.size == 0 or new_ns[0] >= self.epochs_ns[-1]:
+            positions = np.full(new_ns.size, self.epochs_ns.size, dtype=np.int64)
+            self.epochs_ns = np.concatenate([self.epochs_ns, new_ns])
+        else:
+            # Linear merge of two sorted arrays; later arrivals go after equal existing epochs
+            positions = np.searchsorted(self.epochs_ns, new_ns, side="right")
+            self.epochs_ns = np.insert(self.epochs_ns, positions, new_ns)
+        return order, positions
+
+
+def merge_column(values, new_values, order, positions):
+    """
+    Merge new column values into an existing column using the (order, positions) pair returned by
+    TimeIndex.extend, so the column stays aligned with the index.
+    """
+    new_values = np.asarray(new_values)[order]
+    if positions.size and positions[0] == len(values):
+        return np.concatenate([values, new_values])
+    return np.insert(values, positions, new_values)
+
+
+class TimeCursor:
+    """
+    Position in a TimeIndex for consuming rows tick by tick.
+
+    The cursor remembers the epoch of the last row consumed, not its position, so it stays valid
+    when the index grows, including when rows are inserted before the end. pending(until) gives the
+    slice of rows after that epoch up to until in O(log n), so a consumer only ever touches the
+    new rows. Consumption is either immediate (consume) or confirmed later with mark, which lets a
+    caller that may drop a result (e.g. a superseded background request) only advance the cursor
+    once the rows were actually used.
+    """
+
+    def __init__(self, index, start=None):
+        self.index = index
+        self.reset(start)
+
+    def reset(self, start=None):
+        """
+        Rewind the cursor so the next rows are the ones at or after start (all rows by default).
+        """
+        self.last_ns = None if start is None else to_epoch_ns(start) - 1
+
+    def pending(self, until=None):
+        """
+        Slice of the rows after the last consumed one, up to and including until.
+        """
+        epochs_ns = self.index.epochs_ns
+        start = 0 if self.last_ns is None else int(
+            np.searchsorted(epochs_ns, self.last_ns, side="right")
+        )
+        stop = (
+            epochs_ns.size
+            if until is None
+            else int(np.searchsorted(epochs_ns, to_epoch_ns(until), side="right"))
+        )
+        return slice(start, max(start, stop))
+
+    def mark(self, time):
+        """
+        Record that every row up to and including time has been consumed.
+        """
+        self.last_ns = to_epoch_ns(time)
+
+    def consume(self, until=None):
+        """
+        Return the pending rows up to until and advance the cursor past them.
+        """
+        rows = self.pending(until)
+        if rows.stop > rows.start:
+            self.last_ns = self.index.epochs_ns[rows.stop - 1]
+        return rows
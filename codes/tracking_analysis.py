@@ -0,0 +1,320 @@
+"""
+Gimbal tracking error and command-to-response lag from the LEXI Position exports.
+
+The AZ/EL command and measurement (the position stream of telemetry_streams) are put on a uniform
+time grid, and the tracking error (measure - command, AZ taken the short way round) is computed
+for the whole session in one pass. The session is then cut into sliding windows. For every window
+the lag of the measurement behind the command is the peak of the cross-correlation of their rates,
+computed for all windows at once with zero-padded FFTs, and refined to a fraction of a grid step.
+Each window also reports its error statistics and how long the gimbal took to settle within a
+band after the largest command step in the window.
+
+    python tracking_analysis.py
+    python tracking_analysis.py --window 10min --stride 1min --band 0.05 -o tracking.csv
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from telemetry_streams import TelemetryStreams
+from time_index import to_epoch_ns
+
+# Command and measurement columns of the position stream for each axis, and whether it wraps
+AXES = {
+    "az": ("az_cmd", "az_measure", True),
+    "el": ("el_cmd", "el_measure", False),
+}
+
+DEFAULT_WINDOW = pd.Timedelta(minutes=30)
+DEFAULT_STRIDE = pd.Timedelta(minutes=5)
+DEFAULT_MAX_LAG = pd.Timedelta(minutes=5)
+# Gaps longer than this between two samples are left empty rather than interpolated
+DEFAULT_MAX_GAP = pd.Timedelta(minutes=1)
+# The gimbal is settled once the error stays within this many degrees
+DEFAULT_BAND = 0.1
+# A window's rates only carry a lag when their standard deviation exceeds this fraction of their
+# largest magnitude. Below it (e.g. a constant-rate slew) what varies is rounding noise
+MIN_RATE_VARIATION = 1e-6
+# Windows cross-correlated per FFT batch, to bound the memory of the (batch, n_fft) arrays
+FFT_BATCH = 4096
+
+
+def tracking_error(command, measure, wrapped=False):
+    """
+    measure - command in degrees. For a wrapped axis (AZ) the difference is taken the short way
+    round, in [-180, 180).
+    """
+    error = np.asarray(measure, dtype=np.float64) - np.asarray(command, dtype=np.float64)
+    if wrapped:
+        error = np.mod(error + 180.0, 360.0) - 180.0
+    return error
+
+
+def _unwrap(values):
+    """
+    Unwrap an angle in degrees, skipping NaN samples instead of spreading them.
+    """
+    values = np.array(values, dtype=np.float64)
+    valid = np.isfinite(values)
+    values[valid] = np.unwrap(values[valid], period=360.0)
+    return values
+
+
+def uniform_grid(epochs_ns, columns, step, max_gap=DEFAULT_MAX_GAP):
+    """
+    Resample irregular samples onto a grid of the given step by linear interpolation. Grid points
+    further than max_gap from any sample are NaN. Returns the grid epochs and the resampled
+    columns.
+    """
+    epochs_ns = np.asarray(epochs_ns, dtype=np.int64)
+    step_ns = pd.Timedelta(step).value
+    if epochs_ns.size == 0:
+        return epochs_ns, [np.empty(0) for _ in columns]
+
+    grid_ns = np.arange(epochs_ns[0], epochs_ns[-1] + 1, step_ns, dtype=np.int64)
+    # Distance of every grid point to its closest sample
+    next_pos = np.clip(np.searchsorted(epochs_ns, grid_ns), 1, max(epochs_ns.size - 1, 1))
+    gap = np.minimum(
+        np.abs(grid_ns - epochs_ns[next_pos - 1]), np.abs(epochs_ns[next_pos] - grid_ns)
+    )
+    empty = gap > pd.Timedelta(max_gap).value
+
+    t = (epochs_ns - epochs_ns[0]).astype(np.float64)
+    grid_t = (grid_ns - epochs_ns[0]).astype(np.float64)
+    resampled = []
+    for values in columns:
+        values = np.asarray(values, dtype=np.float64)
+        valid = np.isfinite(values)
+        column = np.interp(grid_t, t[valid], values[valid]) if valid.any() else np.full(
+            grid_ns.size, np.nan
+        )
+        column[empty] = np.nan
+        resampled.append(column)
+    return grid_ns, resampled
+
+
+def window_lags(command, measure, max_lag):
+    """
+    Lag in grid steps of measure behind command for every row of the (n_windows, window) arrays,
+    from the peak of their cross-correlation within +/- max_lag steps, with parabolic sub-step
+    refinement. Also returns the normalized correlation at the peak. Windows with missing samples,
+    or where the command or measurement hardly varies (relative to MIN_RATE_VARIATION), give NaN.
+    """
+    n_windows, window = command.shape
+    max_lag = int(min(max_lag, window - 1))
+    lags = np.full(n_windows, np.nan)
+    peaks = np.full(n_windows, np.nan)
+    # Zero padding to at least twice the window keeps the circular correlation from wrapping
+    n_fft = 1 << int(np.ceil(np.log2(2 * window)))
+    # Negative lags sit at the end of the circular correlation, negative indices pick them up
+    offsets = np.arange(-max_lag, max_lag + 1)
+
+    for start in range(0, n_windows, FFT_BATCH):
+        a = command[start : start + FFT_BATCH]
+        b = measure[start : start + FFT_BATCH]
+        scale_a = np.abs(a).max(axis=1)
+        scale_b = np.abs(b).max(axis=1)
+        a = a - a.mean(axis=1, keepdims=True)
+        b = b - b.mean(axis=1, keepdims=True)
+        power_a = (a * a).sum(axis=1)
+        power_b = (b * b).sum(axis=1)
+        norm = np.sqrt(power_a * power_b)
+        usable = (
+            np.isfinite(norm)
+            & (power_a > window * (MIN_RATE_VARIATION * scale_a) ** 2)
+            & (power_b > window * (MIN_RATE_VARIATION * scale_b) ** 2)
+        )
+        a, b, norm = a[usable], b[usable], norm[usable]
+
+        # correlation[k] = sum_n a[n] b[n + k], so a positive k means the measurement lags
+        spectrum = np.conj(np.fft.rfft(a, n_fft, axis=1)) * np.fft.rfft(b, n_fft, axis=1)
+        correlation = np.fft.irfft(spectrum, n_fft, axis=1)[:, offsets] / norm[:, np.newaxis]
+        best = np.argmax(correlation, axis=1)
+        rows = np.arange(best.size)
+
+        # Fit a parabola through the peak and its neighbours for a sub-step lag
+        inner = (best > 0) & (best < offsets.size - 1)
+        left = correlation[rows, np.clip(best - 1, 0, None)]
+        centre = correlation[rows, best]
+        right = correlation[rows, np.clip(best + 1, None, offsets.size - 1)]
+        curvature = left - 2 * centre + right
+        shift = np.where(inner & (curvature < 0), 0.5 * (left - right) / curvature, 0.0)
+
+        selected = np.flatnonzero(usable) + start
+        lags[selected] = offsets[best] + shift
+        peaks[selected] = centre
+    return lags, peaks
+
+
+def settling_times(command, error, band):
+    """
+    For every row of the (n_windows, window) arrays, the number of grid steps from the largest
+    command step in the window until the error enters the band for good. NaN when the command
+    does not move, or when the error is still outside the band at the end of the window.
+    """
+    n_windows, window = command.shape
+    steps = np.nan_to_num(np.abs(np.diff(command, axis=1)))
+    has_step = steps.max(axis=1) > 0
+    step_at = np.argmax(steps, axis=1) + 1
+
+    outside = ~(np.abs(error) <= band)
+    # Position of the last out-of-band sample, -1 when the whole window is in the band
+    last_outside = window - 1 - np.argmax(outside[:, ::-1], axis=1)
+    last_outside = np.where(outside.any(axis=1), last_outside, -1)
+    settled_at = np.maximum(last_outside + 1, step_at)
+
+    settling = (settled_at - step_at).astype(np.float64)
+    settling[~has_step | (last_outside == window - 1)] = np.nan
+    return settling
+
+
+def analyze_axis(
+    epochs_ns,
+    command,
+    measure,
+    wrapped=False,
+    step=None,
+    window=DEFAULT_WINDOW,
+    stride=DEFAULT_STRIDE,
+    max_lag=DEFAULT_MAX_LAG,
+    band=DEFAULT_BAND,
+    max_gap=DEFAULT_MAX_GAP,
+):
+    """
+    Per-window tracking statistics of one axis. step is the grid spacing, the median sampling
+    interval by default. Returns a DataFrame with one row per window: window_start, window_end,
+    lag_s, correlation (of the rates at that lag), mean_error, rms_error, max_abs_error, in_band
+    (fraction of samples with |error| <= band) and settling_s.
+    """
+    epochs_ns = np.asarray(to_epoch_ns(epochs_ns), dtype=np.int64)
+    if step is None:
+        step = int(np.median(np.diff(epochs_ns))) if epochs_ns.size > 1 else 1_000_000_000
+    step_ns = pd.Timedelta(step).value
+
+    if wrapped:
+        # Unwrap both so the interpolation and the correlation do not see the 0/360 jumps
+        command, measure = (_unwrap(values) for values in (command, measure))
+    grid_ns, (command, measure) = uniform_grid(epochs_ns, [command, measure], step_ns, max_gap)
+    error = tracking_error(command, measure, wrapped)
+
+    window_steps = max(int(pd.Timedelta(window).value // step_ns), 2)
+    stride_steps = max(int(pd.Timedelta(stride).value // step_ns), 1)
+    columns = [
+        "window_start", "window_end", "lag_s", "correlation", "mean_error", "rms_error",
+        "max_abs_error", "in_band", "settling_s",
+    ]
+    if grid_ns.size < window_steps:
+        return pd.DataFrame(columns=columns)
+
+    # (n_windows, window) views of the grid, no copy
+    windows = [
+        sliding_window_view(values, window_steps)[::stride_steps]
+        for values in (grid_ns, command, measure, error)
+    ]
+    window_ns, command_w, measure_w, error_w = windows
+
+    # Slow slews correlate almost equally well at every lag, so the lag is taken from the rates
+    # (first differences), whose cross-correlation has a sharp peak
+    command_rate, measure_rate = (
+        sliding_window_view(np.diff(values), window_steps - 1)[::stride_steps]
+        for values in (command, measure)
+    )
+    max_lag_steps = pd.Timedelta(max_lag).value // step_ns
+    lags, peaks = window_lags(command_rate, measure_rate, max_lag_steps)
+    valid = np.isfinite(error_w)
+    n_valid = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        filled = np.where(valid, error_w, 0.0)
+        mean_error = filled.sum(axis=1) / n_valid
+        rms_error = np.sqrt((filled * filled).sum(axis=1) / n_valid)
+        max_abs_error = np.where(n_valid > 0, np.abs(filled).max(axis=1), np.nan)
+        in_band = (valid & (np.abs(filled) <= band)).sum(axis=1) / n_valid
+
+    return pd.DataFrame(
+        {
+            "window_start": pd.to_datetime(window_ns[:, 0], utc=True),
+            "window_end": pd.to_datetime(window_ns[:, -1], utc=True),
+            "lag_s": lags * step_ns / 1e9,
+            "correlation": peaks,
+            "mean_error": mean_error,
+            "rms_error": rms_error,
+            "max_abs_error": max_abs_error,
+            "in_band": in_band,
+            "settling_s": settling_times(command_w, error_w, band) * step_ns / 1e9,
+        },
+        columns=columns,
+    )
+
+
+def analyze_position(series, t0=None, t1=None, **options):
+    """
+    analyze_axis() for both axes of a position TelemetrySeries, between t0 and t1. Returns one
+    DataFrame with an axis column ("az" or "el").
+    """
+    epochs_ns, _ = series.window(t0, t1)
+    start, stop = series.index.bounds(t0, t1)
+    results = []
+    for axis, (command, measure, wrapped) in AXES.items():
+        df = analyze_axis(
+            epochs_ns,
+            series.column(command)[start:stop],
+            series.column(measure)[start:stop],
+            wrapped=wrapped,
+            **options,
+        )
+        df.insert(0, "axis", axis)
+        results.append(df)
+    return pd.concat(results, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-o", "--output", help="Write the per-window statistics to a CSV file")
+    parser.add_argument("--directory", help="Directory of the LEXI Position exports")
+    parser.add_argument("--start", help="Start of the session (UTC)")
+    parser.add_argument("--end", help="End of the session (UTC)")
+    parser.add_argument("--step", help="Grid spacing, e.g. 20s (default: median sample interval)")
+    parser.add_argument("--window", default=DEFAULT_WINDOW, help="Length of the windows")
+    parser.add_argument("--stride", default=DEFAULT_STRIDE, help="Distance between windows")
+    parser.add_argument("--max-lag", default=DEFAULT_MAX_LAG, help="Largest lag searched")
+    parser.add_argument("--max-gap", default=DEFAULT_MAX_GAP, help="Longest gap interpolated")
+    parser.add_argument(
+        "--band", type=float, default=DEFAULT_BAND, help="Settling band in degrees"
+    )
+    args = parser.parse_args(argv)
+
+    streams = TelemetryStreams() if args.directory is None else TelemetryStreams(args.directory)
+    start = time.perf_counter()
+    series = streams["position"]
+    results = analyze_position(
+        series,
+        args.start,
+        args.end,
+        step=args.step,
+        window=args.window,
+        stride=args.stride,
+        max_lag=args.max_lag,
+        band=args.band,
+        max_gap=args.max_gap,
+    )
+    elapsed = time.perf_counter() - start
+    first, stop = series.index.bounds(args.start, args.end)
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+    summary = results.groupby("axis")[
+        ["lag_s", "rms_error", "max_abs_error", "in_band", "settling_s"]
+    ].median()
+    print(summary.to_string())
+    print(
+        f"Analyzed {stop - first} samples in {len(results)} windows in {elapsed:.2f} s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
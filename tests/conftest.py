@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+from look_direction_engine import LookDirectionEngine
+from synthetic_data import write_dataset
+
+# Ten hours of pointing every 10 s against an hourly ephemeris, like the real STK export
+N_POINTING_ROWS = 3600
+CADENCE = pd.Timedelta(seconds=10)
+N_EPHEMERIS_ROWS = 11
+
+
+@pytest.fixture(scope="session")
+def dataset(tmp_path_factory):
+    """
+    (ephemeris file, pointing file pattern) of a synthetic data set.
+    """
+    directory = tmp_path_factory.mktemp("dataset")
+    return write_dataset(directory, N_POINTING_ROWS, 3, N_EPHEMERIS_ROWS, cadence=CADENCE)
+
+
+@pytest.fixture(scope="session")
+def engine(dataset, tmp_path_factory):
+    ephemeris_file, pattern = dataset
+    engine = LookDirectionEngine(
+        ephemeris_file, pattern, cache_dir=tmp_path_factory.mktemp("cache"), live_pointing=False
+    )
+    engine.load()
+    return engine
@@ -0,0 +1,34 @@
+import io
+
+import numpy as np
+import pandas as pd
+from batch_lookup import format_times, lookup_chunks, read_timestamps
+
+NAT_NS = np.iinfo(np.int64).min
+
+
+def ns(text):
+    return pd.Timestamp(text, tz="UTC").value
+
+
+def test_unparseable_timestamps_become_nat():
+    source = io.StringIO("2025-03-03 23:10:00\nnot a time\n2025-03-04T01:00:00Z\n")
+    chunks = list(read_timestamps(source, chunk_size=2))
+    assert [chunk.size for chunk in chunks] == [2, 1]
+    np.testing.assert_array_equal(
+        np.concatenate(chunks), [ns("2025-03-03 23:10:00"), NAT_NS, ns("2025-03-04 01:00:00")]
+    )
+
+
+def test_timestamps_from_a_csv_column():
+    source = io.StringIO("id,event_time\n1, 2025-03-03 23:10:00\n2,\n")
+    [chunk] = read_timestamps(source, time_column="event_time")
+    np.testing.assert_array_equal(chunk, [ns("2025-03-03 23:10:00"), NAT_NS])
+
+
+def test_nat_queries_get_empty_rows(engine):
+    query_ns = np.array([engine.ephemeris.index.epochs_ns[0], NAT_NS])
+    [rows] = lookup_chunks(engine, [query_ns])
+    assert rows.iloc[0].notna().all()
+    assert rows.iloc[1].isna().all()
+    assert format_times(rows)["epoch_utc"].tolist()[1] == ""
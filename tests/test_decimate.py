@@ -0,0 +1,37 @@
+import numpy as np
+from decimate import MinMaxDecimator
+
+
+def test_envelope_is_kept_within_max_buckets():
+    rng = np.random.default_rng(0)
+    x = np.arange(10_000, dtype=np.float64)
+    y = rng.normal(size=x.size)
+    y[1234] = 50.0
+    y[8765] = -50.0
+
+    decimator = MinMaxDecimator(100)
+    for start in range(0, x.size, 700):
+        decimator.append(x[start : start + 700], y[start : start + 700])
+
+    assert len(decimator) <= 100
+    px, py = decimator.points()
+    assert np.all(np.diff(px) >= 0)
+    assert decimator.y_range() == (-50.0, 50.0)
+    assert (1234.0, 50.0) in zip(px, py)
+    assert (8765.0, -50.0) in zip(px, py)
+
+
+def test_every_sample_kept_below_max_buckets():
+    decimator = MinMaxDecimator(100)
+    decimator.append([0.0, 1.0, 2.0], [3.0, np.nan, 1.0])
+    decimator.append([3.0], [2.0])
+    px, py = decimator.points()
+    np.testing.assert_array_equal(px, [0.0, 2.0, 3.0])
+    np.testing.assert_array_equal(py, [3.0, 1.0, 2.0])
+
+
+def test_empty():
+    decimator = MinMaxDecimator(10)
+    decimator.append([], [])
+    assert len(decimator) == 0
+    assert decimator.y_range() == (np.inf, -np.inf)
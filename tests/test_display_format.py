@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from display_format import MISSING, TableFormatter
+
+DISPLAY_QUANTITIES = {"AZ-EL": ("az", "el"), "Angular Distance": ("angular_distance",)}
+
+
+def formatter():
+    return TableFormatter(
+        ["Earth", "Sun"], DISPLAY_QUANTITIES, alert_quantity="angular_distance", alert_degrees=90
+    )
+
+
+def test_rows_are_rounded_and_tagged():
+    row = pd.Series({"az_earth": 12.345, "el_earth": -1.5, "az_sun": 200.0, "el_sun": np.nan})
+    rows = formatter().rows(row, ["Sun", "Earth"], "AZ-EL", "Degree", 1)
+    assert rows[0][0] == "Sun" and rows[0][2] == ("evenrow",)
+    assert rows[0][1][:2] == ("Sun", 200.0) and np.isnan(rows[0][1][2])
+    assert rows[1] == ("Earth", ("Earth", 12.3, -1.5), ("oddrow",))
+
+    rows = formatter().rows(row, ["Earth"], "AZ-EL", "Radians", 3)
+    assert rows[0][1] == ("Earth", 0.215, -0.026)
+
+
+def test_alerts_and_missing_columns():
+    row = pd.Series({"angular_distance_earth": 120.0})
+    rows = formatter().rows(row, ["Earth", "Sun"], "Angular Distance", "Degree", 2)
+    assert rows[0] == ("Earth", ("Earth", 120.0), ("red", "evenrow"))
+    assert rows[1] == ("Sun", ("Sun", MISSING), ("oddrow",))
+
+
+def test_values_that_round_the_same_are_cached():
+    table_formatter = formatter()
+    first = pd.Series({"az_earth": 12.341, "el_earth": 1.0, "az_sun": 2.0, "el_sun": 3.0})
+    table_formatter.rows(first, ["Earth"], "AZ-EL", "Degree", 2)
+    # A later tick whose values moved less than the last digit shown
+    rows = table_formatter.rows(first + 0.001, ["Earth", "Sun"], "AZ-EL", "Degree", 2)
+    assert (table_formatter.hits, table_formatter.misses) == (1, 1)
+    assert rows[0][1] == ("Earth", 12.34, 1.0)
+
+    rows = table_formatter.rows(first + 0.01, ["Earth"], "AZ-EL", "Degree", 2)
+    assert table_formatter.misses == 2
+    assert rows[0][1] == ("Earth", 12.35, 1.01)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ephemeris import EphemerisInterpolator
+
+EPOCHS = pd.date_range("2025-03-03", periods=6, freq="h", tz="UTC")
+NAT_NS = np.iinfo(np.int64).min
+
+
+def interpolator(values, columns, order=3):
+    return EphemerisInterpolator(EPOCHS, np.column_stack(values), columns, order=order)
+
+
+def test_passes_through_the_samples():
+    rng = np.random.default_rng(0)
+    values = [rng.uniform(-80, 80, 6), rng.uniform(-80, 80, 6)]
+    ephemeris = interpolator(values, ["el_sun", "dec_sun"])
+    np.testing.assert_allclose(ephemeris.evaluate(EPOCHS), np.column_stack(values), atol=1e-12)
+
+
+@pytest.mark.parametrize("order", [1, 3])
+def test_reproduces_linear_motion(order):
+    hours = np.arange(6.0)
+    ephemeris = interpolator([10 + 2 * hours], ["el_sun"], order=order)
+    queries = EPOCHS[0] + pd.to_timedelta([0.25, 1.5, 4.75], unit="h")
+    np.testing.assert_allclose(ephemeris.evaluate(queries)[:, 0], [10.5, 13.0, 19.5])
+
+
+def test_wrapped_angles_take_the_short_way():
+    ephemeris = interpolator([np.array([350.0, 355, 0, 5, 10, 15])], ["az_sun"], order=1)
+    queries = EPOCHS[0] + pd.to_timedelta([1.5, 2.5], unit="h")
+    np.testing.assert_allclose(ephemeris.evaluate(queries)[:, 0], [357.5, 2.5])
+    assert ephemeris.wrapped.tolist() == [True]
+
+
+def test_holds_outside_the_span_and_nat_is_nan():
+    ephemeris = interpolator([np.arange(6.0)], ["el_sun"])
+    queries = np.array([EPOCHS[0].value - 10**12, EPOCHS[-1].value + 10**12, NAT_NS])
+    np.testing.assert_array_equal(ephemeris.evaluate(queries)[:, 0], [0.0, 5.0, np.nan])
+
+
+def test_at_and_rebuilt_from_coefficients():
+    ephemeris = interpolator([np.arange(6.0), np.arange(6.0) * 10], ["el_sun", "ra_sun"])
+    queries = EPOCHS[:3] + pd.Timedelta(minutes=30)
+    frame = ephemeris.at(queries)
+    assert list(frame.columns) == ["epoch_utc", "el_sun", "ra_sun"]
+    assert (frame["epoch_utc"] == queries).all()
+
+    rebuilt = EphemerisInterpolator.from_coefficients(
+        ephemeris.index.epochs_ns, ephemeris.coefficients, ephemeris.columns, ephemeris.wrapped
+    )
+    pd.testing.assert_frame_equal(rebuilt.at(queries), frame)
+
+
+def test_needs_two_samples():
+    with pytest.raises(ValueError):
+        EphemerisInterpolator(EPOCHS[:1], [[1.0]], ["el_sun"])
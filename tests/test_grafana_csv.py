@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from grafana_csv import iter_grafana_blocks, parse_grafana_rows, read_grafana_csv
+
+EXPORT = (
+    "﻿sep=,\r\n"
+    '"_time","DERIVED_LEXI_DEC_J2000_rad","DERIVED_LEXI_RA_J2000_rad"\r\n'
+    "2025-03-03 23:08:08,-21.1 °,-136 °\r\n"
+    "2025-03-03 23:08:09,-21.25 °,-135.5 °\r\n"
+    "2025-03-03 23:08:10.500,,12 °"
+).encode()
+
+
+def ns(text):
+    return pd.Timestamp(text, tz="UTC").value
+
+
+def test_read_export(tmp_path):
+    path = tmp_path / "export.csv"
+    path.write_bytes(EXPORT)
+    columns, epochs_ns, values = read_grafana_csv(path)
+
+    assert columns == ["DERIVED_LEXI_DEC_J2000_rad", "DERIVED_LEXI_RA_J2000_rad"]
+    # The row with fractional seconds goes through the pandas fallback
+    np.testing.assert_array_equal(
+        epochs_ns,
+        [ns("2025-03-03 23:08:08"), ns("2025-03-03 23:08:09"), ns("2025-03-03 23:08:10.5")],
+    )
+    np.testing.assert_array_equal(values, [[-21.1, -136.0], [-21.25, -135.5], [np.nan, 12.0]])
+
+
+def test_rows_without_preamble():
+    epochs_ns, values = parse_grafana_rows(b"2025-03-03 23:08:08,1.5,2\n2025-03-03 23:08:09,3,4\n")
+    np.testing.assert_array_equal(epochs_ns, [ns("2025-03-03 23:08:08"), ns("2025-03-03 23:08:09")])
+    np.testing.assert_array_equal(values, [[1.5, 2.0], [3.0, 4.0]])
+
+    epochs_ns, values = parse_grafana_rows(b"", n_columns=2)
+    assert epochs_ns.size == 0 and values.shape == (0, 2)
+
+
+def test_blocks_match_whole_file(tmp_path):
+    times = pd.date_range("2025-03-03", periods=5000, freq="s")
+    rows = "\r\n".join(f"{t:%Y-%m-%d %H:%M:%S},{i * 0.5} °,{-i} °" for i, t in enumerate(times))
+    path = tmp_path / "export.csv"
+    path.write_bytes(EXPORT[: EXPORT.index(b"2025")] + rows.encode())
+
+    _, epochs_ns, values = read_grafana_csv(path)
+    blocks = list(iter_grafana_blocks(path, block_size=4096))
+    assert len(blocks) > 1
+    np.testing.assert_array_equal(np.concatenate([b[0] for b in blocks]), epochs_ns)
+    np.testing.assert_array_equal(np.concatenate([b[1] for b in blocks]), values)
+    assert epochs_ns.size == 5000
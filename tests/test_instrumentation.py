@@ -0,0 +1,38 @@
+import numpy as np
+from instrumentation import RefreshProfiler, RingBuffer
+
+
+def test_ring_buffer_keeps_the_last_samples():
+    buffer = RingBuffer(capacity=3)
+    for value in range(5):
+        buffer.append(float(value))
+    assert buffer.count == 5 and len(buffer) == 3
+    np.testing.assert_array_equal(buffer.values(), [2.0, 3.0, 4.0])
+    assert buffer.last() == 4.0
+
+
+def test_stages_and_stats():
+    profiler = RefreshProfiler()
+    with profiler.stage("lookup"):
+        pass
+    profiler.timed("format")(lambda: None)()
+    for seconds in (0.001, 0.002, 0.003):
+        profiler.record("table", seconds)
+    assert profiler.stages == ["lookup", "format", "table"]
+
+    stats = profiler.stats("table")
+    assert stats["count"] == 3 and stats["last"] == 0.003
+    assert np.isclose(stats["mean"], 0.002) and stats["max"] == 0.003
+    assert profiler.stats("missing") == {"count": 0}
+    assert "table" in profiler.report()
+
+
+def test_dump_falls_back_to_stderr(tmp_path, capsys):
+    profiler = RefreshProfiler()
+    profiler.record("lookup", 0.001)
+    profiler.dump(str(tmp_path / "profile.txt"))
+    assert "lookup" in (tmp_path / "profile.txt").read_text()
+
+    profiler.dump(str(tmp_path / "missing" / "profile.txt"))
+    err = capsys.readouterr().err
+    assert "Could not write the refresh profile" in err and "lookup" in err
@@ -0,0 +1,118 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+from lookup_service import (
+    FRAME_PREFIX,
+    MAX_HEADER_BYTES,
+    LookupClient,
+    LookupServer,
+    LookupService,
+    LookupServiceError,
+    arrays_matrix,
+    decode_table,
+    encode_frame,
+    encode_table,
+    split_frames,
+    table_matrix,
+)
+
+
+def test_split_frames_keeps_incomplete_frames():
+    data = encode_frame({"op": "ping", "id": 1}) + encode_frame({"op": "at", "id": 2}, b"x" * 8)
+    frames, consumed = split_frames(bytearray(data))
+    assert frames == [({"op": "ping", "id": 1}, b""), ({"op": "at", "id": 2}, b"x" * 8)]
+    assert consumed == len(data)
+
+    frames, consumed = split_frames(bytearray(data[:-1]))
+    assert [header["id"] for header, _ in frames] == [1]
+    assert consumed == len(encode_frame({"op": "ping", "id": 1}))
+    assert split_frames(bytearray(data[:3])) == ([], 0)
+
+
+def test_oversized_header_is_rejected():
+    with pytest.raises(ValueError):
+        split_frames(bytearray(FRAME_PREFIX.pack(MAX_HEADER_BYTES + 1, 0)))
+
+
+def test_table_round_trip():
+    df = pd.DataFrame(
+        {
+            "query_time": pd.to_datetime([0, 10**9, None], utc=True),
+            "count": np.array([1, -2, 3], dtype=np.int64),
+            "value": [0.5, np.nan, -1.0],
+        }
+    ).set_index("query_time")
+    decoded = decode_table(*encode_table(*table_matrix(df)))
+    pd.testing.assert_frame_equal(decoded, df)
+
+
+def test_arrays_matrix_matches_table_matrix():
+    arrays = {
+        "epoch_utc": np.array([0, 10**9], dtype="datetime64[ns]"),
+        "value": np.array([0.5, 1.5]),
+    }
+    frame = pd.DataFrame({"epoch_utc": pd.to_datetime([0, 10**9], utc=True), "value": [0.5, 1.5]})
+    columns, index, matrix = arrays_matrix(arrays)
+    expected_columns, _, expected = table_matrix(frame)
+    assert columns == expected_columns and index is None
+    np.testing.assert_array_equal(matrix.view("<i8"), expected.view("<i8"))
+
+
+def query_times(engine, n):
+    epochs_ns = engine.ephemeris.index.epochs_ns
+    return np.linspace(epochs_ns[0], epochs_ns[-1], n).astype(np.int64)
+
+
+def run(service, requests):
+    """
+    Results of a batch of (op, times, params) requests sent to the service as one read.
+    """
+    frames = [
+        ({"op": op, "id": i, "n": len(times), **params}, times.astype("<i8").tobytes())
+        for i, (op, times, params) in enumerate(requests)
+    ]
+    results = []
+    for response in service.handle_batch(frames):
+        [(header, payload)], _ = split_frames(bytearray(response))
+        results.append(decode_table(header["table"], payload) if "table" in header else header)
+    return results
+
+
+def test_batched_requests_match_the_engine(engine):
+    service = LookupService(engine)
+    times = query_times(engine, 7)
+    first, second, third = run(
+        service, [("at", times[:3], {}), ("at", times[3:], {}), ("lookup", times, {})]
+    )
+    pd.testing.assert_frame_equal(first, engine.at(times[:3]))
+    pd.testing.assert_frame_equal(second, engine.at(times[3:]))
+    pd.testing.assert_frame_equal(third, engine.lookup(times))
+    # The two at requests were answered by one lookup
+    assert service.lookups == 2
+
+
+def test_failed_request_does_not_fail_its_batch(engine):
+    service = LookupService(engine)
+    times = query_times(engine, 2)
+    good, bad = run(service, [("at", times, {}), ("at", times, {"mode": "sideways"})])
+    pd.testing.assert_frame_equal(good, engine.at(times))
+    assert "ValueError" in bad["error"]
+
+
+def test_client_against_a_server(engine):
+    server = LookupServer(LookupService(engine), ("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        times = query_times(engine, 5)
+        with LookupClient(server.server_address) as client:
+            pd.testing.assert_frame_equal(client.at(times), engine.at(times))
+            results = client.pipeline([("at", times[i : i + 1], {}) for i in range(5)])
+            pd.testing.assert_frame_equal(pd.concat(results, ignore_index=True), engine.at(times))
+            with pytest.raises(LookupServiceError):
+                client.request("bogus")
+    finally:
+        server.shutdown()
+        server.server_close()
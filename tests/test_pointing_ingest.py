@@ -0,0 +1,165 @@
+import os
+
+import numpy as np
+import pandas as pd
+from pointing_ingest import PointingIngestor, iter_pointing_chunks, resample_pointing
+
+HEADER = '﻿sep=,\r\n"_time","DERIVED_LEXI_DEC_J2000_rad","DERIVED_LEXI_RA_J2000_rad"'
+START_NS = pd.Timestamp("2025-03-03 23:08:08", tz="UTC").value
+
+
+def pointing(n_rows, cadence_s=1):
+    """
+    (epochs_ns, dec, ra) of n_rows samples of a slow slew, rounded like the exports.
+    """
+    epochs_ns = START_NS + np.arange(n_rows, dtype=np.int64) * cadence_s * 10**9
+    steps = np.arange(n_rows)
+    dec = np.round(-21 + 10 * np.sin(steps / 500), 2)
+    ra = np.round(-136 + 20 * np.cos(steps / 300), 2)
+    return epochs_ns, dec, ra
+
+
+def format_rows(epochs_ns, dec, ra):
+    times = pd.to_datetime(epochs_ns).strftime("%Y-%m-%d %H:%M:%S")
+    return "\r\n".join(f"{t},{d:.2f} °,{r:.2f} °" for t, d, r in zip(times, dec, ra))
+
+
+def write_export(path, epochs_ns, dec, ra):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(HEADER + "\r\n" + format_rows(epochs_ns, dec, ra))
+
+
+def settle(path):
+    # Old enough that the last row, which has no line break, is read too
+    past = os.stat(path).st_mtime - 60
+    os.utime(path, (past, past))
+
+
+def append_rows(path, epochs_ns, dec, ra):
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        f.write("\r\n" + format_rows(epochs_ns, dec, ra))
+    settle(path)
+
+
+def test_ingestor_tails_appended_rows(tmp_path):
+    epochs_ns, dec, ra = pointing(300)
+    path = tmp_path / "LEXI_Pointing_Measured_0.csv"
+    write_export(path, epochs_ns[:200], dec[:200], ra[:200])
+    settle(path)
+
+    ingestor = PointingIngestor(str(tmp_path / "LEXI_Pointing_Measured*.csv"))
+    assert ingestor.poll() == 200
+    assert ingestor.poll() == 0
+    append_rows(path, epochs_ns[200:], dec[200:], ra[200:])
+    assert ingestor.poll() == 100
+    np.testing.assert_array_equal(ingestor.table.index.epochs_ns, epochs_ns)
+    np.testing.assert_array_equal(ingestor.table.dec_lexi, dec)
+
+
+def test_rewritten_files_replace_their_rows(tmp_path):
+    epochs_ns, dec, ra = pointing(300)
+    other = tmp_path / "LEXI_Pointing_Measured_1.csv"
+    write_export(other, epochs_ns[200:], dec[200:], ra[200:])
+    settle(other)
+    path = tmp_path / "LEXI_Pointing_Measured_0.csv"
+    write_export(path, epochs_ns[:200], dec[:200], ra[:200])
+    settle(path)
+    ingestor = PointingIngestor(str(tmp_path / "LEXI_Pointing_Measured*.csv"))
+    assert ingestor.poll() == 300
+
+    # Shorter than what was read
+    write_export(path, epochs_ns[:150], dec[:150], ra[:150])
+    settle(path)
+    assert ingestor.poll() == 150
+    np.testing.assert_array_equal(ingestor.table.index.epochs_ns, epochs_ns[np.r_[:150, 200:300]])
+
+    # Same size, new values
+    size = os.stat(path).st_size
+    write_export(path, epochs_ns[:150], dec[:150][::-1], ra[:150])
+    past = os.stat(path).st_mtime - 120
+    os.utime(path, (past, past))
+    assert os.stat(path).st_size == size
+    assert ingestor.poll() == 150
+    assert len(ingestor.table) == 250
+    np.testing.assert_array_equal(ingestor.table.dec_lexi[:150], dec[:150][::-1])
+    np.testing.assert_array_equal(ingestor.table.dec_lexi[150:], dec[200:])
+
+
+def test_k_way_merge_of_overlapping_exports(tmp_path):
+    epochs_ns, dec, ra = pointing(5000)
+    paths = []
+    for i, first in enumerate(range(0, 5000, 1250)):
+        # Each export repeats the start of the next one, like the dashboard exports
+        rows = slice(first, first + 1600)
+        paths.append(str(tmp_path / f"LEXI_Pointing_Measured_{i}.csv"))
+        write_export(paths[-1], epochs_ns[rows], dec[rows], ra[rows])
+    chunks = list(iter_pointing_chunks(paths, chunk_size=256))
+
+    assert all(chunk[0].size <= 256 for chunk in chunks)
+    merged_ns = np.concatenate([chunk[0] for chunk in chunks])
+    assert np.all(np.diff(merged_ns) >= 0)
+
+    # Every row of every file comes out exactly once
+    expected = np.sort(np.concatenate([c[0] for p in paths for c in iter_pointing_chunks([p])]))
+    np.testing.assert_array_equal(merged_ns, expected)
+
+
+def test_resample_matches_pandas():
+    epochs_ns, dec, ra = pointing(3000, cadence_s=7)
+    # A gap of empty bins, filled by interpolation
+    keep = (epochs_ns < epochs_ns[1000]) | (epochs_ns > epochs_ns[1200])
+    epochs_ns, dec, ra = epochs_ns[keep], dec[keep], ra[keep]
+
+    chunks = [
+        (epochs_ns[i : i + 333], dec[i : i + 333], ra[i : i + 333]) for i in range(0, 2800, 333)
+    ]
+    bins = list(resample_pointing(chunks, "1min"))
+    bin_ns, bin_dec, bin_ra = (np.concatenate(column) for column in zip(*bins))
+
+    index = pd.DatetimeIndex(pd.to_datetime(epochs_ns, utc=True))
+    expected = pd.DataFrame({"dec": dec, "ra": ra}, index=index)
+    expected = expected.resample("1min").mean().interpolate()
+    np.testing.assert_array_equal(bin_ns, expected.index.as_unit("ns").asi8)
+    np.testing.assert_allclose(bin_dec, expected["dec"], rtol=1e-12)
+    np.testing.assert_allclose(bin_ra, expected["ra"], rtol=1e-12)
+
+
+def test_restored_ingestor_only_reads_new_rows(tmp_path):
+    epochs_ns, dec, ra = pointing(300)
+    path = tmp_path / "LEXI_Pointing_Measured_0.csv"
+    pattern = str(tmp_path / "LEXI_Pointing_Measured*.csv")
+    cache = str(tmp_path / "cache" / "lexi_pointing_live")
+    write_export(path, epochs_ns[:200], dec[:200], ra[:200])
+    settle(path)
+    first = PointingIngestor(pattern)
+    first.poll()
+    first.save(cache)
+
+    append_rows(path, epochs_ns[200:], dec[200:], ra[200:])
+    restored = PointingIngestor(pattern)
+    assert restored.restore(cache)
+    assert len(restored.table) == 200
+    assert restored.poll() == 100
+
+    full = PointingIngestor(pattern)
+    full.poll()
+    np.testing.assert_array_equal(restored.table.index.epochs_ns, full.table.index.epochs_ns)
+    np.testing.assert_array_equal(restored.table.dec_lexi, full.table.dec_lexi)
+    np.testing.assert_array_equal(restored.table.ra_lexi, full.table.ra_lexi)
+
+
+def test_restore_refuses_rewritten_files(tmp_path):
+    epochs_ns, dec, ra = pointing(200)
+    path = tmp_path / "LEXI_Pointing_Measured_0.csv"
+    pattern = str(tmp_path / "LEXI_Pointing_Measured*.csv")
+    cache = str(tmp_path / "cache" / "lexi_pointing_live")
+    write_export(path, epochs_ns, dec, ra)
+    ingestor = PointingIngestor(pattern)
+    ingestor.poll()
+    ingestor.save(cache)
+
+    write_export(path, epochs_ns[:50], dec[:50], ra[:50])
+    assert not PointingIngestor(pattern).restore(cache)
+    os.remove(path)
+    assert not PointingIngestor(pattern).restore(cache)
+    assert not PointingIngestor(pattern).restore(str(tmp_path / "missing"))
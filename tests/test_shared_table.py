@@ -0,0 +1,81 @@
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+from shared_table import (
+    HEADER_PREFIX,
+    SharedLookDirectionEngine,
+    SharedTablePublisher,
+    SharedTableReader,
+)
+
+
+@pytest.fixture
+def publisher():
+    publisher = SharedTablePublisher(f"lexi_test_{uuid.uuid4().hex[:12]}")
+    yield publisher
+    publisher.close()
+
+
+def test_publish_and_append(publisher):
+    publisher.publish("data", {"x": np.arange(3.0)}, attrs={"unit": "deg"}, headroom=1.0)
+    reader = SharedTableReader(publisher.name)
+    arrays, attrs = reader.read()["data"]
+    np.testing.assert_array_equal(arrays["x"], [0, 1, 2])
+    assert attrs == {"unit": "deg"}
+    assert not arrays["x"].flags.writeable
+    assert not reader.changed()
+
+    assert publisher.append("data", {"x": np.array([3.0, 4.0])})
+    assert reader.changed()
+    np.testing.assert_array_equal(reader.read()["data"][0]["x"], [0, 1, 2, 3, 4])
+
+    # No headroom, so the rows go to a new segment on the next publish
+    publisher.publish("full", {"x": np.arange(2)})
+    assert not publisher.append("full", {"x": np.arange(1)})
+
+
+def test_reader_waits_for_a_consistent_header(publisher):
+    publisher.publish("data", {"x": np.arange(3)})
+    reader = SharedTableReader(publisher.name)
+    buffer = publisher._header.buf
+    sequence, length = HEADER_PREFIX.unpack_from(buffer, 0)
+
+    # An odd sequence number means the publisher is halfway through writing the header
+    HEADER_PREFIX.pack_into(buffer, 0, sequence + 1, length)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(reader.read()), daemon=True)
+    thread.start()
+    time.sleep(0.2)
+    assert not result
+    HEADER_PREFIX.pack_into(buffer, 0, sequence, length)
+    thread.join(5)
+    np.testing.assert_array_equal(result[0]["data"][0]["x"], [0, 1, 2])
+
+
+def test_reader_retries_when_a_segment_is_replaced_mid_attach(publisher, monkeypatch):
+    publisher.publish("data", {"x": np.arange(3)})
+    reader = SharedTableReader(publisher.name)
+    stale = reader._read_schema()
+    # The publisher replaces the segment, and unlinks the old one, before the reader maps it
+    publisher.publish("data", {"x": np.arange(5)})
+
+    schemas = [stale]
+    read_schema = reader._read_schema
+    monkeypatch.setattr(reader, "_read_schema", lambda: schemas.pop() if schemas else read_schema())
+    np.testing.assert_array_equal(reader.read()["data"][0]["x"], [0, 1, 2, 3, 4])
+    assert reader.version == publisher.version
+
+
+def test_shared_engine_matches_the_local_one(engine):
+    times = pd.date_range(
+        engine.ephemeris.index.epochs_ns[0], engine.ephemeris.index.epochs_ns[-1], periods=9
+    )
+    with SharedTablePublisher(f"lexi_test_{uuid.uuid4().hex[:12]}") as publisher:
+        publisher.publish_engine(engine)
+        shared = SharedLookDirectionEngine(publisher.name)
+        pd.testing.assert_frame_equal(shared.at(times), engine.at(times))
+        pd.testing.assert_frame_equal(shared.lookup(times), engine.lookup(times))
@@ -0,0 +1,45 @@
+import os
+import time
+
+import numpy as np
+from PIL import Image
+from snapshot_writer import SnapshotWriter
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_snapshot_is_written_with_the_usual_file_mode(tmp_path):
+    path = tmp_path / "plot.png"
+    writer = SnapshotWriter(path, interval=0)
+    pixels = np.zeros((4, 6, 4), dtype=np.uint8)
+    pixels[..., 0] = 200
+    pixels[..., 3] = 255
+    writer.offer(pixels)
+    wait_for(lambda: writer.written_frames == 1)
+    writer.stop()
+
+    with Image.open(path) as image:
+        np.testing.assert_array_equal(np.asarray(image), pixels)
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert os.stat(path).st_mode & 0o777 == 0o666 & ~umask
+    assert os.listdir(tmp_path) == ["plot.png"]
+
+
+def test_failed_writes_are_counted(tmp_path):
+    writer = SnapshotWriter(tmp_path / "missing" / "plot.png", interval=0)
+    writer.offer(np.zeros((2, 2, 4), dtype=np.uint8))
+    wait_for(lambda: writer.failed_frames == 1)
+    assert isinstance(writer.last_error, FileNotFoundError)
+    assert writer.written_frames == 0
+
+    # The thread keeps going
+    os.mkdir(tmp_path / "missing")
+    writer.offer(np.zeros((2, 2, 4), dtype=np.uint8))
+    wait_for(lambda: writer.written_frames == 1)
+    writer.stop()
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from streaming_merge import stream_merge
+from table_cache import load_table
+
+START = pd.Timestamp("2025-03-03 00:00:00", tz="UTC")
+STK_TARGETS = ["earth", "sun", "crab", "sco", "mag", "bonus"]
+# Ten hours of pointing every 10 s against an hourly ephemeris, like the real STK export
+N_POINTING_ROWS = 3600
+N_EPHEMERIS_ROWS = 11
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    """
+    (ephemeris file, pointing file pattern) of a small data set in the layout of the real files.
+    """
+    directory = tmp_path_factory.mktemp("dataset")
+    epochs = START + pd.to_timedelta(np.arange(N_POINTING_ROWS) * 10, unit="s")
+    steps = np.arange(N_POINTING_ROWS)
+    rows = "\r\n".join(
+        f"{t:%Y-%m-%d %H:%M:%S},{d:.2f} °,{r:.2f} °"
+        for t, d, r in zip(epochs, -21 + 10 * np.sin(steps / 500), 40 * np.cos(steps / 300))
+    )
+    (directory / "LEXI_Pointing_Measured_0.csv").write_text(
+        'sep=,\r\n"_time","DERIVED_LEXI_DEC_J2000_rad","DERIVED_LEXI_RA_J2000_rad"\r\n' + rows,
+        encoding="utf-8-sig",
+    )
+
+    hours = np.arange(N_EPHEMERIS_ROWS)
+    epochs = START + pd.to_timedelta(hours, unit="h")
+    ephemeris = pd.DataFrame({"epoch_utc": epochs.strftime("%b %d %Y %H:%M:%S.%f000")})
+    for k, target in enumerate(STK_TARGETS):
+        ephemeris[f"az_{target}"] = (40 * k + 7 * hours) % 360
+        ephemeris[f"el_{target}"] = -60 + 20 * k + hours
+        ephemeris[f"ra_{target}"] = (60 * k + 5 * hours) % 360
+        ephemeris[f"dec_{target}"] = 50 - 20 * k - hours
+    ephemeris_file = directory / "LEXIAngleData.csv"
+    ephemeris.to_csv(ephemeris_file, index=False)
+    return ephemeris_file, str(directory / "LEXI_Pointing_Measured*.csv")
+
+
+def merged(dataset, tmp_path, **options):
+    ephemeris_file, pattern = dataset
+    output = tmp_path / "merged"
+    n_rows = stream_merge(
+        output, pattern, ephemeris_file, format="npy", chunk_size=500, **options
+    )
+    table = load_table(output)
+    assert len(table) == n_rows
+    return table
+
+
+def test_default_join_fills_every_row(dataset, tmp_path):
+    table = merged(dataset, tmp_path)
+    assert table["angular_distance_sun"].isna().mean() == 0.0
+    assert table["az_sun"].isna().mean() == 0.0
+    # The ephemeris is evaluated at the sample times themselves
+    assert (table["epoch_stk"] == table["epoch_utc"]).all()
+    assert table["epoch_utc"].is_monotonic_increasing
+
+
+def test_nearest_join_leaves_most_rows_empty(dataset, tmp_path):
+    # Only the samples within a minute of an hourly STK row get values
+    table = merged(dataset, tmp_path, method="nearest")
+    assert table["angular_distance_sun"].isna().mean() > 0.95
+
+
+def test_resampled_merge(dataset, tmp_path):
+    table = merged(dataset, tmp_path, resample="1min")
+    epochs = pd.DatetimeIndex(table["epoch_utc"])
+    assert (epochs == epochs.floor("1min")).all()
+    assert table["dec_lexi"].notna().all()
+
+
+def test_unknown_method(dataset, tmp_path):
+    with pytest.raises(ValueError):
+        merged(dataset, tmp_path, method="linear")
@@ -0,0 +1,74 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from table_cache import CACHE_DIR, load_or_build, load_table, save_table
+
+
+def test_table_round_trip(tmp_path):
+    df = pd.DataFrame(
+        {
+            "epoch_utc": pd.to_datetime([0, 10**9, 2 * 10**9], utc=True),
+            "dec_lexi": [-21.1, np.nan, -21.3],
+            "count": np.array([1, 2, 3], dtype=np.int64),
+        }
+    ).set_index("epoch_utc")
+    path = tmp_path / "table"
+    save_table(df, path, "key")
+
+    loaded = load_table(path, "key")
+    pd.testing.assert_frame_equal(loaded, df)
+    assert load_table(path, "other key") is None
+    assert load_table(tmp_path / "missing") is None
+
+
+def test_rebuilt_when_an_input_changes(tmp_path):
+    source = tmp_path / "input.csv"
+    source.write_text("x\n1\n")
+    builds = []
+
+    def build():
+        builds.append(1)
+        return pd.DataFrame({"x": np.arange(3.0) + len(builds)})
+
+    cache_dir = tmp_path / "cache"
+    first = load_or_build("table", [source], build, cache_dir=cache_dir)
+    again = load_or_build("table", [source], build, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(again, first)
+    assert len(builds) == 1
+
+    source.write_text("x\n1\n2\n")
+    os.utime(source, ns=(0, 0))
+    rebuilt = load_or_build("table", [source], build, cache_dir=cache_dir)
+    assert len(builds) == 2
+    np.testing.assert_array_equal(rebuilt["x"], [2.0, 3.0, 4.0])
+    assert os.listdir(cache_dir) == ["table"]
+
+
+def test_concurrent_rebuilds_of_the_same_table(tmp_path):
+    path = tmp_path / "table"
+    errors = []
+
+    def rebuild(value):
+        df = pd.DataFrame({"x": np.full(1000, float(value))})
+        try:
+            for _ in range(30):
+                save_table(df, path, "key")
+        except OSError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=rebuild, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert load_table(path, "key")["x"].nunique() == 1
+    assert os.listdir(tmp_path) == ["table"]
+
+
+def test_cache_dir_does_not_depend_on_the_working_directory():
+    assert os.path.isabs(CACHE_DIR)
+    assert os.path.basename(os.path.dirname(CACHE_DIR)) == "data"
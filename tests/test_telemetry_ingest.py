@@ -0,0 +1,95 @@
+import numpy as np
+from telemetry_ingest import FIELDS, TelemetryRing, format_records, parse_records
+
+
+def records(start, n):
+    epochs_ns = np.arange(start, start + n, dtype=np.int64)
+    values = np.column_stack([epochs_ns * 1.0 + k for k in range(len(FIELDS))])
+    return epochs_ns, values
+
+
+def test_ring_wraps_around():
+    ring = TelemetryRing(capacity=5)
+    ring.append(*records(0, 3))
+    ring.append(*records(3, 4))
+    assert ring.count == 7 and len(ring) == 5
+
+    count, epochs_ns, values = ring.since(0)
+    assert count == 7
+    np.testing.assert_array_equal(epochs_ns, [2, 3, 4, 5, 6])
+    np.testing.assert_array_equal(values, records(2, 5)[1])
+
+    # A consumer that is behind by less than the capacity only gets what it has not seen
+    np.testing.assert_array_equal(ring.since(5)[1], [5, 6])
+    assert ring.since(7)[1].size == 0
+    assert ring.latest()[0] == 6
+
+
+def test_batch_larger_than_the_ring():
+    ring = TelemetryRing(capacity=4)
+    ring.append(*records(0, 2))
+    ring.append(*records(2, 9))
+    count, epochs_ns, _ = ring.since(0)
+    assert count == 11
+    np.testing.assert_array_equal(epochs_ns, [7, 8, 9, 10])
+
+
+def test_table_sorts_and_skips_records_without_pointing():
+    ring = TelemetryRing(capacity=8)
+    dec, ra = FIELDS.index("dec_lexi"), FIELDS.index("ra_lexi")
+    epochs_ns, values = records(0, 4)
+    epochs_ns = epochs_ns[[0, 2, 1, 3]]
+    values[3, dec] = np.nan
+    ring.append(epochs_ns, values)
+
+    table = ring.table()
+    np.testing.assert_array_equal(table.index.epochs_ns, [0, 1, 2])
+    np.testing.assert_array_equal(table.dec_lexi, values[[0, 2, 1], dec])
+    np.testing.assert_array_equal(table.ra_lexi, values[[0, 2, 1], ra])
+    assert ring.table() is table
+    ring.append(*records(10, 1))
+    assert len(ring.table()) == 4
+
+
+def test_records_round_trip():
+    epochs_ns, values = records(1_741_000_000_000_000_000, 3)
+    values[1, 2] = np.nan
+    parsed_ns, parsed, rejected = parse_records(format_records(epochs_ns, values))
+    np.testing.assert_array_equal(parsed_ns, epochs_ns)
+    np.testing.assert_array_equal(parsed, values)
+    assert rejected == 0
+
+
+def test_malformed_records_are_counted():
+    data = b"10,1,2\nnot a time,1\n20,1,2,3,4,5\n\n2025-03-03T23:10:00Z,-21.5\n-5,1\n--5,1\n"
+    epochs_ns, values, rejected = parse_records(data)
+    assert rejected == 3
+    assert epochs_ns[0] == 10 and epochs_ns.size == 3
+    # Epochs before 1970 are negative
+    assert epochs_ns[2] == -5
+    np.testing.assert_array_equal(values[0], [1, 2, np.nan, np.nan])
+    assert values[1, 0] == -21.5
+
+
+def test_table_follows_the_ring():
+    rng = np.random.default_rng(0)
+    ring = TelemetryRing(capacity=50)
+    dec = FIELDS.index("dec_lexi")
+    start = 0
+    for batch in range(200):
+        n = int(rng.integers(0, 30))
+        epochs_ns, values = records(start, n)
+        start += n
+        if batch % 17 == 0 and n > 1:
+            # Records reordered on the way, some older than records already held
+            epochs_ns = epochs_ns - rng.integers(0, 40, n)
+        values[rng.random(n) < 0.1, dec] = np.nan
+        ring.append(epochs_ns, values)
+
+        # The same table built from scratch from the records held
+        _, held_ns, held = ring.since(0)
+        keep = ~np.isnan(held[:, dec])
+        order = np.argsort(held_ns[keep], kind="stable")
+        table = ring.table()
+        np.testing.assert_array_equal(table.index.epochs_ns, held_ns[keep][order])
+        np.testing.assert_array_equal(table.dec_lexi, held[keep, dec][order])
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from time_index import NO_MATCH, TimeCursor, TimeIndex, merge_column, to_epoch_ns
+
+NAT_NS = np.iinfo(np.int64).min
+
+
+def ns(text):
+    return pd.Timestamp(text, tz="UTC").value
+
+
+def test_to_epoch_ns_scalars():
+    assert to_epoch_ns("2025-03-03 23:10:00") == ns("2025-03-03 23:10:00")
+    assert to_epoch_ns("2025-03-04T01:00:00+01:00") == ns("2025-03-04 00:00:00")
+    assert to_epoch_ns(12345) == 12345
+    assert to_epoch_ns(None) == NAT_NS
+
+
+def test_to_epoch_ns_mixes_naive_and_aware_strings():
+    epochs = to_epoch_ns(["2025-03-03 23:10:00", "2025-03-04T01:00:00Z"])
+    np.testing.assert_array_equal(epochs, [ns("2025-03-03 23:10:00"), ns("2025-03-04 01:00:00")])
+
+
+def test_to_epoch_ns_mixes_formats_and_precisions():
+    epochs = to_epoch_ns(["2025-03-03 23:10:00.250", "03/04/2025 01:00", "2025-03-04T02:00:00Z"])
+    expected = [ns("2025-03-03 23:10:00.250"), ns("2025-03-04 01:00:00"), ns("2025-03-04 02:00")]
+    np.testing.assert_array_equal(epochs, expected)
+
+
+def test_to_epoch_ns_coerces_unparseable_strings():
+    with pytest.raises(ValueError):
+        to_epoch_ns(["2025-03-03 23:10:00", "not a time"])
+    epochs = to_epoch_ns(["2025-03-03 23:10:00", "not a time"], errors="coerce")
+    np.testing.assert_array_equal(epochs, [ns("2025-03-03 23:10:00"), NAT_NS])
+    assert to_epoch_ns("not a time", errors="coerce") == NAT_NS
+
+
+def test_lookup_modes_and_ties():
+    index = TimeIndex([10, 20, 20, 30])
+    queries = [5, 10, 15, 20, 24, 26, 35]
+    np.testing.assert_array_equal(index.lookup(queries, "nearest"), [0, 0, 0, 1, 2, 3, 3])
+    np.testing.assert_array_equal(
+        index.lookup(queries, "previous"), [NO_MATCH, 0, 0, 2, 2, 2, 3]
+    )
+    np.testing.assert_array_equal(index.lookup(queries, "next"), [0, 0, 1, 1, 3, 3, NO_MATCH])
+    assert index.lookup_one(25) == 2
+
+
+def test_lookup_tolerance_and_nat():
+    index = TimeIndex([10, 20, 30])
+    np.testing.assert_array_equal(index.lookup([11, 15, 40], tolerance=4), [0, NO_MATCH, NO_MATCH])
+    np.testing.assert_array_equal(index.lookup([NAT_NS]), [NO_MATCH])
+    assert TimeIndex([]).lookup_one(10) is None
+
+
+def test_unsorted_epochs_are_rejected():
+    with pytest.raises(ValueError):
+        TimeIndex([3, 1, 2])
+
+
+def test_bounds_and_window():
+    index = TimeIndex([10, 20, 30, 40])
+    assert index.bounds(15, 30) == (1, 3)
+    assert index.bounds(None, 5) == (0, 0)
+    np.testing.assert_array_equal(index.window(20), [20, 30, 40])
+
+
+def test_extend_keeps_columns_aligned():
+    index = TimeIndex([10, 30])
+    values = np.array([1.0, 3.0])
+    order, positions = index.extend([40, 20, 30])
+    values = merge_column(values, [4.0, 2.0, 3.5], order, positions)
+    np.testing.assert_array_equal(index.epochs_ns, [10, 20, 30, 30, 40])
+    # A later arrival goes after an equal epoch already held
+    np.testing.assert_array_equal(values, [1.0, 2.0, 3.0, 3.5, 4.0])
+
+    order, positions = index.extend([50, 60])
+    np.testing.assert_array_equal(merge_column(values, [5.0, 6.0], order, positions)[-2:], [5, 6])
+
+
+def test_cursor_survives_inserts():
+    index = TimeIndex([10, 20, 30])
+    cursor = TimeCursor(index)
+    assert cursor.consume(20) == slice(0, 2)
+    index.extend([15, 25])
+    # 15 lands before the last row consumed, so only 25 and 30 are new to the cursor
+    np.testing.assert_array_equal(index.epochs_ns[cursor.pending()], [25, 30])
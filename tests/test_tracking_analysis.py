@@ -0,0 +1,31 @@
+import numpy as np
+from tracking_analysis import window_lags
+
+
+def test_lag_of_a_delayed_copy():
+    rng = np.random.default_rng(0)
+    position = np.cumsum(rng.normal(size=2001))
+    delayed = np.r_[np.zeros(7), position[:-7]]
+    lags, peaks = window_lags(np.diff(position)[None], np.diff(delayed)[None], 300)
+    assert abs(lags[0] - 7) < 0.01
+    assert peaks[0] > 0.99
+
+
+def test_constant_rate_windows_have_no_lag():
+    # A steady slew far from 0: after removing the mean only rounding noise is left
+    position = 200 + 0.004 * np.arange(2000.0)
+    command = np.diff(position)[None]
+    measure = np.diff(position + 0.01)[None]
+    lags, peaks = window_lags(command, measure, 300)
+    assert np.isnan(lags[0]) and np.isnan(peaks[0])
+
+
+def test_still_and_incomplete_windows_have_no_lag():
+    rng = np.random.default_rng(1)
+    moving = np.diff(np.cumsum(rng.normal(size=101)))
+    gap = moving.copy()
+    gap[50] = np.nan
+    command = np.vstack([np.zeros(100), gap, moving])
+    lags, _ = window_lags(command, command.copy(), 20)
+    assert np.isnan(lags[:2]).all()
+    assert lags[2] == 0